@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sensors.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -136,4 +137,70 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     )
-}
\ No newline at end of file
+}
+
+# Sensors API
+
+# Width of sensors_reading partitions, once converted with `manage.py partition_readings --convert`
+SENSORS_READING_PARTITION_MONTHS = 1
+
+# Cache serialized responses of closed reading ranges, keyed by the sensor's data version.
+# Set to an alias from CACHES (e.g. a LocMemCache or FileBasedCache backend) to enable.
+SENSORS_RESPONSE_CACHE = None
+SENSORS_RESPONSE_CACHE_MAX_BYTES = 5 * 1024 * 1024
+
+# Write-behind buffer of the async (`/buffered`) ingest endpoints, one per worker process.
+# Readings are flushed in batches of SENSORS_INGEST_BATCH_SIZE or after SENSORS_INGEST_MAX_DELAY_MS;
+# when SENSORS_INGEST_BUFFER_CAPACITY readings are held, submitters wait up to
+# SENSORS_INGEST_BACKPRESSURE_TIMEOUT seconds before getting a 503.
+SENSORS_INGEST_BATCH_SIZE = 5000
+SENSORS_INGEST_MAX_DELAY_MS = 200
+SENSORS_INGEST_BUFFER_CAPACITY = 100000
+SENSORS_INGEST_BACKPRESSURE_TIMEOUT = 5.0  # seconds
+# Acknowledged readings are spooled here until written, and readings the database rejects are
+# moved to its `rejected` subdirectory; set to None to keep them in memory only
+SENSORS_INGEST_SPOOL_DIR = BASE_DIR / "spool"
+
+# Live (Server-Sent Events) reading streams: readings buffered per slow client before
+# the oldest are dropped, seconds of silence before a heartbeat comment is sent, and
+# seconds after which a stream ends so subscriptions of disconnected clients are released
+SENSORS_LIVE_QUEUE_SIZE = 1000
+SENSORS_LIVE_HEARTBEAT_SECONDS = 15
+SENSORS_LIVE_MAX_SECONDS = 300
+
+# Online anomaly detection on ingest: exponentially weighted mean/variance with smoothing
+# factor ALPHA; values more than THRESHOLD standard deviations off are flagged once a
+# sensor has sent WARMUP readings. MIN_STD (in the fields' units) keeps a flat signal's decaying
+# variance from turning its smallest step into an anomaly.
+SENSORS_ANOMALY_ALPHA = 0.05
+SENSORS_ANOMALY_THRESHOLD = 4.0
+SENSORS_ANOMALY_WARMUP = 30
+SENSORS_ANOMALY_MIN_STD = 0.1
+
+# Per-request instrumentation: a Server-Timing header with query, auth, ownership and
+# serialization times, and a warning log (with query fingerprints) for requests slower
+# than SENSORS_SLOW_REQUEST_MS; set it to None to turn the log off. The header exposes
+# query counts and timings to every client, so it is only sent in development by default
+SENSORS_SERVER_TIMING = DEBUG
+SENSORS_SLOW_REQUEST_MS = 500
+
+# Cache of authenticated users and of sensor owners, consulted on every request and holding
+# one entry per active user and sensor. The "auth" alias below is a per-process LocMemCache
+# sized for that: other workers may lag behind deactivations and ownership changes by up to
+# the TTL (seconds). Production deployments with several workers should point it at a
+# backend shared by all of them, e.g.
+#     {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://redis:6379"}
+# so that such changes apply everywhere at once.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "auth": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "sensors-auth",
+        "OPTIONS": {"MAX_ENTRIES": 200000},
+    },
+}
+SENSORS_AUTH_CACHE = "auth"
+SENSORS_USER_CACHE_TTL = 10
+SENSORS_OWNER_CACHE_TTL = 10
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import Http404
+from ninja.errors import HttpError
+from .cache import SharedCache
+from .models import Sensor
+from .timing import phase
+
+# sensor_id -> owner_id, so authorizing requests on known sensors needs no query.
+# Shared between workers, so an ownership change or deletion is seen by all of them at once.
+owner_cache = SharedCache("owner", ttl=getattr(settings, "SENSORS_OWNER_CACHE_TTL", 10))
+
+def authorize_sensor(user, sensor_id: int) -> int:
+    """
+    Check that `user` owns the sensor, raising 404 if it does not exist and 403 if
+    it belongs to someone else. Returns the sensor ID.
+    """
+    with phase("ownership"):
+        owner_id = owner_cache.get(sensor_id)
+        if owner_id is None:
+            owner_id = Sensor.objects.filter(id=sensor_id).values_list("owner_id", flat=True).first()
+            if owner_id is None:
+                raise Http404("No Sensor matches the given query.")
+            owner_cache.set(sensor_id, owner_id)
+    if owner_id != user.id:
+        raise HttpError(403, "Forbidden")
+    return sensor_id
+
+async def aauthorize_sensor(user, sensor_id: int) -> int:
+    """
+    Async counterpart of `authorize_sensor` for async views.
+    """
+    with phase("ownership"):
+        owner_id = owner_cache.get(sensor_id)
+        if owner_id is None:
+            owner_id = await Sensor.objects.filter(id=sensor_id).values_list("owner_id", flat=True).afirst()
+            if owner_id is None:
+                raise Http404("No Sensor matches the given query.")
+            owner_cache.set(sensor_id, owner_id)
+    if owner_id != user.id:
+        raise HttpError(403, "Forbidden")
+    return sensor_id
+
+def get_owned_sensor(user, sensor_id: int, select_related=()) -> Sensor:
+    """
+    Fetch a sensor owned by `user` with a single query, with the same errors as `authorize_sensor`.
+    Relations in `select_related` are joined into that query.
+    """
+    with phase("ownership"):
+        sensor = Sensor.objects.select_related(*select_related).filter(id=sensor_id, owner=user).first()
+    if sensor is None:
+        # Any cached owner is stale; look it up again to tell 404 from 403
+        owner_cache.delete(sensor_id)
+        authorize_sensor(user, sensor_id)
+        raise Http404("No Sensor matches the given query.")
+    owner_cache.set(sensor_id, sensor.owner_id)
+    return sensor
+
+def forget_sensor(sensor_id: int):
+    owner_cache.delete(sensor_id)
+
+@contextmanager
+def sensors_must_exist(sensor_ids):
+    """
+    Turn a foreign key violation raised while writing for `sensor_ids` into a 404 when one of
+    them was deleted after it was authorized, e.g. from a cache entry not yet expired.
+    """
+    try:
+        yield
+    except IntegrityError:
+        sensor_ids = set(sensor_ids)
+        for sensor_id in sensor_ids:
+            forget_sensor(sensor_id)
+        if Sensor.objects.filter(id__in=sensor_ids).count() < len(sensor_ids):
+            raise Http404("No Sensor matches the given query.")
+        raise
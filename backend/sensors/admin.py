@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Sensor, Reading
+from .models import User, Sensor, Reading, ReadingRollup, RetentionPolicy
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -17,3 +17,11 @@ class ReadingAdmin(admin.ModelAdmin):
     list_display = ('id', 'sensor', 'temperature', 'humidity', 'timestamp')
     list_filter = ('sensor',)
 
+@admin.register(ReadingRollup)
+class ReadingRollupAdmin(admin.ModelAdmin):
+    list_display = ('id', 'sensor', 'resolution', 'bucket', 'count', 'temperature_min', 'temperature_max')
+    list_filter = ('resolution', 'sensor')
+
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ('id', 'sensor', 'raw_days', 'downsample_seconds')
@@ -0,0 +1,171 @@
+from datetime import timedelta
+from django.db.models import Avg, Count, FloatField, Max, Min, Sum
+from django.db.models.functions import Cast, Trunc
+from django.utils import timezone
+from .coldstorage import cold_rows, merge_rows
+from .models import ReadingChunk, ReadingRollup
+from .streaming import READING_COLUMNS, iter_values
+
+# Supported bucket sizes, mapped to the date-truncation kind computing them
+BUCKETS = {
+    "1m": "minute",
+    "1h": "hour",
+    "1d": "day",
+    "1w": "week",
+    "1mo": "month",
+}
+
+AGGREGATE_FUNCTIONS = {
+    "avg": Avg,
+    "min": Min,
+    "max": Max,
+    "sum": Sum,
+}
+
+AGGREGATE_FIELDS = ("temperature", "humidity")
+
+# Rollup resolution each bucket size is computed from
+ROLLUP_BUCKETS = {
+    "1h": ReadingRollup.HOUR,
+    "1d": ReadingRollup.DAY,
+    "1w": ReadingRollup.DAY,
+    "1mo": ReadingRollup.DAY,
+}
+
+def parse_functions(value: str) -> list:
+    """
+    Parse a comma separated `fn` parameter, e.g. "avg,min,max,count".
+    Raises ValueError for unknown functions.
+    """
+    fns = [fn.strip() for fn in value.split(",") if fn.strip()]
+    unknown = [fn for fn in fns if fn != "count" and fn not in AGGREGATE_FUNCTIONS]
+    if not fns or unknown:
+        raise ValueError(f"Unknown aggregate function(s): {', '.join(unknown) or value!r}")
+    return list(dict.fromkeys(fns))
+
+def aggregate_readings(qs, bucket: str, fns: list):
+    """
+    Group a readings queryset into time buckets in the database (one GROUP BY over the
+    truncated timestamp) and compute the requested functions per bucket.
+
+    Yields dicts with `bucket`, plus `count` and `<field>_<fn>` keys as requested.
+    """
+    aggregates = {}
+    if "count" in fns:
+        aggregates["count"] = Count("id")
+    for fn in fns:
+        if fn in AGGREGATE_FUNCTIONS:
+            for field in AGGREGATE_FIELDS:
+                aggregates[f"{field}_{fn}"] = AGGREGATE_FUNCTIONS[fn](field)
+
+    return (
+        qs.annotate(bucket=Trunc("timestamp", BUCKETS[bucket]))
+        .values("bucket")
+        .annotate(**aggregates)
+        .order_by("bucket")
+    )
+
+def truncate(timestamp, kind: str):
+    """
+    Python counterpart of `Trunc(kind)`: start of the minute, hour, day, week (Monday)
+    or month containing `timestamp` in the current time zone.
+    """
+    local = timezone.localtime(timestamp).replace(second=0, microsecond=0)
+    if kind != "minute":
+        local = local.replace(minute=0)
+    if kind not in ("minute", "hour"):
+        local = local.replace(hour=0)
+    if kind == "week":
+        local -= timedelta(days=local.weekday())
+    elif kind == "month":
+        local = local.replace(day=1)
+    return timezone.make_aware(local.replace(tzinfo=None))
+
+# Functions whose per-bucket results can be combined into any of the others
+PARTIAL_FUNCTIONS = ["count", "sum", "min", "max"]
+
+def _combine(totals: dict, key, partial: list):
+    total = totals.setdefault(key, partial)
+    if total is partial:
+        return
+    total[0] += partial[0]
+    for offset in (1, 4):
+        total[offset] += partial[offset]
+        total[offset + 1] = min(total[offset + 1], partial[offset + 1])
+        total[offset + 2] = max(total[offset + 2], partial[offset + 2])
+
+def aggregate_with_chunks(qs, sensor_id: int, bucket: str, fns: list, timestamp_from=None, timestamp_to=None) -> list:
+    """
+    `aggregate_readings` over a sensor's readings including those compacted into chunks.
+    Chunks hold the oldest history, so only readings up to the end of the newest chunk in
+    range (chunked ones and late arrivals for their windows) are bucketed here; the rest is
+    still grouped in the database and the two are combined per bucket.
+    """
+    chunks = ReadingChunk.objects.filter(sensor_id=sensor_id)
+    if timestamp_from is not None:
+        chunks = chunks.filter(last_timestamp__gte=timestamp_from)
+    if timestamp_to is not None:
+        chunks = chunks.filter(first_timestamp__lte=timestamp_to)
+    boundary = chunks.aggregate(boundary=Max("last_timestamp"))["boundary"]
+    if boundary is None:
+        return list(aggregate_readings(qs, bucket, fns))
+
+    # Per bucket: [count, temperature sum, min, max, humidity sum, min, max]
+    totals = {}
+    hot = iter_values(qs.filter(timestamp__lte=boundary).order_by("timestamp"), READING_COLUMNS)
+    cold = cold_rows(sensor_id, timestamp_from, min(boundary, timestamp_to or boundary))
+    for _, _, temperature, humidity, timestamp in merge_rows(hot, cold):
+        _combine(totals, truncate(timestamp, BUCKETS[bucket]), [1, temperature, temperature, temperature, humidity, humidity, humidity])
+    for row in aggregate_readings(qs.filter(timestamp__gt=boundary), bucket, PARTIAL_FUNCTIONS):
+        partial = [row["count"]]
+        for field in AGGREGATE_FIELDS:
+            partial += [row[f"{field}_sum"], row[f"{field}_min"], row[f"{field}_max"]]
+        _combine(totals, row["bucket"], partial)
+
+    rows = []
+    for key in sorted(totals):
+        count, *values = totals[key]
+        row = {"bucket": key}
+        if "count" in fns:
+            row["count"] = count
+        for fn in fns:
+            if fn == "count":
+                continue
+            for index, field in enumerate(AGGREGATE_FIELDS):
+                total, low, high = values[3 * index:3 * index + 3]
+                row[f"{field}_{fn}"] = {"avg": total / count, "sum": total, "min": low, "max": high}[fn]
+        rows.append(row)
+    return rows
+
+def aggregate_rollups(sensor_id: int, bucket: str, fns: list, timestamp_from=None, timestamp_to=None):
+    """
+    Same output as `aggregate_readings`, computed from the hourly or daily rollups
+    instead of raw readings. Only whole rollup buckets starting within the bounds count.
+    """
+    qs = ReadingRollup.objects.filter(sensor_id=sensor_id, resolution=ROLLUP_BUCKETS[bucket])
+    if timestamp_from:
+        qs = qs.filter(bucket__gte=timestamp_from)
+    if timestamp_to:
+        qs = qs.filter(bucket__lte=timestamp_to)
+
+    aggregates = {}
+    for fn in fns:
+        for field in AGGREGATE_FIELDS if fn != "count" else ():
+            if fn == "avg":
+                aggregates[f"{field}_avg"] = Sum(f"{field}_sum") / Cast(Sum("count"), FloatField())
+            elif fn == "min":
+                aggregates[f"{field}_min"] = Min(f"{field}_min")
+            elif fn == "max":
+                aggregates[f"{field}_max"] = Max(f"{field}_max")
+            else:
+                aggregates[f"{field}_sum"] = Sum(f"{field}_sum")
+    if "count" in fns:
+        # Added last: once annotated, "count" would shadow the column in the averages above
+        aggregates["count"] = Sum("count")
+
+    rows = (
+        qs.values(period=Trunc("bucket", BUCKETS[bucket]))
+        .annotate(**aggregates)
+        .order_by("period")
+    )
+    return ({"bucket": row.pop("period"), **row} for row in rows)
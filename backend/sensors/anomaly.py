@@ -0,0 +1,149 @@
+import math
+import numpy as np
+from django.conf import settings
+from .coldstorage import cold_rows, merge_rows
+from .models import AnomalyFlag, AnomalyState, Reading
+from .streaming import READING_COLUMNS, iter_chunks, iter_values
+
+FIELDS = ("temperature", "humidity")
+STATE_FIELDS = ["count", "last_timestamp"] + [f"{field}_{part}" for field in FIELDS for part in ("mean", "var")]
+
+# Steps of a recurrence solved at once; keeps the growing powers of 1/c well inside float range
+RECURRENCE_BLOCK = 256
+
+def detector_settings() -> dict:
+    return {
+        "alpha": getattr(settings, "SENSORS_ANOMALY_ALPHA", 0.05),
+        "threshold": getattr(settings, "SENSORS_ANOMALY_THRESHOLD", 4.0),
+        "warmup": getattr(settings, "SENSORS_ANOMALY_WARMUP", 30),
+        "min_std": getattr(settings, "SENSORS_ANOMALY_MIN_STD", 0.1),
+    }
+
+def linear_recurrence(c: float, b, y0: float):
+    """
+    Solve y[t] = c * y[t-1] + b[t] from y[-1] = y0 without a Python loop per step:
+    within a block, y[t] = c^(t+1) * (y0 + sum_{k<=t} b[k] / c^(k+1)).
+    """
+    b = np.asarray(b, dtype=np.float64)
+    out = np.empty_like(b)
+    # Small c decays fast; shorten blocks so c^size stays far from underflow
+    size = max(1, min(RECURRENCE_BLOCK, int(230 / -math.log(c)))) if c < 1 else RECURRENCE_BLOCK
+    powers = c ** np.arange(1, size + 1)
+    for start in range(0, len(b), size):
+        block = b[start:start + size]
+        p = powers[:len(block)]
+        out[start:start + len(block)] = p * (y0 + np.cumsum(block / p))
+        y0 = out[start + len(block) - 1]
+    return out
+
+def score(values, mean: float, var: float, count: int, alpha: float, warmup: int, min_std: float = 0.0):
+    """
+    Score values against an exponentially weighted mean and variance (Finch, 2009) and
+    advance the state past them. Each value is scored against the state before it, as
+    z = (x - mean) / std, with std at least `min_std`: the variance of a flat signal decays
+    towards zero, and its smallest step would otherwise score as a huge deviation. Values
+    seen before `warmup` readings, or while the std is still zero, score 0.
+    Returns (scores, expected means, mean, var).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if len(x) == 0:
+        return x, x, mean, var
+    if count == 0:
+        # The first value only initialises the state
+        mean, var = x[0], 0.0
+    means = linear_recurrence(1 - alpha, alpha * x, mean)
+    expected = np.concatenate(([mean], means[:-1]))
+    d = x - expected
+    variances = linear_recurrence(1 - alpha, (1 - alpha) * alpha * d * d, var)
+    prior_var = np.concatenate(([var], variances[:-1]))
+    seen = count + np.arange(len(x))
+    std = np.sqrt(np.maximum(prior_var, min_std * min_std))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where((std > 0) & (seen >= warmup), d / std, 0.0)
+    return z, expected, float(means[-1]), float(variances[-1])
+
+def score_series(sensor_id: int, state: AnomalyState, timestamps, columns: dict, config: dict) -> list:
+    """
+    Advance `state` over readings in timestamp order, returning AnomalyFlag objects
+    for the values scoring above the threshold.
+    """
+    flags = []
+    for field in FIELDS:
+        z, expected, mean, var = score(
+            columns[field], getattr(state, f"{field}_mean"), getattr(state, f"{field}_var"),
+            state.count, config["alpha"], config["warmup"], config["min_std"],
+        )
+        setattr(state, f"{field}_mean", mean)
+        setattr(state, f"{field}_var", var)
+        for i in np.flatnonzero(np.abs(z) > config["threshold"]).tolist():
+            flags.append(AnomalyFlag(
+                sensor_id=sensor_id, timestamp=timestamps[i], field=field,
+                value=float(columns[field][i]), expected=float(expected[i]), score=float(z[i]),
+            ))
+    state.count += len(timestamps)
+    state.last_timestamp = timestamps[-1]
+    return flags
+
+def _locked_states(sensor_ids) -> dict:
+    # Locked in ID order, like the sensor statistics, so that concurrent batches cannot deadlock
+    locked = AnomalyState.objects.select_for_update().filter(sensor_id__in=sensor_ids).order_by("sensor_id")
+    states = {s.sensor_id: s for s in locked}
+    missing = set(sensor_ids) - states.keys()
+    if missing:
+        AnomalyState.objects.bulk_create([AnomalyState(sensor_id=sensor_id) for sensor_id in missing], ignore_conflicts=True)
+        states.update({s.sensor_id: s for s in locked.filter(sensor_id__in=missing)})
+    return states
+
+def detect_anomalies(rows):
+    """
+    Run newly inserted (sensor_id, timestamp, temperature, humidity) tuples through
+    their sensors' detectors, inside the writing transaction, and store the flags.
+    Readings older than the newest one a detector has seen are left to `backfill_anomalies`.
+    The detector state is read with a row lock and written back in the same transaction,
+    so every worker process scores against the state the others left.
+    """
+    by_sensor = {}
+    for sensor_id, timestamp, temperature, humidity in rows:
+        by_sensor.setdefault(sensor_id, []).append((timestamp, temperature, humidity))
+    if not by_sensor:
+        return
+    config = detector_settings()
+    states = _locked_states(sorted(by_sensor))
+
+    flags, changed = [], []
+    for sensor_id, series in by_sensor.items():
+        state = states[sensor_id]
+        series.sort()
+        if state.last_timestamp is not None:
+            series = [row for row in series if row[0] > state.last_timestamp]
+        if not series:
+            continue
+        timestamps, temperature, humidity = zip(*series)
+        flags += score_series(sensor_id, state, timestamps, {"temperature": temperature, "humidity": humidity}, config)
+        changed.append(state)
+
+    if changed:
+        AnomalyState.objects.bulk_update(changed, STATE_FIELDS)
+    if flags:
+        AnomalyFlag.objects.bulk_create(flags, ignore_conflicts=True)
+
+def backfill_anomalies(sensor_id: int, since=None, chunk_size: int = 100000) -> tuple:
+    """
+    Score a sensor's stored readings (raw and compacted) from scratch with the
+    vectorized detector, a chunk at a time, and store the flags. Existing flags are kept.
+    Returns (readings scored, flags found).
+    """
+    config = detector_settings()
+    state = AnomalyState(sensor_id=sensor_id)
+    qs = Reading.objects.filter(sensor_id=sensor_id).order_by("timestamp")
+    if since is not None:
+        qs = qs.filter(timestamp__gte=since)
+    rows = merge_rows(iter_values(qs, READING_COLUMNS), cold_rows(sensor_id, timestamp_from=since))
+    scored = found = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        columns = {"temperature": [row[2] for row in chunk], "humidity": [row[3] for row in chunk]}
+        flags = score_series(sensor_id, state, [row[4] for row in chunk], columns, config)
+        AnomalyFlag.objects.bulk_create(flags, batch_size=1000, ignore_conflicts=True)
+        scored += len(chunk)
+        found += len(flags)
+    return scored, found
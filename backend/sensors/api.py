@@ -1,18 +1,40 @@
 from ninja import NinjaAPI, Query, Schema, FilterSchema
-from ninja.pagination import paginate, PageNumberPagination
+from ninja.pagination import paginate
 from ninja.orm import create_schema
-from ninja.security import HttpBearer
+from ninja.security import APIKeyQuery, HttpBearer
 from ninja.errors import HttpError
-from django.shortcuts import get_object_or_404
+from ninja.renderers import JSONRenderer
+from django.db import transaction
 from django.db.models import Q
 from rest_framework_simplejwt.tokens import AccessToken
-from django.contrib.auth import get_user_model
-from django.http import HttpRequest
-from typing import List, Optional
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from typing import List, Literal, Optional
 from datetime import datetime
+from itertools import islice
+from operator import itemgetter
 from django.utils import timezone
 from pydantic import ConfigDict
-from .models import Sensor, Reading
+from .models import AnomalyFlag, Sensor, Reading, ReadingChunk, SensorStats
+from .principals import aget_active_user, get_active_user
+from .access import aauthorize_sensor, authorize_sensor, get_owned_sensor, sensors_must_exist
+from .writebehind import BufferFull, get_ingest_buffer
+from .pubsub import hub, live_response
+from .ingest import as_aware, insert_reading, upsert_readings, ON_CONFLICT_IGNORE
+from .pagination import CursorOrPageNumberPagination, encode_cursor, decode_timestamp_cursor
+from .streaming import EXPORT_CHUNK_SIZE, READING_COLUMNS, iter_values, export_readings
+from .formats import STREAMED_FORMATS, negotiate_format, render_readings_as, stream_readings_as
+from .conditional import (
+    bump_data_version, cached_response, get_data_version, make_etag, not_modified, response_cache, response_cache_key,
+    sensor_data_version, store_response,
+)
+from .search import search_filter
+from .coldstorage import cold_rows, merge_rows, sensors_cold_rows
+from .aggregates import aggregate_rollups, aggregate_with_chunks, parse_functions, ROLLUP_BUCKETS
+from .downsampling import downsample_readings
+from .stats import describe
+from .timing import phase
 
 class JWTBearer(HttpBearer):
     def authenticate(self, request: HttpRequest, token: str):
@@ -21,19 +43,72 @@ class JWTBearer(HttpBearer):
         Returns (user, token) if valid, None if invalid.
         """
         try:
-            payload = AccessToken(token)
-            User = get_user_model()
-            user = User.objects.get(id=payload["user_id"])
+            with phase("auth"):
+                payload = AccessToken(token)
+                user = get_active_user(payload["user_id"])
+            if user is None:
+                return None
             request.user = user
             return user
         except Exception:
             return None
 
-api = NinjaAPI(urls_namespace="api", auth=JWTBearer())
+async def authenticate_token(request: HttpRequest, token: str):
+    """
+    Async counterpart of `JWTBearer.authenticate`, resolving the user with the async ORM.
+    """
+    try:
+        with phase("auth"):
+            payload = AccessToken(token)
+            user = await aget_active_user(payload["user_id"])
+        if user is None:
+            return None
+        request.user = user
+        return user
+    except Exception:
+        return None
+
+class AsyncJWTBearer(JWTBearer):
+    """JWTBearer for async views"""
+    is_async = True
+
+    async def authenticate(self, request: HttpRequest, token: str):
+        return await authenticate_token(request, token)
+
+class AsyncJWTQuery(APIKeyQuery):
+    """JWT in the `token` query parameter, for EventSource clients, which cannot set headers"""
+    param_name = "token"
+    is_async = True
+
+    async def authenticate(self, request: HttpRequest, key: Optional[str]):
+        return await authenticate_token(request, key) if key else None
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer reporting its time as the `serialize` phase of the request"""
+
+    def render(self, request, data, *, response_status):
+        with phase("serialize"):
+            return super().render(request, data, response_status=response_status)
+
+api = NinjaAPI(urls_namespace="api", auth=JWTBearer(), renderer=TimedJSONRenderer())
 
 # SENSORS #
 
-SensorSchema = create_schema(Sensor)
+class LatestReadingSchema(Schema):
+    """Newest reading of a sensor"""
+    timestamp: datetime
+    temperature: float
+    humidity: float
+
+class SensorSchema(create_schema(Sensor)):
+    latest_reading: Optional[LatestReadingSchema] = None
+
+    @staticmethod
+    def resolve_latest_reading(obj):
+        # Only report what the query already joined, never a query per sensor
+        if isinstance(obj, Sensor) and Sensor.latest_reading.is_cached(obj):
+            return Sensor.latest_reading.related.get_cached_value(obj)
+        return None
 
 class SensorCreateSchema(Schema):
     """Payload to create a sensor"""
@@ -66,14 +141,26 @@ class SensorUpdateSchema(Schema):
     )
 
 @api.get("/sensors", tags=["Sensors"], response=list[SensorSchema])
-@paginate(PageNumberPagination, page_size = 10)
-def list_sensors(request, q: str = None):
+@paginate(CursorOrPageNumberPagination, page_size = 10)
+def list_sensors(
+    request,
+    q: str = None,
+    mode: Literal["contains", "prefix"] = "contains",
+    ignore_case: bool = False,
+    include_latest: bool = False,
+):
     """
-    List user's sensors, paginated, with optional filtering on name and model.
+    List user's sensors with optional filtering on name and model, ordered by `order` (id or name).
+    Pages are numbered (`page`) and carry a total `count`. Follow `next_cursor` with `cursor` instead
+    for keyed pages, which take no count and stay fast however deep they go.
+    `q` matches anywhere in them, or only at the start with `mode=prefix`; `ignore_case` makes it case-insensitive.
+    Pass `include_latest` to get each sensor's newest reading in `latest_reading`.
     """
     qs = Sensor.objects.filter(owner=request.user)
+    if include_latest:
+        qs = qs.select_related("latest_reading")
     if q:
-        qs = qs.filter(Q(name__contains=q) | Q(model__contains=q))
+        qs = qs.filter(search_filter(q, mode, ignore_case))
 
     return qs
 
@@ -85,13 +172,18 @@ def create_sensor(request, payload: SensorCreateSchema):
     return Sensor.objects.create(owner=request.user, **payload.dict())
 
 @api.get("/sensors/{sensor_id}", tags=["Sensors"], response=SensorSchema)
-def get_sensor(request, sensor_id: int):
+def get_sensor(request, response: HttpResponse, sensor_id: int, include_latest: bool = False):
     """
     Get details for a specific sensor by ID. Only the owner can access it.
+    Pass `include_latest` to get its newest reading in `latest_reading`.
+    Answers `If-None-Match` with 304 while the sensor and its readings are unchanged.
     """
-    sensor = get_object_or_404(Sensor, id=sensor_id)
-    if sensor.owner != request.user:
-        raise HttpError(403, "Forbidden")
+    related = ("data_version", "latest_reading") if include_latest else ("data_version",)
+    sensor = get_owned_sensor(request.user, sensor_id, select_related=related)
+    etag = make_etag("sensor", sensor.id, sensor_data_version(sensor))
+    if (unchanged := not_modified(request, etag)) is not None:
+        return unchanged
+    response["ETag"] = etag
     return sensor
 
 @api.put("/sensors/{sensor_id}", tags=["Sensors"])
@@ -99,12 +191,13 @@ def update_sensor(request, sensor_id: int, payload: SensorUpdateSchema):
     """
     Update a sensor by ID.
     """
-    sensor = get_object_or_404(Sensor, id=sensor_id)
-    if sensor.owner != request.user:
-        raise HttpError(403, "Forbidden")
-    for attr, value in payload.dict(exclude_unset=True).items():
+    sensor = get_owned_sensor(request.user, sensor_id)
+    fields = payload.dict(exclude_unset=True)
+    for attr, value in fields.items():
         setattr(sensor, attr, value)
-    sensor.save()
+    with transaction.atomic():
+        sensor.save(update_fields=fields)
+        bump_data_version([sensor.id])
     return {"success": True}
 
 @api.delete("/sensors/{sensor_id}", tags=["Sensors"])
@@ -112,15 +205,15 @@ def delete_sensor(request, sensor_id: int):
     """
     Delete a sensor by ID.
     """
-    sensor = get_object_or_404(Sensor, id=sensor_id)
-    if sensor.owner != request.user:
-        raise HttpError(403, "Forbidden")
+    sensor = get_owned_sensor(request.user, sensor_id)
     sensor.delete()
     return {"success": True}
 
 # READINGS #
 
-ReadingSchema = create_schema(Reading)
+class ReadingSchema(create_schema(Reading)):
+    """A reading. `id` is null for readings compacted into chunks, which are stored without one"""
+    id: Optional[int] = None
 
 class ReadingFilterSchema(FilterSchema):
     timestamp_from: Optional[datetime] = None
@@ -129,13 +222,19 @@ class ReadingFilterSchema(FilterSchema):
     def get_filter_expression(self) -> Q:
         q = Q()
         if self.timestamp_from:
-            ts_from = timezone.make_aware(self.timestamp_from)
+            ts_from = as_aware(self.timestamp_from)
             q &= Q(timestamp__gte=ts_from)
         if self.timestamp_to:
-            ts_to = timezone.make_aware(self.timestamp_to)
+            ts_to = as_aware(self.timestamp_to)
             q &= Q(timestamp__lte=ts_to)
         return q
 
+    def get_bounds(self) -> tuple:
+        """The (from, to) bounds as aware datetimes, None where open."""
+        ts_from = as_aware(self.timestamp_from) if self.timestamp_from else None
+        ts_to = as_aware(self.timestamp_to) if self.timestamp_to else None
+        return ts_from, ts_to
+
 class ReadingCreateSchema(Schema):
     """Payload to create a reading"""
     temperature: float
@@ -152,23 +251,389 @@ class ReadingCreateSchema(Schema):
         }
     )
 
+class ReadingBulkItemSchema(ReadingCreateSchema):
+    """Reading tagged with the name of the sensor it belongs to"""
+    sensor: str
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "sensor": "device-001",
+                "temperature": 21.5,
+                "humidity": 55.2,
+                "timestamp": "2025-09-23T14:00:00"
+            }
+        }
+    )
+
+READINGS_BATCH_MAX_SIZE = 10000
+READINGS_PAGE_DEFAULT_LIMIT = 1000
+READINGS_PAGE_MAX_LIMIT = 10000
+READINGS_MAX_POINTS_LIMIT = 20000
+ANOMALIES_DEFAULT_LIMIT = 1000
+ANOMALIES_MAX_LIMIT = 10000
+
+class ReadingBatchResultSchema(Schema):
+    """Outcome of a batch ingest"""
+    inserted: int
+    updated: int
+    skipped: int
+
+class ReadingAcceptedSchema(Schema):
+    """Readings acknowledged into the write-behind buffer"""
+    accepted: int
+
+class FieldStatsSchema(Schema):
+    """Running statistics of one measured field; quantiles are t-digest estimates"""
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+class SensorStatsSchema(Schema):
+    """Statistics over all readings of a sensor"""
+    count: int
+    stale: bool
+    temperature: FieldStatsSchema
+    humidity: FieldStatsSchema
+
+class AnomalyFlagSchema(Schema):
+    """Reading value flagged by the anomaly detector"""
+    timestamp: datetime
+    field: str
+    value: float
+    expected: float
+    score: float
+
+class ReadingAggregateSchema(Schema):
+    """Aggregated readings for one time bucket; only the requested functions are present"""
+    bucket: datetime
+    count: Optional[int] = None
+    temperature_avg: Optional[float] = None
+    temperature_min: Optional[float] = None
+    temperature_max: Optional[float] = None
+    temperature_sum: Optional[float] = None
+    humidity_avg: Optional[float] = None
+    humidity_min: Optional[float] = None
+    humidity_max: Optional[float] = None
+    humidity_sum: Optional[float] = None
+
 @api.get("/sensors/{sensor_id}/readings", tags=["Readings"], response=List[ReadingSchema])
-def list_readings(request, sensor_id: int, filters: ReadingFilterSchema = Query(...)):
+def list_readings(
+    request,
+    sensor_id: int,
+    filters: ReadingFilterSchema = Query(...),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=READINGS_PAGE_MAX_LIMIT),
+    max_points: Optional[int] = Query(None, ge=3, le=READINGS_MAX_POINTS_LIMIT),
+):
     """
-    List readings for a specific sensor by ID with optional timestamp filtering.
+    List readings for a specific sensor by ID with optional timestamp filtering, ordered by timestamp.
+    Pass `limit` and/or `after` to page through the range; the cursor for the next page
+    is returned in the `X-Next-Cursor` header, which is absent on the last page.
+    Pass `max_points` instead to get a shape-preserving (LTTB) downsample of the range for charting.
+    Answers `If-None-Match` with 304 while the sensor's readings are unchanged.
+
+    The `Accept` header selects the format: a JSON array of objects (`application/json`, default),
+    one JSON array per field (`application/vnd.sensors.columns+json`, with `limit` or `max_points`),
+    the same columns as MessagePack maps of up to 2000 readings each (`application/msgpack`) or an
+    Arrow IPC stream (`application/vnd.apache.arrow.stream`).
     """
-    sensor = get_object_or_404(Sensor, id=sensor_id)
-    if sensor.owner != request.user:
-        raise HttpError(403, "Forbidden")
-    qs = Reading.objects.filter(Q(sensor=sensor) & filters.get_filter_expression())
-    return list(qs)
+    authorize_sensor(request.user, sensor_id)
+    if max_points is not None and (after is not None or limit is not None):
+        raise HttpError(400, "max_points cannot be combined with pagination")
+    format = negotiate_format(request)
+    if format not in STREAMED_FORMATS and max_points is None and after is None and limit is None:
+        raise HttpError(400, "Columnar JSON needs limit or max_points; request MessagePack or Arrow for whole ranges")
+
+    version = get_data_version(sensor_id)
+    etag = make_etag("readings", sensor_id, version, format)
+    if (unchanged := not_modified(request, etag)) is not None:
+        patch_vary_headers(unchanged, ["Accept"])
+        return unchanged
+
+    # Only closed ranges are worth caching; open ones change with every new reading
+    timestamp_from, timestamp_to = filters.get_bounds()
+    cache = response_cache() if timestamp_to is not None and timestamp_to <= timezone.now() else None
+    if cache is not None:
+        key = response_cache_key(f"readings:{format}", sensor_id, version, request)
+        if (cached := cached_response(cache, key)) is not None:
+            cached["ETag"] = etag
+            patch_vary_headers(cached, ["Accept"])
+            return cached
+
+    qs = Reading.objects.filter(Q(sensor_id=sensor_id) & filters.get_filter_expression()).order_by("timestamp")
+    if max_points is not None:
+        rows = merge_rows(iter_values(qs, READING_COLUMNS), cold_rows(sensor_id, timestamp_from, timestamp_to))
+        response = render_readings_as(downsample_readings(rows, sensor_id, max_points), format)
+    elif after is None and limit is None:
+        response = stream_readings_as(
+            merge_rows(iter_values(qs, READING_COLUMNS), cold_rows(sensor_id, timestamp_from, timestamp_to)),
+            format,
+        )
+    else:
+        # Keyset pagination: (sensor, timestamp) is unique, so the timestamp alone is the position
+        cursor = None
+        if after is not None:
+            cursor = decode_timestamp_cursor(after)
+            qs = qs.filter(timestamp__gt=cursor)
+        limit = limit or READINGS_PAGE_DEFAULT_LIMIT
+        # Hot rows are fetched a page at a time; compacted windows are decoded lazily
+        hot = iter_values(qs[:limit + 1], READING_COLUMNS)
+        rows = merge_rows(hot, cold_rows(sensor_id, timestamp_from, timestamp_to, after=cursor))
+        page = list(islice(rows, limit + 1))
+        response = render_readings_as(page[:limit], format)
+        if len(page) > limit:
+            response["X-Next-Cursor"] = encode_cursor(page[limit - 1][4])
+
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept"])
+    if cache is not None:
+        store_response(cache, key, response, headers=("X-Next-Cursor",))
+    return response
 
 @api.post("/sensors/{sensor_id}/readings", tags=["Readings"], response=ReadingSchema)
 def create_reading(request, sensor_id: int, payload: ReadingCreateSchema):
     """
     Create a reading for a specific sensor by ID.
     """
-    sensor = get_object_or_404(Sensor, id=sensor_id)
-    if sensor.owner != request.user:
-        raise HttpError(403, "Forbidden")
-    return Reading.objects.create(sensor=sensor, **payload.dict())
+    authorize_sensor(request.user, sensor_id)
+    with sensors_must_exist([sensor_id]):
+        return insert_reading(sensor_id, **payload.dict())
+
+@api.post("/sensors/{sensor_id}/readings/batch", tags=["Readings"], response=ReadingBatchResultSchema)
+def create_readings_batch(
+    request,
+    sensor_id: int,
+    payload: List[ReadingCreateSchema],
+    on_conflict: Literal["ignore", "update"] = ON_CONFLICT_IGNORE,
+):
+    """
+    Create many readings for a specific sensor by ID in a single insert.
+    Readings whose timestamp already exists are skipped, or overwritten with `on_conflict=update`,
+    so retrying a batch is safe.
+    """
+    authorize_sensor(request.user, sensor_id)
+    if len(payload) > READINGS_BATCH_MAX_SIZE:
+        raise HttpError(413, f"Batch exceeds {READINGS_BATCH_MAX_SIZE} readings")
+    rows = ({"sensor_id": sensor_id, **item.dict()} for item in payload)
+    with sensors_must_exist([sensor_id]):
+        return upsert_readings(rows, on_conflict=on_conflict)
+
+def map_sensor_names(names, found) -> dict:
+    """
+    Map requested sensor names to IDs from the (name, id) pairs found for them,
+    rejecting unknown and ambiguous names.
+    """
+    sensor_ids = {}
+    for name, sensor_id in found:
+        if name in sensor_ids:
+            raise HttpError(409, f"Sensor name '{name}' is ambiguous")
+        sensor_ids[name] = sensor_id
+    unknown = names - sensor_ids.keys()
+    if unknown:
+        raise HttpError(404, f"Unknown sensors: {', '.join(sorted(unknown))}")
+    return sensor_ids
+
+@api.post("/readings/bulk", tags=["Readings"], response=ReadingBatchResultSchema)
+def create_readings_bulk(
+    request,
+    payload: List[ReadingBulkItemSchema],
+    on_conflict: Literal["ignore", "update"] = ON_CONFLICT_IGNORE,
+):
+    """
+    Create readings for many of the user's sensors at once, addressed by sensor name.
+    Duplicates are handled as in the per-sensor batch endpoint.
+    """
+    if len(payload) > READINGS_BATCH_MAX_SIZE:
+        raise HttpError(413, f"Batch exceeds {READINGS_BATCH_MAX_SIZE} readings")
+
+    names = {item.sensor for item in payload}
+    found = Sensor.objects.filter(owner=request.user, name__in=names).values_list("name", "id")
+    sensor_ids = map_sensor_names(names, found)
+
+    rows = ({"sensor_id": sensor_ids[item.sensor], **item.dict(exclude={"sensor"})} for item in payload)
+    with sensors_must_exist(sensor_ids.values()):
+        return upsert_readings(rows, on_conflict=on_conflict)
+
+async def submit_buffered(request, rows):
+    try:
+        await get_ingest_buffer().submit(rows)
+    except BufferFull as e:
+        response = api.create_response(request, {"detail": str(e)}, status=503)
+        response["Retry-After"] = "1"
+        return response
+    return 202, {"accepted": len(rows)}
+
+@api.post(
+    "/sensors/{sensor_id}/readings/buffered",
+    tags=["Readings"],
+    response={202: ReadingAcceptedSchema},
+    auth=AsyncJWTBearer(),
+)
+async def buffer_readings(request, sensor_id: int, payload: List[ReadingCreateSchema]):
+    """
+    Accept readings for a specific sensor by ID into the write-behind buffer and return 202
+    once they are spooled to disk. They are written in batches shortly after; readings whose
+    timestamp already exists are skipped. Answers 503 with `Retry-After` while the buffer is full.
+    """
+    await aauthorize_sensor(request.user, sensor_id)
+    if len(payload) > READINGS_BATCH_MAX_SIZE:
+        raise HttpError(413, f"Batch exceeds {READINGS_BATCH_MAX_SIZE} readings")
+    rows = [(sensor_id, item.timestamp, item.temperature, item.humidity) for item in payload]
+    return await submit_buffered(request, rows)
+
+@api.post("/readings/bulk/buffered", tags=["Readings"], response={202: ReadingAcceptedSchema}, auth=AsyncJWTBearer())
+async def buffer_readings_bulk(request, payload: List[ReadingBulkItemSchema]):
+    """
+    Buffered counterpart of the bulk endpoint, for readings of many of the user's sensors
+    addressed by sensor name.
+    """
+    if len(payload) > READINGS_BATCH_MAX_SIZE:
+        raise HttpError(413, f"Batch exceeds {READINGS_BATCH_MAX_SIZE} readings")
+    names = {item.sensor for item in payload}
+    found = [pair async for pair in Sensor.objects.filter(owner=request.user, name__in=names).values_list("name", "id")]
+    sensor_ids = map_sensor_names(names, found)
+    rows = [(sensor_ids[item.sensor], item.timestamp, item.temperature, item.humidity) for item in payload]
+    return await submit_buffered(request, rows)
+
+def require_asgi(request):
+    # Under WSGI an async view runs on an event loop that is closed once the response is
+    # returned, long before the stream is read, so nothing could ever be delivered to it
+    if not isinstance(request, ASGIRequest):
+        raise HttpError(501, "Live streams are only served by ASGI workers")
+
+@api.get("/sensors/{sensor_id}/readings/live", tags=["Readings"], auth=[AsyncJWTBearer(), AsyncJWTQuery()])
+async def live_sensor_readings(request, sensor_id: int):
+    """
+    Stream readings of a specific sensor by ID as Server-Sent Events as they are ingested.
+    Each `readings` event carries a JSON array of readings; a `dropped` event reports how
+    many were skipped because the client fell behind. The token may be passed as `?token=`.
+    Needs an ASGI worker; WSGI workers answer 501.
+    """
+    require_asgi(request)
+    await aauthorize_sensor(request.user, sensor_id)
+    return live_response(hub.subscribe(sensor_id=sensor_id))
+
+@api.get("/readings/live", tags=["Readings"], auth=[AsyncJWTBearer(), AsyncJWTQuery()])
+async def live_readings(request):
+    """
+    Stream readings of all of the user's sensors as Server-Sent Events, like the per-sensor stream.
+    """
+    require_asgi(request)
+    return live_response(hub.subscribe(owner_id=request.user.id))
+
+@api.get("/sensors/{sensor_id}/readings/export", tags=["Readings"])
+def export_sensor_readings(
+    request,
+    sensor_id: int,
+    filters: ReadingFilterSchema = Query(...),
+    format: Literal["csv", "ndjson"] = "csv",
+):
+    """
+    Download readings for a specific sensor by ID as CSV or NDJSON, with optional timestamp filtering.
+    """
+    authorize_sensor(request.user, sensor_id)
+    timestamp_from, timestamp_to = filters.get_bounds()
+    qs = Reading.objects.filter(Q(sensor_id=sensor_id) & filters.get_filter_expression()).order_by("timestamp")
+    rows = merge_rows(
+        iter_values(qs, READING_COLUMNS, chunk_size=EXPORT_CHUNK_SIZE),
+        cold_rows(sensor_id, timestamp_from, timestamp_to),
+    )
+    names = dict(Sensor.objects.filter(id=sensor_id).values_list("id", "name"))
+    return export_readings(rows, names, format, filename=f"readings-{sensor_id}")
+
+@api.get("/readings/export", tags=["Readings"])
+def export_all_readings(
+    request,
+    filters: ReadingFilterSchema = Query(...),
+    format: Literal["csv", "ndjson"] = "csv",
+):
+    """
+    Download readings of all the user's sensors as CSV or NDJSON, with optional timestamp filtering.
+    """
+    timestamp_from, timestamp_to = filters.get_bounds()
+    qs = Reading.objects.filter(Q(sensor__owner=request.user) & filters.get_filter_expression())
+    compacted = (
+        ReadingChunk.objects.filter(sensor__owner=request.user)
+        .values_list("sensor_id", flat=True).distinct().order_by("sensor_id")
+    )
+    rows = merge_rows(
+        iter_values(qs.order_by("sensor_id", "timestamp"), READING_COLUMNS, chunk_size=EXPORT_CHUNK_SIZE),
+        sensors_cold_rows(compacted.iterator(), timestamp_from, timestamp_to),
+        key=itemgetter(1, 4),
+    )
+    names = dict(Sensor.objects.filter(owner=request.user).values_list("id", "name"))
+    return export_readings(rows, names, format, filename="readings")
+
+@api.get(
+    "/sensors/{sensor_id}/readings/aggregate",
+    tags=["Readings"],
+    response=List[ReadingAggregateSchema],
+    exclude_unset=True,
+)
+def aggregate_sensor_readings(
+    request,
+    sensor_id: int,
+    filters: ReadingFilterSchema = Query(...),
+    bucket: Literal["1m", "1h", "1d", "1w", "1mo"] = "1h",
+    fn: str = "avg,min,max,count",
+    source: Literal["raw", "rollup"] = "raw",
+):
+    """
+    Aggregate readings for a specific sensor by ID into time buckets, with optional timestamp filtering.
+    `fn` is a comma separated list of avg, min, max, sum and count.
+    With `source=rollup`, buckets of an hour or more are computed from precomputed hourly/daily
+    rollups, which is much cheaper over long ranges but only counts whole rollup buckets.
+    """
+    authorize_sensor(request.user, sensor_id)
+    try:
+        fns = parse_functions(fn)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+    if source == "rollup":
+        if bucket not in ROLLUP_BUCKETS:
+            raise HttpError(400, f"Bucket {bucket} is not available from rollups")
+        timestamp_from, timestamp_to = filters.get_bounds()
+        return list(aggregate_rollups(sensor_id, bucket, fns, timestamp_from, timestamp_to))
+    timestamp_from, timestamp_to = filters.get_bounds()
+    qs = Reading.objects.filter(Q(sensor_id=sensor_id) & filters.get_filter_expression())
+    return aggregate_with_chunks(qs, sensor_id, bucket, fns, timestamp_from, timestamp_to)
+
+@api.get("/sensors/{sensor_id}/stats", tags=["Sensors"], response=SensorStatsSchema)
+def get_sensor_stats(request, sensor_id: int):
+    """
+    Get count, mean, standard deviation, min, max and p50/p95/p99 over all readings of a
+    specific sensor by ID, maintained on ingest so the cost does not grow with history.
+    `stale` is true when readings were overwritten or removed since the last `rebuild_stats`.
+    """
+    authorize_sensor(request.user, sensor_id)
+    stats = SensorStats.objects.filter(sensor_id=sensor_id).first() or SensorStats(sensor_id=sensor_id)
+    return {
+        "count": stats.count,
+        "stale": stats.stale,
+        "temperature": describe(stats, "temperature"),
+        "humidity": describe(stats, "humidity"),
+    }
+
+@api.get("/sensors/{sensor_id}/anomalies", tags=["Sensors"], response=List[AnomalyFlagSchema])
+def list_sensor_anomalies(
+    request,
+    sensor_id: int,
+    filters: ReadingFilterSchema = Query(...),
+    field: Optional[Literal["temperature", "humidity"]] = None,
+    limit: int = Query(ANOMALIES_DEFAULT_LIMIT, ge=1, le=ANOMALIES_MAX_LIMIT),
+):
+    """
+    List anomalies flagged for a specific sensor by ID, ordered by timestamp, with optional
+    timestamp and field filtering. `score` is the deviation from the expected value in
+    standard deviations.
+    """
+    authorize_sensor(request.user, sensor_id)
+    qs = AnomalyFlag.objects.filter(Q(sensor_id=sensor_id) & filters.get_filter_expression())
+    if field is not None:
+        qs = qs.filter(field=field)
+    return list(qs.order_by("timestamp", "field")[:limit])
@@ -0,0 +1,171 @@
+import json
+import statistics
+import subprocess
+from datetime import datetime, timedelta, timezone as dt_timezone
+from time import perf_counter
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+from .api import JWTBearer
+from .formats import FORMAT_CONTENT_TYPES, JSON, STREAMED_FORMATS, available_formats
+from .principals import user_cache
+from .synthetic import create_fleet, generate_readings
+
+DATASET_START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+def summarize(timings: list) -> dict:
+    """
+    Latency statistics in milliseconds for a list of durations in seconds.
+    """
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        "ops": len(ordered),
+        "mean_ms": total / len(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "stdev_ms": statistics.pstdev(ordered) * 1000,
+        "ops_per_s": len(ordered) / total if total else None,
+    }
+
+def measure(fn, iterations: int, warmup: int = 1) -> dict:
+    for i in range(warmup):
+        fn(-1 - i)
+    timings = []
+    for i in range(iterations):
+        started = perf_counter()
+        fn(i)
+        timings.append(perf_counter() - started)
+    return summarize(timings)
+
+def build_dataset(sensors: int, readings: int, step: int, seed: int = 0) -> dict:
+    """
+    Create one user owning `sensors` sensors with `readings` readings each, `step` seconds apart.
+    """
+    fleet = create_fleet(1, sensors, prefix="bench")
+    sensor_ids = [sensor.id for sensor in fleet]
+    generate_readings(sensor_ids, DATASET_START, step, readings, seed=seed)
+    return {
+        "user": fleet[0].owner,
+        "sensor_ids": sensor_ids,
+        "start": DATASET_START,
+        "end": DATASET_START + timedelta(seconds=step * readings),
+    }
+
+def _consume(response):
+    assert response.status_code == 200, response.status_code
+    return b"".join(response.streaming_content) if response.streaming else response.content
+
+def run_benchmarks(dataset: dict, iterations: int = 50) -> dict:
+    """
+    Time the API hot paths through the full Django request stack against `dataset`.
+    """
+    token = str(AccessToken.for_user(dataset["user"]))
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+    sensor_id = dataset["sensor_ids"][0]
+    start = dataset["start"]
+    results = {}
+
+    ingest_base = dataset["end"] + timedelta(days=1)
+
+    def create_reading(i):
+        payload = {"temperature": 21.5, "humidity": 55.0, "timestamp": (ingest_base + timedelta(seconds=i + 10)).isoformat()}
+        _consume(client.post(f"/api/sensors/{sensor_id}/readings", payload, content_type="application/json"))
+    results["create_reading"] = measure(create_reading, iterations, warmup=2)
+
+    batch_base = ingest_base + timedelta(days=1)
+
+    def create_readings_batch(i):
+        first = batch_base + timedelta(hours=i + 2)
+        payload = [
+            {"temperature": 21.5, "humidity": 55.0, "timestamp": (first + timedelta(seconds=k)).isoformat()}
+            for k in range(1000)
+        ]
+        _consume(client.post(f"/api/sensors/{sensor_id}/readings/batch", payload, content_type="application/json"))
+    results["create_readings_batch_1000"] = measure(create_readings_batch, max(iterations // 10, 3))
+
+    hour_from = (start + timedelta(hours=1)).replace(tzinfo=None).isoformat()
+    hour_to = (start + timedelta(hours=2)).replace(tzinfo=None).isoformat()
+    results["list_readings_small_range"] = measure(
+        lambda i: _consume(client.get(
+            f"/api/sensors/{sensor_id}/readings", {"timestamp_from": hour_from, "timestamp_to": hour_to}
+        )),
+        iterations,
+    )
+    results["list_readings_full_range"] = measure(
+        lambda i: _consume(client.get(f"/api/sensors/{sensor_id}/readings")),
+        max(iterations // 10, 3),
+    )
+    # Columnar JSON is paged only, so it has no full-range figure
+    for format in sorted(available_formats() & STREAMED_FORMATS - {JSON}):
+        accept = FORMAT_CONTENT_TYPES[format]
+        results[f"list_readings_full_range_{format}"] = measure(
+            lambda i: _consume(client.get(f"/api/sensors/{sensor_id}/readings", HTTP_ACCEPT=accept)),
+            max(iterations // 10, 3),
+        )
+    results["list_sensors_search"] = measure(
+        lambda i: _consume(client.get("/api/sensors", {"q": "sensor-0001"})),
+        iterations,
+    )
+    last_page = max(len(dataset["sensor_ids"]) // 10, 1)
+    results["list_sensors_first_page"] = measure(
+        lambda i: _consume(client.get("/api/sensors", {"page": 1})),
+        iterations,
+    )
+    results["list_sensors_last_page"] = measure(
+        lambda i: _consume(client.get("/api/sensors", {"page": last_page})),
+        iterations,
+    )
+
+    bearer = JWTBearer()
+
+    class Request:
+        pass
+
+    def authenticate(cold):
+        def run(i):
+            if cold:
+                user_cache.clear()
+            assert bearer.authenticate(Request(), token) is not None
+        return run
+    results["jwt_auth_cached"] = measure(authenticate(cold=False), iterations * 10)
+    results["jwt_auth_uncached"] = measure(authenticate(cold=True), iterations * 10)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def report(results: dict, params: dict) -> dict:
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "created": datetime.now(dt_timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "params": params,
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, metric: str = "p50_ms", threshold: float = 0.2) -> list:
+    """
+    Compare two reports. Returns (name, baseline, current, relative change, regressed)
+    tuples for benchmarks present in both.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get(metric):
+            continue
+        change = (result[metric] - before[metric]) / before[metric]
+        rows.append((name, before[metric], result[metric], change, change > threshold))
+    return rows
+
+def load_report(path) -> dict:
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import caches
+
+class SharedCache:
+    """
+    Entries kept in the Django cache backend named by SENSORS_AUTH_CACHE, under a key prefix,
+    expiring after `ttl` seconds. With a backend shared by all workers (Redis, Memcached,
+    database) a `delete` is seen by every process at once; with a per-process backend entries
+    can outlive a change elsewhere by up to `ttl` seconds, so keep it short there.
+    """
+    def __init__(self, prefix: str, ttl: float):
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @property
+    def _cache(self):
+        return caches[getattr(settings, "SENSORS_AUTH_CACHE", "default")]
+
+    def _key(self, key) -> str:
+        return f"sensors:{self.prefix}:{key}"
+
+    def get(self, key, default=None):
+        return self._cache.get(self._key(key), default)
+
+    def get_many(self, keys) -> dict:
+        found = self._cache.get_many([self._key(key) for key in keys])
+        return {key: found[self._key(key)] for key in keys if self._key(key) in found}
+
+    def set(self, key, value):
+        self._cache.set(self._key(key), value, timeout=self.ttl)
+
+    def delete(self, key):
+        self._cache.delete(self._key(key))
+
+    def clear(self):
+        # Clears the whole backend; meant for tests and benchmarks
+        self._cache.clear()
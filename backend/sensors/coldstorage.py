@@ -0,0 +1,279 @@
+import heapq
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from operator import itemgetter
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from .conditional import bump_data_version
+from .models import Reading, ReadingChunk
+from .rollups import bucket_start
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+HEADER = struct.Struct("<4sIq")
+MAGIC = b"RCK1"
+
+# Packing layout, Gorilla-style but vectorized: timestamps (microseconds) are stored as
+# delta-of-deltas, values as the XOR of each float64 with its predecessor. Regular sampling
+# and slowly moving values turn both into runs of zero bytes; after a byte shuffle
+# (all first bytes, then all second bytes, ...) zlib squeezes those out. Lossless.
+
+def _shuffle(values: np.ndarray) -> bytes:
+    return values.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+def _unshuffle(data: bytes, count: int, dtype) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint8).reshape(8, count).T.copy().view(dtype).ravel()
+
+def _xor_encode(values: np.ndarray) -> np.ndarray:
+    bits = values.astype(np.float64).view(np.uint64)
+    return bits ^ np.concatenate(([np.uint64(0)], bits[:-1]))
+
+def _xor_decode(encoded: np.ndarray) -> np.ndarray:
+    return np.bitwise_xor.accumulate(encoded).view(np.float64)
+
+def encode_chunk(timestamps_us, temperature, humidity) -> bytes:
+    """
+    Pack sorted microsecond timestamps and their values into a compressed blob.
+    """
+    timestamps_us = np.asarray(timestamps_us, dtype=np.int64)
+    count = len(timestamps_us)
+    deltas = np.diff(timestamps_us)
+    dod = np.concatenate((deltas[:1], np.diff(deltas))) if count > 1 else np.empty(0, dtype=np.int64)
+    body = b"".join((
+        _shuffle(dod),
+        _shuffle(_xor_encode(np.asarray(temperature))),
+        _shuffle(_xor_encode(np.asarray(humidity))),
+    ))
+    first = int(timestamps_us[0]) if count else 0
+    return HEADER.pack(MAGIC, count, first) + zlib.compress(body, 6)
+
+def decode_chunk(data: bytes):
+    """
+    Inverse of `encode_chunk`: returns (timestamps_us, temperature, humidity) arrays.
+    """
+    magic, count, first = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a reading chunk")
+    body = zlib.decompress(bytes(data[HEADER.size:]))
+    size = (count - 1) * 8 if count else 0
+    dod = _unshuffle(body[:size], count - 1, np.int64) if count > 1 else np.empty(0, dtype=np.int64)
+    temperature = _xor_decode(_unshuffle(body[size:size + count * 8], count, np.uint64))
+    humidity = _xor_decode(_unshuffle(body[size + count * 8:], count, np.uint64))
+    timestamps_us = first + np.concatenate(([0], np.cumsum(np.cumsum(dod))))
+    return timestamps_us.astype(np.int64), temperature, humidity
+
+def to_micros(timestamp) -> int:
+    delta = timestamp - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def from_micros(value: int):
+    return EPOCH + timedelta(microseconds=value)
+
+def cold_rows(sensor_id: int, timestamp_from=None, timestamp_to=None, after=None):
+    """
+    Decode the chunks of a sensor overlapping the bounds, one at a time, yielding
+    (id, sensor_id, temperature, humidity, timestamp) tuples like the hot table
+    (with no id) in timestamp order.
+    """
+    chunks = ReadingChunk.objects.filter(sensor_id=sensor_id).order_by("window_start")
+    lower = max(filter(None, (timestamp_from, after)), default=None)
+    if lower is not None:
+        chunks = chunks.filter(last_timestamp__gte=lower)
+    if timestamp_to is not None:
+        chunks = chunks.filter(first_timestamp__lte=timestamp_to)
+
+    for data in chunks.values_list("data", flat=True).iterator(chunk_size=10):
+        timestamps, temperature, humidity = decode_chunk(data)
+        keep = np.ones(len(timestamps), dtype=bool)
+        if timestamp_from is not None:
+            keep &= timestamps >= to_micros(timestamp_from)
+        if after is not None:
+            keep &= timestamps > to_micros(after)
+        if timestamp_to is not None:
+            keep &= timestamps <= to_micros(timestamp_to)
+        for ts, t, h in zip(timestamps[keep].tolist(), temperature[keep].tolist(), humidity[keep].tolist()):
+            yield None, sensor_id, t, h, from_micros(ts)
+
+def sensors_cold_rows(sensor_ids, timestamp_from=None, timestamp_to=None):
+    """
+    `cold_rows` of several sensors, one sensor after the other in the given order.
+    """
+    for sensor_id in sensor_ids:
+        yield from cold_rows(sensor_id, timestamp_from, timestamp_to)
+
+def _chunks_holding(keys):
+    """
+    Chunks that may contain any of the (sensor_id, timestamp) keys, fetched with one query.
+    """
+    spans = {}
+    for sensor_id, timestamp in keys:
+        low, high = spans.get(sensor_id, (timestamp, timestamp))
+        spans[sensor_id] = (min(low, timestamp), max(high, timestamp))
+    condition = Q()
+    for sensor_id, (low, high) in spans.items():
+        condition |= Q(sensor_id=sensor_id, first_timestamp__lte=high, last_timestamp__gte=low)
+    return ReadingChunk.objects.filter(condition)
+
+def _positions(sensor_id: int, timestamps, keys) -> dict:
+    """
+    Map the keys found among a chunk's decoded timestamps to their positions.
+    """
+    index = {ts: i for i, ts in enumerate(timestamps.tolist())}
+    return {
+        key: index[to_micros(key[1])]
+        for key in keys
+        if key[0] == sensor_id and to_micros(key[1]) in index
+    }
+
+def compacted_keys(keys) -> set:
+    """
+    The (sensor_id, timestamp) keys that are already stored in chunks.
+    """
+    keys = set(keys)
+    if not keys:
+        return set()
+    found = set()
+    for sensor_id, data in _chunks_holding(keys).values_list("sensor_id", "data"):
+        found.update(_positions(sensor_id, decode_chunk(data)[0], keys))
+    return found
+
+def overwrite_compacted(values: dict) -> set:
+    """
+    Store new (temperature, humidity) for the readings of `values`, keyed by
+    (sensor_id, timestamp), that are held in chunks. Returns the keys overwritten.
+    """
+    if not values:
+        return set()
+    found = set()
+    for chunk in _chunks_holding(values).select_for_update():
+        timestamps, temperature, humidity = decode_chunk(chunk.data)
+        positions = _positions(chunk.sensor_id, timestamps, values)
+        if not positions:
+            continue
+        for key, i in positions.items():
+            temperature[i], humidity[i] = values[key]
+        _rewrite_chunk(chunk, timestamps, temperature, humidity)
+        found.update(positions)
+    return found
+
+def merge_rows(hot, cold, key=itemgetter(4)):
+    """
+    Merge two row iterators ordered by `key`, the timestamp by default; use (sensor_id, timestamp)
+    for rows of several sensors. Ingest treats compacted readings as existing, so a key is only
+    in both while compaction races a write; the hot row wins then.
+    """
+    previous = None
+    for row in heapq.merge(hot, cold, key=key):
+        current = key(row)
+        if current != previous:
+            yield row
+        previous = current
+
+def compact_sensor(sensor_id: int, cutoff, window: int) -> tuple:
+    """
+    Move the sensor's readings in complete `window`-second windows before `cutoff` into
+    chunks, one window per transaction. Readings that arrived for an already compacted
+    window are merged into its chunk. Returns (readings packed, chunks written).
+    """
+    cutoff = bucket_start(cutoff, window)
+    raw = Reading.objects.filter(sensor_id=sensor_id, timestamp__lt=cutoff).order_by("timestamp")
+    packed = written = 0
+    while (first := raw.values_list("timestamp", flat=True).first()) is not None:
+        start = bucket_start(first, window)
+        end = start + timedelta(seconds=window)
+        with transaction.atomic():
+            rows = list(raw.filter(timestamp__lt=end).values_list("id", "timestamp", "temperature", "humidity"))
+            series = {to_micros(ts): (t, h) for _, ts, t, h in rows}
+            existing = ReadingChunk.objects.select_for_update().filter(sensor_id=sensor_id, window_start=start).first()
+            if existing is not None:
+                for ts, t, h in zip(*decode_chunk(existing.data)):
+                    series.setdefault(int(ts), (float(t), float(h)))
+            timestamps = sorted(series)
+            values = np.array([series[ts] for ts in timestamps], dtype=np.float64)
+            ReadingChunk.objects.update_or_create(
+                sensor_id=sensor_id,
+                window_start=start,
+                defaults={
+                    "first_timestamp": from_micros(timestamps[0]),
+                    "last_timestamp": from_micros(timestamps[-1]),
+                    "count": len(timestamps),
+                    "data": encode_chunk(timestamps, values[:, 0], values[:, 1]),
+                    # Merged readings have not been through retention yet
+                    "downsampled_until": None,
+                },
+            )
+            Reading.objects.filter(id__in=[row[0] for row in rows]).delete()
+        packed += len(rows)
+        written += 1
+    if written:
+        # Compacted readings lose their IDs, which changes the listed representation
+        bump_data_version([sensor_id])
+    return packed, written
+
+def _rewrite_chunk(chunk, timestamps, temperature, humidity):
+    """
+    Store new contents for a chunk, deleting it once it holds no readings.
+    """
+    if not len(timestamps):
+        chunk.delete()
+        return
+    chunk.first_timestamp = from_micros(int(timestamps[0]))
+    chunk.last_timestamp = from_micros(int(timestamps[-1]))
+    chunk.count = len(timestamps)
+    chunk.data = encode_chunk(timestamps, temperature, humidity)
+    chunk.save(update_fields=["first_timestamp", "last_timestamp", "count", "data", "downsampled_until"])
+
+def expire_chunks(sensor_id: int, cutoff) -> int:
+    """
+    Drop compacted readings older than `cutoff`: chunks entirely before it are deleted,
+    the one straddling it is trimmed. Returns the number of readings removed.
+    """
+    expired = ReadingChunk.objects.filter(sensor_id=sensor_id, first_timestamp__lt=cutoff)
+    with transaction.atomic():
+        whole = expired.filter(last_timestamp__lt=cutoff)
+        removed = whole.aggregate(total=Sum("count"))["total"] or 0
+        whole.delete()
+        for chunk in expired.select_for_update():
+            timestamps, temperature, humidity = decode_chunk(chunk.data)
+            keep = timestamps >= to_micros(cutoff)
+            removed += int(len(timestamps) - keep.sum())
+            _rewrite_chunk(chunk, timestamps[keep], temperature[keep], humidity[keep])
+    return removed
+
+def downsample_chunks(sensor_id: int, cutoff, bucket: int) -> tuple:
+    """
+    Counterpart of `retention.downsample_expired` for compacted readings: within each chunk,
+    the readings of every `bucket` seconds before `cutoff` are replaced by their average,
+    stamped at the bucket start (or the chunk's window start, for buckets longer than a
+    window). Chunks remember how far they were downsampled, so they are only decoded again
+    once more of them expires or compaction merges new readings in.
+
+    Returns (readings removed, averaged readings written).
+    """
+    cutoff = bucket_start(cutoff, bucket)
+    step = bucket * 1_000_000
+    pending = ReadingChunk.objects.filter(sensor_id=sensor_id, first_timestamp__lt=cutoff).filter(
+        Q(downsampled_until__isnull=True)
+        | Q(downsampled_until__lt=cutoff, downsampled_until__lte=F("last_timestamp"))
+    )
+    removed = written = 0
+    for chunk_id in pending.order_by("window_start").values_list("id", flat=True):
+        with transaction.atomic():
+            chunk = ReadingChunk.objects.select_for_update().get(id=chunk_id)
+            timestamps, temperature, humidity = decode_chunk(chunk.data)
+            expired = timestamps < to_micros(cutoff)
+            if chunk.downsampled_until is not None:
+                expired &= timestamps >= to_micros(chunk.downsampled_until)
+            stamps = np.maximum(timestamps[expired] - timestamps[expired] % step, to_micros(chunk.window_start))
+            stamps, members, counts = np.unique(stamps, return_inverse=True, return_counts=True)
+            keep = ~expired
+            timestamps = np.concatenate((timestamps[keep], stamps))
+            temperature = np.concatenate((temperature[keep], np.bincount(members, temperature[expired]) / counts))
+            humidity = np.concatenate((humidity[keep], np.bincount(members, humidity[expired]) / counts))
+            order = np.argsort(timestamps, kind="stable")
+            chunk.downsampled_until = cutoff
+            _rewrite_chunk(chunk, timestamps[order], temperature[order], humidity[order])
+        removed += int(expired.sum())
+        written += len(stamps)
+    return removed, written
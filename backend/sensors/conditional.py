@@ -0,0 +1,116 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from .models import Sensor, SensorDataVersion
+
+def _bump_sql(source: str) -> str:
+    qn = connection.ops.quote_name
+    table = qn(SensorDataVersion._meta.db_table)
+    version = qn("version")
+    return (
+        f"INSERT INTO {table} ({qn('sensor_id')}, {version}) {source} "
+        f"ON CONFLICT ({qn('sensor_id')}) DO UPDATE SET {version} = {table}.{version} + 1"
+    )
+
+def bump_data_version(sensor_ids):
+    """
+    Invalidate ETags and cached responses of the given sensors, with one upsert into
+    their version rows; the sensors table itself is not written.
+    """
+    sensor_ids = sorted(set(sensor_ids))
+    if sensor_ids:
+        with connection.cursor() as cursor:
+            cursor.execute(_bump_sql("VALUES " + ", ".join(["(%s, 1)"] * len(sensor_ids))), sensor_ids)
+
+def bump_all_data_versions():
+    qn = connection.ops.quote_name
+    # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT
+    source = f"SELECT {qn('id')}, 1 FROM {qn(Sensor._meta.db_table)} WHERE true"
+    with connection.cursor() as cursor:
+        cursor.execute(_bump_sql(source))
+
+def get_data_version(sensor_id: int) -> int:
+    return SensorDataVersion.objects.filter(sensor_id=sensor_id).values_list("version", flat=True).first() or 0
+
+def sensor_data_version(sensor: Sensor) -> int:
+    """
+    Version of a sensor fetched with `select_related("data_version")`.
+    """
+    try:
+        return sensor.data_version.version
+    except SensorDataVersion.DoesNotExist:
+        return 0
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+def not_modified(request, etag: str):
+    """
+    A 304 response when the request's If-None-Match matches `etag`, else None.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+def response_cache():
+    """
+    The cache backend named by SENSORS_RESPONSE_CACHE, or None when response caching is off.
+    """
+    alias = getattr(settings, "SENSORS_RESPONSE_CACHE", None)
+    return caches[alias] if alias else None
+
+def response_cache_key(prefix: str, sensor_id: int, version: int, request) -> str:
+    # Sorted so that parameter order does not split the cache
+    query = "&".join(sorted(request.GET.urlencode().split("&")))
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    return f"sensors:{prefix}:{sensor_id}:{version}:{digest}"
+
+def cached_response(cache, key: str):
+    """
+    Rebuild a response stored by `store_response`, or None on a miss.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    content, content_type, headers = entry
+    response = HttpResponse(content, content_type=content_type)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+def _max_bytes() -> int:
+    return getattr(settings, "SENSORS_RESPONSE_CACHE_MAX_BYTES", 5 * 1024 * 1024)
+
+def store_response(cache, key: str, response, headers=()):
+    """
+    Cache the body of `response`, with the named headers, if it is small enough.
+    Streaming responses are passed through and stored once fully sent.
+    """
+    content_type = response["Content-Type"]
+    kept = {name: response[name] for name in headers if response.has_header(name)}
+    max_bytes = _max_bytes()
+
+    if not response.streaming:
+        if len(response.content) <= max_bytes:
+            cache.set(key, (response.content, content_type, kept))
+        return response
+
+    def tee(chunks):
+        parts, size = [], 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size <= max_bytes:
+                    parts.append(chunk)
+                else:
+                    parts = None
+            yield chunk
+        if parts is not None:
+            cache.set(key, (b"".join(parts), content_type, kept))
+
+    response.streaming_content = tee(response.streaming_content)
+    return response
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+
+READING_DTYPE = np.dtype([
+    ("id", np.int64),
+    ("timestamp", np.float64),
+    ("temperature", np.float64),
+    ("humidity", np.float64),
+])
+
+# Compacted readings have no primary key; they carry this in the array
+NO_ID = -1
+
+def fetch_reading_arrays(rows):
+    """
+    Load (id, sensor_id, temperature, humidity, timestamp) tuples into a structured array
+    without building model instances.
+    """
+    return np.fromiter(
+        (
+            (NO_ID if pk is None else pk, ts.timestamp(), temperature, humidity)
+            for pk, _, temperature, humidity, ts in rows
+        ),
+        dtype=READING_DTYPE,
+    )
+
+def _normalize(values):
+    span = values.max() - values.min()
+    return (values - values.min()) / span if span else np.zeros_like(values)
+
+def lttb_indices(x, ys, n_out: int):
+    """
+    Pick `n_out` indices with Largest-Triangle-Three-Buckets.
+
+    `x` must be sorted. `ys` is a sequence of series sharing `x`; each is scaled to
+    [0, 1] and their triangle areas are summed, so a point is kept when it matters
+    for the shape of any of the series. The first and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _normalize(np.asarray(x, dtype=np.float64))
+    ys = np.stack([_normalize(np.asarray(y, dtype=np.float64)) for y in ys])
+
+    # Interior points split into n_out - 2 buckets; bucket i spans [edges[i], edges[i + 1])
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+
+    # Average of every bucket at once; the bucket after the last one is the final point
+    avg_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(ys[:, :-1], edges[:-1], axis=1) / sizes, ys[:, -1:], axis=1)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[:, i + 1:i + 2]
+        px, py = x[start:stop], ys[:, start:stop]
+        ax, ay = x[a], ys[:, a:a + 1]
+        areas = np.abs((ax - cx) * (py - ay) - (ax - px) * (cy - ay)).sum(axis=0)
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    return selected
+
+def downsample_readings(rows, sensor_id: int, max_points: int) -> list:
+    """
+    Reduce timestamp-ordered reading tuples to at most `max_points` readings that preserve
+    the shape of the temperature and humidity series, returned as tuples of the same layout.
+    """
+    data = fetch_reading_arrays(rows)
+    keep = data[lttb_indices(data["timestamp"], (data["temperature"], data["humidity"]), max_points)]
+    return [
+        (None if pk == NO_ID else int(pk), sensor_id, temperature, humidity, datetime.fromtimestamp(ts, tz=dt_timezone.utc))
+        for pk, ts, temperature, humidity in keep.tolist()
+    ]
@@ -0,0 +1,152 @@
+import json
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.request import MediaType
+from ninja.errors import HttpError
+from .streaming import READING_KEYS, ReadingJSONEncoder, iter_chunks, render_readings, stream_readings
+from .timing import phase
+
+# Optional encoders; their formats are only offered when the library is installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+JSON = "json"
+COLUMNS = "columns"
+MSGPACK = "msgpack"
+ARROW = "arrow"
+
+FORMAT_CONTENT_TYPES = {
+    JSON: "application/json",
+    COLUMNS: "application/vnd.sensors.columns+json",
+    MSGPACK: "application/msgpack",
+    ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# Media types clients may ask for, in order of preference when the Accept header ties
+ACCEPTED_MEDIA_TYPES = [
+    *((content_type, format) for format, content_type in FORMAT_CONTENT_TYPES.items()),
+    ("application/x-msgpack", MSGPACK),
+]
+
+def available_formats() -> set:
+    formats = {JSON, COLUMNS}
+    if msgpack is not None:
+        formats.add(MSGPACK)
+    if pyarrow is not None:
+        formats.add(ARROW)
+    return formats
+
+def negotiate_format(request) -> str:
+    """
+    Pick the readings format for the request's Accept header: the available format with the
+    highest quality, JSON when the header is missing. Raises 406 when none is acceptable.
+    """
+    header = request.headers.get("Accept", "").strip()
+    if not header:
+        return JSON
+    available = available_formats()
+    best, best_quality = None, 0.0
+    for token in header.split(","):
+        accepted = MediaType(token.strip())
+        try:
+            quality = float(accepted.params.get("q", 1))
+        except ValueError:
+            quality = 0.0
+        if quality <= best_quality:
+            continue
+        for content_type, format in ACCEPTED_MEDIA_TYPES:
+            if format in available and accepted.match(content_type):
+                best, best_quality = format, quality
+                break
+    if best is None:
+        offered = ", ".join(FORMAT_CONTENT_TYPES[format] for format in FORMAT_CONTENT_TYPES if format in available)
+        raise HttpError(406, f"Readings are available as {offered}")
+    return best
+
+def reading_columns(rows) -> dict:
+    """
+    Transpose (id, sensor_id, temperature, humidity, timestamp) tuples into one list per
+    `ReadingSchema` key.
+    """
+    columns = list(zip(*rows)) or [()] * len(READING_KEYS)
+    return {key: list(values) for key, values in zip(READING_KEYS, columns)}
+
+def encode_columns(rows) -> bytes:
+    return json.dumps(reading_columns(rows), cls=ReadingJSONEncoder, separators=(",", ":")).encode()
+
+def encode_msgpack(rows) -> bytes:
+    # Timestamps use the msgpack timestamp extension type
+    return msgpack.packb(reading_columns(rows), datetime=True)
+
+def msgpack_stream(rows):
+    """
+    Encode tuples as consecutive MessagePack column maps, one per chunk, which
+    `msgpack.Unpacker` reads back one after the other. An empty range is one empty map.
+    """
+    empty = True
+    for chunk in iter_chunks(rows):
+        empty = False
+        yield encode_msgpack(chunk)
+    if empty:
+        yield encode_msgpack([])
+
+def arrow_schema():
+    return pyarrow.schema([
+        ("id", pyarrow.int64()),
+        ("sensor", pyarrow.int64()),
+        ("temperature", pyarrow.float64()),
+        ("humidity", pyarrow.float64()),
+        ("timestamp", pyarrow.timestamp("us", tz="UTC")),
+    ])
+
+def arrow_stream(rows):
+    """
+    Encode tuples as an Arrow IPC stream, one record batch per chunk, so ranges of any
+    size are produced in constant memory.
+    """
+    schema = arrow_schema()
+    yield schema.serialize().to_pybytes()
+    for chunk in iter_chunks(rows):
+        columns = reading_columns(chunk)
+        batch = pyarrow.record_batch(
+            [pyarrow.array(columns[field.name], type=field.type) for field in schema], schema=schema
+        )
+        yield batch.serialize().to_pybytes()
+    # End-of-stream marker: continuation token followed by a zero length
+    yield b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+def render_readings_as(rows, format: str) -> HttpResponse:
+    """
+    Build a readings response in `format` from (id, sensor_id, temperature, humidity, timestamp) tuples.
+    """
+    with phase("serialize"):
+        if format == JSON:
+            return render_readings(rows)
+        if format == ARROW:
+            return HttpResponse(b"".join(arrow_stream(rows)), content_type=FORMAT_CONTENT_TYPES[ARROW])
+        encode = encode_msgpack if format == MSGPACK else encode_columns
+        return HttpResponse(encode(rows), content_type=FORMAT_CONTENT_TYPES[format])
+
+# Formats `stream_readings_as` can produce; a columnar JSON document needs every row
+# before its first column is complete
+STREAMED_FORMATS = {JSON, MSGPACK, ARROW}
+
+def stream_readings_as(rows, format: str) -> HttpResponse:
+    """
+    Streaming counterpart of `render_readings_as` for whole ranges, in one of `STREAMED_FORMATS`.
+    """
+    if format == JSON:
+        return stream_readings(rows)
+    if format == ARROW:
+        content = arrow_stream(rows)
+    elif format == MSGPACK:
+        content = msgpack_stream(rows)
+    else:
+        raise ValueError(f"{format} cannot be streamed")
+    return StreamingHttpResponse(content, content_type=FORMAT_CONTENT_TYPES[format])
@@ -0,0 +1,228 @@
+import csv
+import io
+from django.db import connection, transaction
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Reading
+from . import anomaly, coldstorage, latest, rollups, stats
+from .conditional import bump_data_version
+from .pubsub import hub
+from .streaming import iter_chunks
+
+ON_CONFLICT_IGNORE = "ignore"
+ON_CONFLICT_UPDATE = "update"
+
+# Rows per INSERT statement; keeps the parameter count within SQLite's limit
+INSERT_BATCH_SIZE = 500
+
+def as_aware(value):
+    """
+    Interpret naive datetimes in the default time zone, like the ORM does on save.
+    """
+    if timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+def _after_write(inserted, updated):
+    """
+    Keep derived data in step with raw readings, inside the writing transaction.
+
+    `inserted` holds (sensor_id, timestamp, temperature, humidity) tuples of new rows,
+    `updated` the same tuples of overwritten rows with their new values.
+    """
+    if inserted:
+        rollups.apply_rollups(inserted)
+        stats.apply_stats(inserted)
+        anomaly.detect_anomalies(inserted)
+    if updated:
+        rollups.mark_dirty((sensor_id, timestamp) for sensor_id, timestamp, _, _ in updated)
+        stats.mark_stale(sensor_id for sensor_id, _, _, _ in updated)
+    written = [*inserted, *updated]
+    latest.record_latest(written)
+    bump_data_version(row[0] for row in written)
+    if written:
+        # Live subscribers only hear about readings that were committed
+        transaction.on_commit(lambda: hub.publish(written))
+
+def insert_reading(sensor_id: int, temperature: float, humidity: float, timestamp):
+    """
+    Create a single reading and update everything derived from it.
+    """
+    with transaction.atomic():
+        reading = Reading.objects.create(
+            sensor_id=sensor_id, temperature=temperature, humidity=humidity, timestamp=timestamp
+        )
+        _after_write([(sensor_id, as_aware(reading.timestamp), temperature, humidity)], [])
+    return reading
+
+def upsert_readings(rows, on_conflict=ON_CONFLICT_IGNORE):
+    """
+    Write readings with multi-row inserts, resolving duplicates through the
+    `unique_sensor_timestamp` constraint. New rows are told from existing ones by what
+    the insert itself returns, never by reading ahead.
+
+    `rows` is an iterable of dicts with `sensor_id`, `temperature`, `humidity` and
+    `timestamp`. Duplicates within the payload are collapsed (last one wins) and
+    counted as skipped. Rows that already exist, raw or compacted, are skipped or,
+    with `on_conflict="update"`, overwritten.
+
+    Returns a dict with `inserted`, `updated` and `skipped` counts.
+    """
+    unique = {}
+    total = 0
+    for row in rows:
+        total += 1
+        timestamp = as_aware(row["timestamp"])
+        unique[(row["sensor_id"], timestamp)] = (row["temperature"], row["humidity"])
+
+    result = {"inserted": 0, "updated": 0, "skipped": total - len(unique)}
+    if not unique:
+        return result
+
+    with transaction.atomic():
+        if on_conflict == ON_CONFLICT_UPDATE:
+            compacted = coldstorage.overwrite_compacted(unique)
+        else:
+            compacted = coldstorage.compacted_keys(unique)
+        inserted_keys = _insert_new(item for item in unique.items() if item[0] not in compacted)
+        existing = unique.keys() - inserted_keys - compacted
+        if on_conflict == ON_CONFLICT_UPDATE:
+            if existing:
+                Reading.objects.bulk_create(
+                    [
+                        Reading(sensor_id=sensor_id, timestamp=timestamp, temperature=temperature, humidity=humidity)
+                        for (sensor_id, timestamp), (temperature, humidity) in unique.items()
+                        if (sensor_id, timestamp) in existing
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["sensor", "timestamp"],
+                    update_fields=["temperature", "humidity"],
+                )
+            updated = [key + unique[key] for key in (*existing, *compacted)]
+            result["updated"] = len(updated)
+        else:
+            result["skipped"] += len(existing) + len(compacted)
+            updated = []
+
+        inserted = [key + unique[key] for key in inserted_keys]
+        _after_write(inserted, updated)
+
+    result["inserted"] = len(inserted_keys)
+    return result
+
+def _from_db_timestamp(value):
+    # SQLite hands back the stored text, naive in UTC
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+def _insert_new(items) -> set:
+    """
+    Insert ((sensor_id, timestamp), (temperature, humidity)) items that do not exist yet
+    with INSERT ... ON CONFLICT DO NOTHING RETURNING, and return the keys of the rows this
+    statement created. A row another transaction inserts first is not returned, so
+    concurrent retries of one batch never both count it as new.
+    """
+    table = connection.ops.quote_name(Reading._meta.db_table)
+    field = Reading._meta.get_field("timestamp")
+    created = set()
+    with connection.cursor() as cursor:
+        for chunk in iter_chunks(items, INSERT_BATCH_SIZE):
+            params = []
+            for (sensor_id, timestamp), (temperature, humidity) in chunk:
+                params += [sensor_id, field.get_db_prep_value(timestamp, connection), temperature, humidity]
+            cursor.execute(
+                f"INSERT INTO {table} (sensor_id, timestamp, temperature, humidity) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT (sensor_id, timestamp) DO NOTHING "
+                f"RETURNING sensor_id, timestamp",
+                params,
+            )
+            created.update((sensor_id, _from_db_timestamp(timestamp)) for sensor_id, timestamp in cursor.fetchall())
+    return created
+
+def _copy_sql(on_conflict) -> str:
+    table = connection.ops.quote_name(Reading._meta.db_table)
+    if on_conflict == ON_CONFLICT_UPDATE:
+        action = "DO UPDATE SET temperature = EXCLUDED.temperature, humidity = EXCLUDED.humidity"
+    else:
+        action = "DO NOTHING"
+    # DISTINCT ON keeps the last row per key; ON CONFLICT cannot touch the same row twice.
+    # xmax is 0 only for freshly inserted tuples, which tells inserts from updates.
+    return (
+        f"INSERT INTO {table} (sensor_id, timestamp, temperature, humidity) "
+        f"SELECT DISTINCT ON (sensor_id, timestamp) sensor_id, timestamp, temperature, humidity "
+        f"FROM reading_load ORDER BY sensor_id, timestamp, seq DESC "
+        f"ON CONFLICT (sensor_id, timestamp) {action} "
+        f"RETURNING sensor_id, timestamp, temperature, humidity, (xmax = 0)"
+    )
+
+def copy_readings(rows, on_conflict=ON_CONFLICT_IGNORE):
+    """
+    PostgreSQL counterpart of `upsert_readings` for bulk loads: rows are streamed into a
+    temporary staging table with COPY and merged with one INSERT ... SELECT ... ON CONFLICT.
+
+    `rows` is a sequence of (sensor_id, timestamp, temperature, humidity) tuples.
+    Returns the same counts as `upsert_readings`.
+    """
+    values = {}
+    for sensor_id, timestamp, temperature, humidity in rows:
+        values[(sensor_id, as_aware(timestamp))] = (temperature, humidity)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if on_conflict == ON_CONFLICT_UPDATE:
+            compacted = coldstorage.overwrite_compacted(values)
+            overwritten = [key + values[key] for key in compacted]
+        else:
+            compacted = coldstorage.compacted_keys(values)
+            overwritten = []
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for seq, (sensor_id, timestamp, temperature, humidity) in enumerate(rows):
+            timestamp = as_aware(timestamp)
+            if (sensor_id, timestamp) not in compacted:
+                writer.writerow((seq, sensor_id, timestamp.isoformat(), temperature, humidity))
+        buffer.seek(0)
+
+        cursor.execute(
+            "CREATE TEMPORARY TABLE reading_load ("
+            "seq integer, sensor_id bigint, timestamp timestamptz, "
+            "temperature double precision, humidity double precision"
+            ") ON COMMIT DROP"
+        )
+        cursor.copy_expert(
+            "COPY reading_load (seq, sensor_id, timestamp, temperature, humidity) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        cursor.execute(_copy_sql(on_conflict))
+        written = cursor.fetchall()
+        cursor.execute("DROP TABLE reading_load")
+
+        inserted = [(sensor_id, ts, t, h) for sensor_id, ts, t, h, is_new in written if is_new]
+        updated = [(sensor_id, ts, t, h) for sensor_id, ts, t, h, is_new in written if not is_new] + overwritten
+        _after_write(inserted, updated)
+
+    return {
+        "inserted": len(inserted),
+        "updated": len(updated),
+        "skipped": len(rows) - len(written) - len(overwritten),
+    }
+
+def write_readings(rows, on_conflict=ON_CONFLICT_IGNORE):
+    """
+    Bulk-write (sensor_id, timestamp, temperature, humidity) tuples with the fastest path
+    the database offers: COPY on PostgreSQL, multi-row inserts elsewhere.
+    """
+    if connection.vendor == "postgresql":
+        return copy_readings(rows, on_conflict)
+    return upsert_readings(
+        (
+            {"sensor_id": sensor_id, "timestamp": timestamp, "temperature": temperature, "humidity": humidity}
+            for sensor_id, timestamp, temperature, humidity in rows
+        ),
+        on_conflict,
+    )
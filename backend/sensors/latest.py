@@ -0,0 +1,68 @@
+from django.db import connection
+from .coldstorage import decode_chunk, from_micros
+from .models import Reading, ReadingChunk, SensorLatestReading
+
+def newest_by_sensor(rows) -> dict:
+    """
+    Keep the newest of (sensor_id, timestamp, temperature, humidity) tuples per sensor.
+    """
+    newest = {}
+    for row in rows:
+        current = newest.get(row[0])
+        if current is None or row[1] >= current[1]:
+            newest[row[0]] = row
+    return newest
+
+def _upsert_sql(rows: int) -> str:
+    qn = connection.ops.quote_name
+    table = qn(SensorLatestReading._meta.db_table)
+    columns = ("sensor_id", "timestamp", "temperature", "humidity")
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * rows)
+    assignments = ", ".join(f"{qn(c)} = EXCLUDED.{qn(c)}" for c in columns[1:])
+    # Readings can arrive out of order; an older one never replaces a newer one
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES {placeholders} "
+        f"ON CONFLICT ({qn('sensor_id')}) DO UPDATE SET {assignments} "
+        f"WHERE EXCLUDED.{qn('timestamp')} >= {table}.{qn('timestamp')}"
+    )
+
+def record_latest(rows):
+    """
+    Fold written (sensor_id, timestamp, temperature, humidity) tuples into each
+    sensor's latest reading with one INSERT ... ON CONFLICT DO UPDATE.
+    """
+    newest = list(newest_by_sensor(rows).values())
+    if not newest:
+        return
+    timestamp_field = SensorLatestReading._meta.get_field("timestamp")
+    params = []
+    for sensor_id, timestamp, temperature, humidity in newest:
+        params += [sensor_id, timestamp_field.get_db_prep_value(timestamp, connection), temperature, humidity]
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(len(newest)), params)
+
+def rebuild_latest(sensor_ids):
+    """
+    Recompute the latest reading of the given sensors from raw rows and compacted
+    chunks, e.g. after readings were deleted, downsampled or compacted.
+    """
+    for sensor_id in sensor_ids:
+        newest = (
+            Reading.objects.filter(sensor_id=sensor_id).order_by("-timestamp")
+            .values_list("timestamp", "temperature", "humidity").first()
+        )
+        chunks = ReadingChunk.objects.filter(sensor_id=sensor_id)
+        if newest is not None:
+            chunks = chunks.filter(last_timestamp__gt=newest[0])
+        data = chunks.order_by("-last_timestamp").values_list("data", flat=True).first()
+        if data is not None:
+            timestamps, temperature, humidity = decode_chunk(data)
+            newest = (from_micros(int(timestamps[-1])), float(temperature[-1]), float(humidity[-1]))
+        if newest is None:
+            SensorLatestReading.objects.filter(sensor_id=sensor_id).delete()
+            continue
+        timestamp, temperature, humidity = newest
+        SensorLatestReading.objects.update_or_create(
+            sensor_id=sensor_id,
+            defaults={"timestamp": timestamp, "temperature": temperature, "humidity": humidity},
+        )
@@ -0,0 +1,70 @@
+import csv
+from itertools import islice
+from django.utils.dateparse import parse_datetime
+from .ingest import write_readings, ON_CONFLICT_IGNORE
+from .models import Sensor
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Same layout as seed_data/sensor_readings_wide.csv and the readings export
+CSV_COLUMNS = ("timestamp", "device_id", "temperature", "humidity")
+
+class LoadError(Exception):
+    pass
+
+def resolve_sensor_ids(owner) -> dict:
+    """
+    Map sensor names to IDs for one owner, in a single query.
+    Names shared by several of the owner's sensors map to None.
+    """
+    sensor_ids = {}
+    for name, sensor_id in Sensor.objects.filter(owner=owner).values_list("name", "id"):
+        sensor_ids[name] = None if name in sensor_ids else sensor_id
+    return sensor_ids
+
+def parse_rows(reader, sensor_ids: dict):
+    for line, row in enumerate(reader, start=2):
+        try:
+            sensor_id = sensor_ids[row["device_id"]]
+        except KeyError:
+            raise LoadError(f"Line {line}: sensor with name '{row['device_id']}' not found")
+        if sensor_id is None:
+            raise LoadError(f"Line {line}: sensor name '{row['device_id']}' is ambiguous")
+        try:
+            timestamp = parse_datetime(row["timestamp"])
+        except ValueError:
+            # Well formed but out of range, like month 13
+            timestamp = None
+        if timestamp is None:
+            raise LoadError(f"Line {line}: invalid timestamp '{row['timestamp']}'")
+        try:
+            temperature, humidity = float(row["temperature"]), float(row["humidity"])
+        except (TypeError, ValueError):
+            raise LoadError(f"Line {line}: invalid temperature '{row['temperature']}' or humidity '{row['humidity']}'")
+        yield sensor_id, timestamp, temperature, humidity
+
+def load_readings_csv(path, owner, batch_size=DEFAULT_BATCH_SIZE, on_conflict=ON_CONFLICT_IGNORE, progress=None):
+    """
+    Stream a readings CSV into the database in batches of `batch_size` rows, each written
+    in its own short transaction. Sensors are resolved by name among `owner`'s sensors.
+
+    `progress`, if given, is called after every batch with the running totals.
+    Returns the total `inserted`, `updated` and `skipped` counts.
+    """
+    sensor_ids = resolve_sensor_ids(owner)
+    totals = {"inserted": 0, "updated": 0, "skipped": 0}
+
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise LoadError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+        rows = parse_rows(reader, sensor_ids)
+        while batch := list(islice(rows, batch_size)):
+            result = write_readings(batch, on_conflict)
+            for key in totals:
+                totals[key] += result[key]
+            if progress:
+                progress(totals)
+    return totals
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from sensors.retention import apply_retention, DEFAULT_CHUNK_SIZE
+
+class Command(BaseCommand):
+    help = "Delete or downsample readings older than their sensor's retention policy"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sensor", type=int, action="append", dest="sensors",
+                            help="Only apply to this sensor ID (repeatable)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                            help=f"Raw rows handled per transaction (default {DEFAULT_CHUNK_SIZE})")
+        parser.add_argument("--full", action="store_true",
+                            help="Re-examine already downsampled history, e.g. after a late backfill")
+
+    def handle(self, *args, **options):
+        removed_total = written_total = 0
+        for sensor_id, removed, written in apply_retention(options["sensors"], options["chunk_size"], options["full"]):
+            if removed and options["verbosity"] > 1:
+                self.stdout.write(f"Sensor {sensor_id}: {removed} raw readings removed, {written} downsampled written")
+            removed_total += removed
+            written_total += written
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {removed_total} raw readings, wrote {written_total} downsampled readings"
+        ))
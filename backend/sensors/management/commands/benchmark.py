@@ -0,0 +1,59 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from sensors.benchmarks import build_dataset, compare, load_report, report, run_benchmarks
+from sensors.synthetic import parse_duration
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the sensors API hot paths against a generated dataset in a throwaway test "
+        "database and emit the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sensors", type=int, default=100, help="Sensors in the dataset")
+        parser.add_argument("--readings", type=int, default=10000, help="Readings per sensor")
+        parser.add_argument("--rate", default="1m", help="Interval between generated readings")
+        parser.add_argument("--iterations", type=int, default=50, help="Timed calls per benchmark")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+        parser.add_argument("--compare", help="Baseline JSON report to compare p50 latencies against")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Relative p50 slowdown counted as a regression (default 0.2)")
+        parser.add_argument("--keepdb", action="store_true", help="Reuse and keep the test database")
+
+    def handle(self, *args, **options):
+        try:
+            step = parse_duration(options["rate"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        params = {key: options[key] for key in ("sensors", "readings", "rate", "iterations", "seed")}
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options["keepdb"])
+        try:
+            self.stderr.write(f"Generating {options['sensors']} x {options['readings']} readings...")
+            dataset = build_dataset(options["sensors"], options["readings"], step, options["seed"])
+            self.stderr.write("Running benchmarks...")
+            result = report(run_benchmarks(dataset, options["iterations"]), params)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        output = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            rows = compare(result, load_report(options["compare"]), threshold=options["threshold"])
+            for name, before, after, change, regressed in rows:
+                line = f"{name:32} {before:9.2f}ms -> {after:9.2f}ms ({change:+.0%})"
+                self.stderr.write(self.style.ERROR(line) if regressed else line)
+            regressions = [row[0] for row in rows if row[4]]
+            if regressions:
+                raise CommandError(f"Regressed: {', '.join(regressions)}")
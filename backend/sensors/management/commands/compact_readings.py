@@ -0,0 +1,36 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from sensors.coldstorage import compact_sensor
+from sensors.latest import rebuild_latest
+from sensors.models import Sensor
+from sensors.synthetic import parse_duration
+
+class Command(BaseCommand):
+    help = "Pack readings older than a cutoff into compressed per-sensor chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=30,
+                            help="Only compact readings older than this many days (default 30)")
+        parser.add_argument("--window", default="1d", help="Time window packed into one chunk (default 1d)")
+        parser.add_argument("--sensor", type=int, action="append", dest="sensors",
+                            help="Only compact this sensor ID (repeatable)")
+
+    def handle(self, *args, **options):
+        try:
+            window = parse_duration(options["window"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+
+        sensors = Sensor.objects.all()
+        if options["sensors"]:
+            sensors = sensors.filter(id__in=options["sensors"])
+        packed_total = chunks_total = 0
+        for sensor_id in sensors.values_list("id", flat=True).order_by("id").iterator():
+            packed, chunks = compact_sensor(sensor_id, cutoff, window)
+            if chunks:
+                rebuild_latest([sensor_id])
+            packed_total += packed
+            chunks_total += chunks
+        self.stdout.write(self.style.SUCCESS(f"Packed {packed_total} readings into {chunks_total} chunk(s)"))
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone as dt_timezone
+from time import monotonic
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from sensors.synthetic import create_fleet, generate_readings, parse_duration
+
+class Command(BaseCommand):
+    help = "Generate a synthetic fleet of users, sensors and readings for load and capacity testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1, help="Number of users to create")
+        parser.add_argument("--sensors", type=int, default=10, help="Number of sensors, spread over the users")
+        parser.add_argument("--rate", default="1m", help="Interval between readings, e.g. 1s, 5m, 1h")
+        parser.add_argument("--days", type=float, default=1, help="Days of history per sensor")
+        parser.add_argument("--start", default="2024-01-01",
+                            help="UTC start of the generated history (ISO date or datetime)")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; equal seeds give equal data")
+        parser.add_argument("--prefix", default="loadtest", help="Prefix of generated user and sensor names")
+        parser.add_argument("--password", default="loadtest", help="Password of the generated users")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Rows written per transaction")
+
+    def handle(self, *args, **options):
+        try:
+            step = parse_duration(options["rate"])
+            start = datetime.fromisoformat(options["start"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=dt_timezone.utc)
+        if options["users"] < 1 or options["sensors"] < 1:
+            raise CommandError("--users and --sensors must be positive")
+        count = int(options["days"] * 86400 // step)
+
+        with transaction.atomic():
+            sensors = create_fleet(options["users"], options["sensors"], options["prefix"], options["password"])
+        self.stdout.write(f"Created {options['users']} user(s) and {len(sensors)} sensor(s)")
+
+        started = monotonic()
+        expected = count * len(sensors)
+
+        def progress(totals):
+            rows = sum(totals.values())
+            rate = rows / max(monotonic() - started, 1e-9)
+            self.stdout.write(f"{rows}/{expected} readings written - {rate:.0f} rows/s")
+
+        totals = generate_readings(
+            [sensor.id for sensor in sensors],
+            start,
+            step,
+            count,
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+        elapsed = monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {totals['inserted']} readings in {elapsed:.1f}s"
+        ))
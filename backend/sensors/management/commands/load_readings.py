@@ -0,0 +1,56 @@
+from argparse import ArgumentTypeError
+from time import monotonic
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from sensors.ingest import ON_CONFLICT_IGNORE, ON_CONFLICT_UPDATE
+from sensors.loader import load_readings_csv, LoadError, DEFAULT_BATCH_SIZE
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+class Command(BaseCommand):
+    help = "Bulk load readings from a CSV file (timestamp, device_id, temperature, humidity)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path of the CSV file to load")
+        parser.add_argument("--owner", required=True, help="Username owning the sensors named in device_id")
+        parser.add_argument("--batch-size", type=positive_int, default=DEFAULT_BATCH_SIZE,
+                            help=f"Rows written per transaction (default {DEFAULT_BATCH_SIZE})")
+        parser.add_argument("--on-conflict", choices=[ON_CONFLICT_IGNORE, ON_CONFLICT_UPDATE],
+                            default=ON_CONFLICT_IGNORE,
+                            help="What to do with readings whose sensor and timestamp already exist")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['owner']}' not found")
+
+        started = monotonic()
+
+        def progress(totals):
+            rows = sum(totals.values())
+            rate = rows / max(monotonic() - started, 1e-9)
+            self.stdout.write(
+                f"{rows} rows processed ({totals['inserted']} inserted, {totals['updated']} updated, "
+                f"{totals['skipped']} skipped) - {rate:.0f} rows/s"
+            )
+
+        try:
+            totals = load_readings_csv(
+                options["csv_path"],
+                owner,
+                batch_size=options["batch_size"],
+                on_conflict=options["on_conflict"],
+                progress=progress if options["verbosity"] > 0 else None,
+            )
+        except (OSError, LoadError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {totals['inserted']} readings ({totals['updated']} updated, {totals['skipped']} skipped)"
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from sensors import partitioning
+
+class Command(BaseCommand):
+    help = (
+        "Manage time-range partitions of the readings table (PostgreSQL only): convert the table "
+        "once, pre-create future partitions and detach or drop old ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true",
+                            help="Convert sensors_reading into a partitioned table, copying existing rows")
+        parser.add_argument("--keep-legacy", action="store_true",
+                            help="With --convert, keep the old table as sensors_reading_legacy")
+        parser.add_argument("--ahead", type=int, default=3,
+                            help="Partitions to keep created ahead of the current one (default 3)")
+        parser.add_argument("--retain", type=int,
+                            help="Detach partitions older than this many partition periods")
+        parser.add_argument("--drop", action="store_true", help="Drop partitions detached by --retain")
+        parser.add_argument("--list", action="store_true", help="List partitions and their bounds")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning requires PostgreSQL")
+
+        if options["convert"]:
+            if partitioning.is_partitioned():
+                raise CommandError("sensors_reading is already partitioned")
+            copied = partitioning.convert(keep_legacy=options["keep_legacy"], ahead=options["ahead"])
+            self.stdout.write(self.style.SUCCESS(f"Converted sensors_reading, {copied} rows copied"))
+        elif not partitioning.is_partitioned():
+            raise CommandError("sensors_reading is not partitioned yet, run with --convert first")
+
+        for name in partitioning.ensure_partitions(options["ahead"]):
+            self.stdout.write(f"Created partition {name}")
+
+        if options["retain"] is not None:
+            for name in partitioning.expire_partitions(options["retain"], drop=options["drop"]):
+                self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} partition {name}")
+
+        if options["list"]:
+            for name, bounds in partitioning.list_partitions():
+                self.stdout.write(f"{name}: {bounds}")
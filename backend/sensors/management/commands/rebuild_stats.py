@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from sensors.models import Sensor
+from sensors.stats import rebuild_stats
+
+class Command(BaseCommand):
+    help = "Recompute running per-sensor statistics from raw and compacted readings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sensor", type=int, action="append", dest="sensors",
+                            help="Only rebuild this sensor ID (repeatable)")
+        parser.add_argument("--stale", action="store_true",
+                            help="Only rebuild sensors whose statistics are marked stale")
+
+    def handle(self, *args, **options):
+        sensors = Sensor.objects.all()
+        if options["sensors"]:
+            sensors = sensors.filter(id__in=options["sensors"])
+        if options["stale"]:
+            sensors = sensors.filter(stats__stale=True)
+        sensor_ids = list(sensors.order_by("id").values_list("id", flat=True))
+        count = rebuild_stats(sensor_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {len(sensor_ids)} sensor(s) from {count} readings"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from sensors.rollups import refresh_rollups, rebuild_rollups
+
+class Command(BaseCommand):
+    help = "Recompute hourly and daily reading rollups for time ranges marked dirty"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sensor", type=int, action="append", dest="sensors",
+                            help="Only refresh this sensor ID (repeatable)")
+        parser.add_argument("--all", action="store_true",
+                            help="Rebuild every rollup from raw readings instead of only dirty ranges")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            count = rebuild_rollups(options["sensors"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {count} sensor(s)"))
+        else:
+            count = refresh_rollups(options["sensors"])
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {count} dirty hour(s)"))
@@ -0,0 +1,19 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from sensors.writebehind import replay_spool
+
+class Command(BaseCommand):
+    help = "Write readings left in the ingest spool by stopped or crashed workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--spool-dir", default=None,
+                            help="Spool directory (default: SENSORS_INGEST_SPOOL_DIR)")
+
+    def handle(self, *args, **options):
+        directory = options["spool_dir"] or getattr(settings, "SENSORS_INGEST_SPOOL_DIR", None)
+        if not directory or not os.path.isdir(directory):
+            self.stdout.write("No spool directory, nothing to replay")
+            return
+        count = replay_spool(directory)
+        self.stdout.write(self.style.SUCCESS(f"Replayed {count} reading(s)"))
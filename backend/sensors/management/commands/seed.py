@@ -1,16 +1,19 @@
 from django.db import transaction
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from sensors.models import Sensor, Reading
-from django.utils.dateparse import parse_datetime
-import csv
+from sensors.models import Sensor
+from sensors.loader import load_readings_csv, LoadError
 from pathlib import Path
 
 class Command(BaseCommand):
     help = "Seed the database with initial sensors and readings"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", default="seed_data/sensor_readings_wide.csv",
+                            help="Readings CSV to load for the seeded sensors")
+
     def handle(self, *args, **options):        
-        csv_path = Path("seed_data/sensor_readings_wide.csv")
+        csv_path = Path(options["csv"])
 
         if not csv_path.exists():
             self.stdout.write(self.style.ERROR(f"CSV not found: {csv_path}"))
@@ -36,20 +39,10 @@ class Command(BaseCommand):
                     Sensor.objects.get_or_create(name=name, model=model, owner=user)
 
                 # 5000 Readings
-                with csv_path.open() as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        try:
-                            sensor = Sensor.objects.get(name=row["device_id"])
-                        except Sensor.DoesNotExist:
-                            raise CommandError(f"Sensor with name '{row['device_id']}' not found")
-
-                        Reading.objects.create(
-                            timestamp=parse_datetime(row["timestamp"]),
-                            sensor=sensor,
-                            temperature=float(row["temperature"]),
-                            humidity=float(row["humidity"])
-                        )
+                try:
+                    load_readings_csv(csv_path, user)
+                except LoadError as e:
+                    raise CommandError(str(e))
 
                 self.stdout.write(self.style.SUCCESS("Seeding complete"))
 
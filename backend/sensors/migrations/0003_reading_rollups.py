@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0002_alter_reading_timestamp_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupDirtyRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_rollups', to='sensors.sensor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField()),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveBigIntegerField()),
+                ('temperature_sum', models.FloatField()),
+                ('temperature_sumsq', models.FloatField()),
+                ('temperature_min', models.FloatField()),
+                ('temperature_max', models.FloatField()),
+                ('humidity_sum', models.FloatField()),
+                ('humidity_sumsq', models.FloatField()),
+                ('humidity_min', models.FloatField()),
+                ('humidity_max', models.FloatField()),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='sensors.sensor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='rollupdirtyrange',
+            constraint=models.UniqueConstraint(fields=('sensor', 'bucket'), name='unique_dirty_sensor_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='readingrollup',
+            constraint=models.UniqueConstraint(fields=('sensor', 'resolution', 'bucket'), name='unique_sensor_resolution_bucket'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0003_reading_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('downsampled_until', models.DateTimeField()),
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_state', to='sensors.sensor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_days', models.PositiveIntegerField()),
+                ('downsample_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('sensor', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to='sensors.sensor')),
+            ],
+        ),
+    ]
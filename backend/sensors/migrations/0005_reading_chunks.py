@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0004_retention_policies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='sensors.sensor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='readingchunk',
+            constraint=models.UniqueConstraint(fields=('sensor', 'window_start'), name='unique_sensor_chunk_window'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_latest(apps, schema_editor):
+    Sensor = apps.get_model('sensors', 'Sensor')
+    Reading = apps.get_model('sensors', 'Reading')
+    SensorLatestReading = apps.get_model('sensors', 'SensorLatestReading')
+    # One index lookup per sensor on (sensor, timestamp) instead of scanning all readings
+    for sensor_id in Sensor.objects.values_list('id', flat=True).iterator():
+        reading = Reading.objects.filter(sensor_id=sensor_id).order_by('-timestamp').first()
+        if reading is not None:
+            SensorLatestReading.objects.create(
+                sensor_id=sensor_id,
+                timestamp=reading.timestamp,
+                temperature=reading.temperature,
+                humidity=reading.humidity,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0005_reading_chunks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorLatestReading',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_reading', serialize=False, to='sensors.sensor')),
+                ('timestamp', models.DateTimeField()),
+                ('temperature', models.FloatField()),
+                ('humidity', models.FloatField()),
+            ],
+        ),
+        migrations.RunPython(backfill_latest, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Trigram indexes serve LIKE '%q%' and LIKE 'q%' alike. Django compiles contains/startswith
+# to `column::text LIKE` and their case-insensitive variants to `UPPER(column::text) LIKE`,
+# so both forms are indexed.
+INDEXES = [
+    ('sensors_sensor_name_trgm', '("name" gin_trgm_ops)'),
+    ('sensors_sensor_model_trgm', '("model" gin_trgm_ops)'),
+    ('sensors_sensor_name_upper_trgm', '(UPPER("name"::text) gin_trgm_ops)'),
+    ('sensors_sensor_model_upper_trgm', '(UPPER("model"::text) gin_trgm_ops)'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "sensors_sensor" USING gin {expression}')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0006_sensor_latest_reading'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
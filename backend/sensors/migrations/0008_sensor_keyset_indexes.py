@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0007_sensor_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sensor',
+            index=models.Index(fields=['owner', 'id'], name='sensors_sen_owner_i_e62861_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensor',
+            index=models.Index(fields=['owner', 'name', 'id'], name='sensors_sen_owner_i_ad0feb_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0008_sensor_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensor',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
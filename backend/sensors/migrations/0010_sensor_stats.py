@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0009_sensor_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorStats',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='sensors.sensor')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('temperature_mean', models.FloatField(default=0)),
+                ('temperature_m2', models.FloatField(default=0)),
+                ('temperature_min', models.FloatField(null=True)),
+                ('temperature_max', models.FloatField(null=True)),
+                ('temperature_digest', models.BinaryField(default=b'')),
+                ('humidity_mean', models.FloatField(default=0)),
+                ('humidity_m2', models.FloatField(default=0)),
+                ('humidity_min', models.FloatField(null=True)),
+                ('humidity_max', models.FloatField(null=True)),
+                ('humidity_digest', models.BinaryField(default=b'')),
+                ('stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
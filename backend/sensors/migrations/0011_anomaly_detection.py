@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0010_sensor_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyState',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='anomaly_state', serialize=False, to='sensors.sensor')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('last_timestamp', models.DateTimeField(null=True)),
+                ('temperature_mean', models.FloatField(default=0)),
+                ('temperature_var', models.FloatField(default=0)),
+                ('humidity_mean', models.FloatField(default=0)),
+                ('humidity_var', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnomalyFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('field', models.CharField(max_length=20)),
+                ('value', models.FloatField()),
+                ('expected', models.FloatField()),
+                ('score', models.FloatField()),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='sensors.sensor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sensor', 'timestamp'], name='sensors_ano_sensor__df436d_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='anomalyflag',
+            constraint=models.UniqueConstraint(fields=('sensor', 'timestamp', 'field'), name='unique_sensor_anomaly'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0011_anomaly_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readingchunk',
+            name='downsampled_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_data_versions(apps, schema_editor):
+    Sensor = apps.get_model('sensors', 'Sensor')
+    SensorDataVersion = apps.get_model('sensors', 'SensorDataVersion')
+    SensorDataVersion.objects.bulk_create(
+        SensorDataVersion(sensor_id=sensor_id, version=version)
+        for sensor_id, version in Sensor.objects.filter(data_version__gt=0).values_list('id', 'data_version').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0012_reading_chunk_downsampled_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorDataVersion',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_version', serialize=False, to='sensors.sensor')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(copy_data_versions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='sensor',
+            name='data_version',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:27
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+def drop_extra_default_policies(apps, schema_editor):
+    # Retention applied the default policy with the lowest ID; the others never took effect
+    RetentionPolicy = apps.get_model('sensors', 'RetentionPolicy')
+    defaults = RetentionPolicy.objects.filter(sensor__isnull=True).order_by('id')
+    first = defaults.values_list('id', flat=True).first()
+    if first is not None:
+        defaults.exclude(id=first).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0013_sensor_data_version_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_extra_default_policies, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='retentionpolicy',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('sensor', 0), condition=models.Q(('sensor__isnull', True)), name='unique_default_retention_policy'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # backend/sensors/models.py
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
@@ -18,6 +19,8 @@ class Sensor(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['owner']),
+            models.Index(fields=['owner', 'id']),
+            models.Index(fields=['owner', 'name', 'id']),
             models.Index(fields=['name']),
             models.Index(fields=['model']),
         ]
@@ -37,4 +40,183 @@ class Reading(models.Model):
         ]
         constraints = [
             models.UniqueConstraint(fields=['sensor', 'timestamp'], name='unique_sensor_timestamp')
-        ]
\ No newline at end of file
+        ]
+
+class ReadingRollup(models.Model):
+    """
+    Pre-aggregated readings of one sensor over one time bucket.
+    Mean and variance derive from count, sum and sum of squares.
+    """
+    HOUR = 3600
+    DAY = 86400
+
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name='rollups')
+    resolution = models.PositiveIntegerField()  # bucket width in seconds
+    bucket = models.DateTimeField()
+    count = models.PositiveBigIntegerField()
+    temperature_sum = models.FloatField()
+    temperature_sumsq = models.FloatField()
+    temperature_min = models.FloatField()
+    temperature_max = models.FloatField()
+    humidity_sum = models.FloatField()
+    humidity_sumsq = models.FloatField()
+    humidity_min = models.FloatField()
+    humidity_max = models.FloatField()
+
+    def __str__(self):
+        return f"{self.sensor_id} rollup at {self.bucket} ({self.resolution}s)"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sensor', 'resolution', 'bucket'], name='unique_sensor_resolution_bucket')
+        ]
+
+class RollupDirtyRange(models.Model):
+    """
+    Hour of a sensor's readings whose rollups must be recomputed from raw rows,
+    e.g. after readings were overwritten or bulk loaded.
+    """
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name='dirty_rollups')
+    bucket = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sensor', 'bucket'], name='unique_dirty_sensor_bucket')
+        ]
+
+class RetentionPolicy(models.Model):
+    """
+    How long raw readings are kept. Without a sensor it is the default for all sensors.
+    Older readings are deleted, or replaced by one averaged reading per
+    `downsample_seconds` bucket when set.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, null=True, blank=True, related_name='retention_policy')
+    raw_days = models.PositiveIntegerField()
+    downsample_seconds = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # At most one default policy
+            models.UniqueConstraint(
+                Coalesce('sensor', 0), condition=models.Q(sensor__isnull=True), name='unique_default_retention_policy'
+            )
+        ]
+
+    def __str__(self):
+        target = self.sensor or "all sensors"
+        return f"Keep raw readings of {target} for {self.raw_days} days"
+
+class RetentionState(models.Model):
+    """
+    Point up to which a sensor's readings have already been downsampled.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, related_name='retention_state')
+    downsampled_until = models.DateTimeField()
+
+class ReadingChunk(models.Model):
+    """
+    Readings of one sensor over one time window, packed into a compressed blob
+    (see sensors/coldstorage.py) in place of individual `Reading` rows.
+    """
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name='chunks')
+    window_start = models.DateTimeField()
+    first_timestamp = models.DateTimeField()
+    last_timestamp = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    # Readings before this time were already downsampled by retention
+    downsampled_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.sensor_id} chunk from {self.window_start} ({self.count} readings)"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sensor', 'window_start'], name='unique_sensor_chunk_window')
+        ]
+
+class SensorLatestReading(models.Model):
+    """
+    Newest reading of a sensor, kept up to date on ingest so current values
+    can be listed alongside sensors without touching the readings table.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True, related_name='latest_reading')
+    timestamp = models.DateTimeField()
+    temperature = models.FloatField()
+    humidity = models.FloatField()
+
+    def __str__(self):
+        return f"{self.sensor_id} latest reading at {self.timestamp}"
+
+class SensorDataVersion(models.Model):
+    """
+    Counter bumped whenever a sensor or its readings change; feeds ETags and the response
+    cache. Kept apart from `Sensor` so ingest never writes to the sensors table.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True, related_name='data_version')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.sensor_id} data version {self.version}"
+
+class SensorStats(models.Model):
+    """
+    Running statistics over all readings of a sensor, updated on ingest: count,
+    Welford mean and sum of squared deviations (m2), extremes, and t-digest
+    sketches (see sensors/tdigest.py) for quantiles.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    count = models.PositiveBigIntegerField(default=0)
+    temperature_mean = models.FloatField(default=0)
+    temperature_m2 = models.FloatField(default=0)
+    temperature_min = models.FloatField(null=True)
+    temperature_max = models.FloatField(null=True)
+    temperature_digest = models.BinaryField(default=b"")
+    humidity_mean = models.FloatField(default=0)
+    humidity_m2 = models.FloatField(default=0)
+    humidity_min = models.FloatField(null=True)
+    humidity_max = models.FloatField(null=True)
+    humidity_digest = models.BinaryField(default=b"")
+    # Set when readings were overwritten or removed, which cannot be folded out; `rebuild_stats` clears it
+    stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sensor_id} stats over {self.count} readings"
+
+class AnomalyState(models.Model):
+    """
+    State of a sensor's online anomaly detector: exponentially weighted mean and
+    variance per field after `count` readings, the newest at `last_timestamp`.
+    Updated in the transaction of every write, so all worker processes share it.
+    """
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True, related_name='anomaly_state')
+    count = models.PositiveBigIntegerField(default=0)
+    last_timestamp = models.DateTimeField(null=True)
+    temperature_mean = models.FloatField(default=0)
+    temperature_var = models.FloatField(default=0)
+    humidity_mean = models.FloatField(default=0)
+    humidity_var = models.FloatField(default=0)
+
+class AnomalyFlag(models.Model):
+    """
+    Reading value that deviated from its sensor's recent behaviour by more than the
+    configured number of standard deviations.
+    """
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name='anomalies')
+    timestamp = models.DateTimeField()
+    field = models.CharField(max_length=20)
+    value = models.FloatField()
+    expected = models.FloatField()
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"{self.sensor_id} {self.field} anomaly at {self.timestamp}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sensor', 'timestamp']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['sensor', 'timestamp', 'field'], name='unique_sensor_anomaly')
+        ]
@@ -0,0 +1,174 @@
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from .conditional import bump_all_data_versions
+from .models import Reading
+
+TABLE = Reading._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+ID_SEQUENCE = f"{TABLE}_partitioned_id_seq"
+
+def partition_months() -> int:
+    return getattr(settings, "SENSORS_READING_PARTITION_MONTHS", 1)
+
+def add_months(value: datetime, months: int) -> datetime:
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+def partition_start(value: datetime, months: int) -> datetime:
+    """
+    Start of the partition containing `value`; partitions of `months` months are aligned to January.
+    """
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month - (value.month - 1) % months, 1, tzinfo=dt_timezone.utc)
+
+def partition_name(start: datetime) -> str:
+    return f"{TABLE}_p{start:%Y_%m}"
+
+def partition_ranges(first: datetime, last: datetime, months: int):
+    """
+    (name, start, end) of every partition needed to cover [first, last].
+    """
+    start = partition_start(first, months)
+    while start <= last:
+        end = add_months(start, months)
+        yield partition_name(start), start, end
+        start = end
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+def convert_sql(legacy: str) -> list:
+    """
+    Statements turning `sensors_reading` into a table partitioned by range of timestamp.
+    The old table is renamed to `legacy` (with its indexes and constraints) so the new
+    one can take over every name Django knows about. The primary key becomes (id, timestamp),
+    as PostgreSQL requires the partition key in every unique constraint; Django still treats
+    `id` as the primary key and the `unique_sensor_timestamp` constraint is unchanged.
+    """
+    index = Reading._meta.indexes[0].name
+    return [
+        f"ALTER TABLE {TABLE} RENAME TO {legacy}",
+        f"ALTER TABLE {legacy} RENAME CONSTRAINT {TABLE}_pkey TO {legacy}_pkey",
+        f"ALTER TABLE {legacy} RENAME CONSTRAINT unique_sensor_timestamp TO {legacy}_unique_sensor_timestamp",
+        f"ALTER INDEX {index} RENAME TO {legacy}_sensor_timestamp_idx",
+        # Partitioned tables cannot have identity columns before PostgreSQL 17
+        f"CREATE SEQUENCE {ID_SEQUENCE}",
+        f"CREATE TABLE {TABLE} ("
+        f"id bigint NOT NULL DEFAULT nextval('{ID_SEQUENCE}'), "
+        f"temperature double precision NOT NULL, "
+        f"humidity double precision NOT NULL, "
+        f"timestamp timestamp with time zone NOT NULL, "
+        f"sensor_id bigint NOT NULL REFERENCES sensors_sensor (id) DEFERRABLE INITIALLY DEFERRED, "
+        f"CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, timestamp), "
+        f"CONSTRAINT unique_sensor_timestamp UNIQUE (sensor_id, timestamp)"
+        f") PARTITION BY RANGE (timestamp)",
+        f"ALTER SEQUENCE {ID_SEQUENCE} OWNED BY {TABLE}.id",
+        f"CREATE INDEX {index} ON {TABLE} (sensor_id, timestamp)",
+        f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT",
+    ]
+
+def create_partition_sql(name: str, start: datetime, end: datetime) -> list:
+    """
+    Statements adding one partition. Rows already parked in the default partition for
+    that range are moved into it first, otherwise PostgreSQL refuses to attach it.
+    """
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    return [
+        f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)",
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE timestamp >= '{start.isoformat()}' AND timestamp < '{end.isoformat()}' RETURNING *) "
+        f"INSERT INTO {name} (id, temperature, humidity, timestamp, sensor_id) "
+        f"SELECT id, temperature, humidity, timestamp, sensor_id FROM moved",
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}",
+    ]
+
+def list_partitions() -> list:
+    """
+    (name, bound expression) of every partition of the readings table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+            [TABLE],
+        )
+        return cursor.fetchall()
+
+def convert(keep_legacy: bool = False, ahead: int = 3) -> int:
+    """
+    Convert the readings table into a partitioned one and copy existing rows over, in one
+    transaction. Returns the number of rows copied.
+    """
+    months = partition_months()
+    legacy = f"{TABLE}_legacy"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(timestamp), max(timestamp), max(id) FROM {TABLE}")
+        first, last, max_id = cursor.fetchone()
+        for statement in convert_sql(legacy):
+            cursor.execute(statement)
+
+        now = datetime.now(dt_timezone.utc)
+        first = min(first or now, now)
+        last = max(last or now, add_months(now, ahead * months))
+        for name, start, end in partition_ranges(first, last, months):
+            cursor.execute(
+                f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+
+        cursor.execute(
+            f"INSERT INTO {TABLE} (id, temperature, humidity, timestamp, sensor_id) "
+            f"SELECT id, temperature, humidity, timestamp, sensor_id FROM {legacy}"
+        )
+        copied = cursor.rowcount
+        cursor.execute("SELECT setval(%s, %s, false)", [ID_SEQUENCE, (max_id or 0) + 1])
+        if not keep_legacy:
+            cursor.execute(f"DROP TABLE {legacy}")
+    return copied
+
+def ensure_partitions(ahead: int) -> list:
+    """
+    Create missing partitions from the current one up to `ahead` partitions into the future.
+    Returns the names of created partitions.
+    """
+    months = partition_months()
+    existing = {name for name, _ in list_partitions()}
+    now = datetime.now(dt_timezone.utc)
+    created = []
+    for name, start, end in partition_ranges(now, add_months(now, ahead * months), months):
+        if name in existing:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            for statement in create_partition_sql(name, start, end):
+                cursor.execute(statement)
+        created.append(name)
+    return created
+
+def expire_partitions(retain: int, drop: bool = False) -> list:
+    """
+    Detach (and with `drop`, drop) partitions ending before the start of the partition
+    `retain` periods back from the current one. Returns the affected partition names.
+    """
+    months = partition_months()
+    cutoff = add_months(partition_start(datetime.now(dt_timezone.utc), months), -retain * months)
+    expired = []
+    for name, _ in list_partitions():
+        if name == DEFAULT_PARTITION:
+            continue
+        start = datetime.strptime(name.rsplit("_p", 1)[1], "%Y_%m").replace(tzinfo=dt_timezone.utc)
+        if add_months(start, months) > cutoff:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            if drop:
+                cursor.execute(f"DROP TABLE {name}")
+        expired.append(name)
+    if expired:
+        bump_all_data_versions()
+    return expired
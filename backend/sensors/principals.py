@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from .cache import SharedCache
+
+# Shared between workers, so deactivating a user takes effect everywhere at once
+user_cache = SharedCache("user", ttl=getattr(settings, "SENSORS_USER_CACHE_TTL", 10))
+
+def get_active_user(user_id):
+    """
+    Resolve the user a token was issued for, from the shared cache when possible.
+    Returns None for unknown or deactivated users.
+    """
+    # Tokens carry the id as a string, model instances as an int
+    user_id = str(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        User = get_user_model()
+        user = User.objects.filter(id=user_id, is_active=True).first()
+        if user is None:
+            return None
+        user_cache.set(user_id, user)
+    return user
+
+async def aget_active_user(user_id):
+    """
+    Async counterpart of `get_active_user` for async views.
+    """
+    user_id = str(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        User = get_user_model()
+        user = await User.objects.filter(id=user_id, is_active=True).afirst()
+        if user is None:
+            return None
+        user_cache.set(user_id, user)
+    return user
+
+def forget_user(user_id):
+    user_cache.delete(str(user_id))
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from .access import owner_cache
+from .models import Sensor
+from .streaming import ReadingJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """
+    Bounded mailbox of one live client, owned by the event loop serving it.
+
+    When the client falls `maxsize` events behind, the oldest are dropped and
+    counted, so a slow client costs bounded memory and learns it missed readings.
+    """
+    def __init__(self, maxsize: int):
+        self.loop = asyncio.get_running_loop()
+        self.events = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.ready = asyncio.Event()
+        # (index, key) the hub filed it under
+        self.topic = None
+
+    def _offer(self, events):
+        # The deque discards the oldest events beyond maxlen itself
+        self.dropped += max(0, len(self.events) + len(events) - self.events.maxlen)
+        self.events.extend(events)
+        self.ready.set()
+
+    def offer(self, events) -> bool:
+        """
+        Hand events to the subscriber's loop from whichever thread committed the readings.
+        Returns False when that loop is gone and the subscription can never be served.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._offer, events)
+        except RuntimeError:
+            return False
+        return True
+
+    async def get(self, timeout: float):
+        """
+        Wait up to `timeout` seconds for events; returns (events, dropped count).
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return [], 0
+        events, dropped = list(self.events), self.dropped
+        self.events.clear()
+        self.dropped = 0
+        self.ready.clear()
+        return events, dropped
+
+class Hub:
+    """
+    In-process fan-out of committed readings to live subscribers by sensor or by owner.
+    Publishing costs nothing while nobody listens. Readings written by other worker
+    processes are not seen.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_sensor = {}
+        self.by_owner = {}
+
+    def subscribe(self, sensor_id=None, owner_id=None, maxsize=None) -> Subscription:
+        subscription = Subscription(maxsize or getattr(settings, "SENSORS_LIVE_QUEUE_SIZE", 1000))
+        index, key = (self.by_sensor, sensor_id) if sensor_id is not None else (self.by_owner, owner_id)
+        subscription.topic = (index, key)
+        with self.lock:
+            index.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        index, key = subscription.topic
+        with self.lock:
+            subscriptions = index.get(key)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del index[key]
+
+    def publish(self, rows):
+        """
+        Deliver (sensor_id, timestamp, temperature, humidity) tuples to their subscribers.
+        Runs after the readings were committed, so it never raises: a failure only
+        costs live clients some events.
+        """
+        try:
+            self._publish(rows)
+        except Exception:
+            logger.exception("Publishing %d reading(s) to live subscribers failed", len(rows))
+
+    def _publish(self, rows):
+        with self.lock:
+            by_sensor = {key: set(subs) for key, subs in self.by_sensor.items()}
+            by_owner = {key: set(subs) for key, subs in self.by_owner.items()}
+        if not by_sensor and not by_owner:
+            return
+
+        events = {}
+        for sensor_id, timestamp, temperature, humidity in rows:
+            events.setdefault(sensor_id, []).append(
+                {"sensor": sensor_id, "temperature": temperature, "humidity": humidity, "timestamp": timestamp}
+            )
+        targets = {}
+        for sensor_id in events.keys() & by_sensor.keys():
+            for subscription in by_sensor[sensor_id]:
+                targets.setdefault(subscription, []).extend(events[sensor_id])
+        if by_owner:
+            for sensor_id, owner_id in self._owners(events.keys()).items():
+                for subscription in by_owner.get(owner_id, ()):
+                    targets.setdefault(subscription, []).extend(events[sensor_id])
+        for subscription, batch in targets.items():
+            if not subscription.offer(batch):
+                # Its loop was closed without closing the stream
+                self.unsubscribe(subscription)
+
+    def _owners(self, sensor_ids) -> dict:
+        owners = owner_cache.get_many(sensor_ids)
+        missing = [sensor_id for sensor_id in sensor_ids if sensor_id not in owners]
+        if missing:
+            for sensor_id, owner_id in Sensor.objects.filter(id__in=missing).values_list("id", "owner_id"):
+                owner_cache.set(sensor_id, owner_id)
+                owners[sensor_id] = owner_id
+        return owners
+
+hub = Hub()
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, cls=ReadingJSONEncoder)}\n\n"
+
+async def event_stream(subscription: Subscription, heartbeat: float, max_age: float):
+    """
+    Serve a subscription as Server-Sent Events: one `readings` event per batch of
+    readings, a `dropped` event with the count of readings a slow client missed, and a
+    comment line every `heartbeat` seconds of silence to keep proxies from timing out.
+
+    Django 4.2 does not notice a client that went away while a response streams, and
+    the server swallows writes to it, so the stream ends by itself after `max_age`
+    seconds. That bounds how long a gone client holds its subscription; EventSource
+    clients reconnect on their own.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    try:
+        yield ": connected\n\n"
+        while (remaining := deadline - loop.time()) > 0:
+            events, dropped = await subscription.get(min(heartbeat, remaining))
+            if dropped:
+                yield format_event("dropped", {"count": dropped})
+            if events:
+                yield format_event("readings", events)
+            elif not dropped:
+                yield ": heartbeat\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+def live_response(subscription: Subscription) -> StreamingHttpResponse:
+    heartbeat = getattr(settings, "SENSORS_LIVE_HEARTBEAT_SECONDS", 15)
+    max_age = getattr(settings, "SENSORS_LIVE_MAX_SECONDS", 300)
+    response = StreamingHttpResponse(
+        event_stream(subscription, heartbeat, max_age), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Keep nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
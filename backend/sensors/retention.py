@@ -0,0 +1,136 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Sensor, Reading, RetentionPolicy, RetentionState
+from .coldstorage import downsample_chunks, expire_chunks
+from .conditional import bump_data_version
+from .latest import rebuild_latest
+from .rollups import bucket_start
+from .stats import mark_stale
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def policies_by_sensor(sensor_ids=None):
+    """
+    Yield (sensor_id, policy) for every sensor a policy applies to; a sensor's own
+    policy wins over the global one.
+    """
+    sensors = Sensor.objects.all()
+    if sensor_ids is not None:
+        sensors = sensors.filter(id__in=sensor_ids)
+    own = {policy.sensor_id: policy for policy in RetentionPolicy.objects.filter(sensor__isnull=False)}
+    default = RetentionPolicy.objects.filter(sensor__isnull=True).first()
+    for sensor_id in sensors.values_list("id", flat=True).order_by("id").iterator():
+        policy = own.get(sensor_id, default)
+        if policy is not None:
+            yield sensor_id, policy
+
+def delete_expired(sensor_id: int, cutoff, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Delete readings older than `cutoff` by primary key, `chunk_size` rows per transaction.
+    """
+    deleted = 0
+    expired = Reading.objects.filter(sensor_id=sensor_id, timestamp__lt=cutoff).order_by("timestamp")
+    while ids := list(expired.values_list("id", flat=True)[:chunk_size]):
+        with transaction.atomic():
+            Reading.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+    return deleted
+
+def _next_window(sensor_id: int, start, cutoff, bucket: int, chunk_size: int):
+    """
+    Up to about `chunk_size` raw rows from `start`, cut at a bucket boundary so no bucket
+    is split across transactions, and the end of the window.
+    """
+    rows = list(
+        Reading.objects.filter(sensor_id=sensor_id, timestamp__gte=start, timestamp__lt=cutoff)
+        .order_by("timestamp")
+        .values_list("id", "timestamp", "temperature", "humidity")[:chunk_size]
+    )
+    if not rows:
+        return [], cutoff
+    if len(rows) < chunk_size:
+        return rows, cutoff
+    end = bucket_start(rows[-1][1], bucket)
+    if end <= rows[0][1]:
+        # One bucket holds more than a chunk: take the whole bucket
+        end = end + timedelta(seconds=bucket)
+        rows = list(
+            Reading.objects.filter(sensor_id=sensor_id, timestamp__gte=start, timestamp__lt=end)
+            .order_by("timestamp")
+            .values_list("id", "timestamp", "temperature", "humidity")
+        )
+        return rows, end
+    return [row for row in rows if row[1] < end], end
+
+def downsample_expired(sensor_id: int, cutoff, bucket: int, chunk_size: int = DEFAULT_CHUNK_SIZE, full: bool = False):
+    """
+    Replace readings older than `cutoff` with one averaged reading per `bucket` seconds,
+    stamped at the bucket start. Each chunk first writes the averages, then deletes the raw
+    rows, in one short transaction. Progress is remembered in `RetentionState`, so later
+    runs only look at readings that expired since; `full` starts from the oldest reading.
+
+    Returns (raw rows removed, downsampled rows written).
+    """
+    cutoff = bucket_start(cutoff, bucket)
+    state = RetentionState.objects.filter(sensor_id=sensor_id).first()
+    start = state.downsampled_until if state and not full else None
+    if start is None:
+        first = Reading.objects.filter(sensor_id=sensor_id).order_by("timestamp").values_list("timestamp", flat=True).first()
+        if first is None:
+            return 0, 0
+        start = bucket_start(first, bucket)
+
+    removed = written = 0
+    while start < cutoff:
+        rows, end = _next_window(sensor_id, start, cutoff, bucket, chunk_size)
+        buckets = {}
+        for pk, timestamp, temperature, humidity in rows:
+            buckets.setdefault(bucket_start(timestamp, bucket), []).append((pk, timestamp, temperature, humidity))
+
+        averaged = []
+        stale = []
+        for bucket_timestamp, members in buckets.items():
+            averaged.append(Reading(
+                sensor_id=sensor_id,
+                timestamp=bucket_timestamp,
+                temperature=sum(m[2] for m in members) / len(members),
+                humidity=sum(m[3] for m in members) / len(members),
+            ))
+            # The reading stamped at the bucket start, if any, is overwritten by the average
+            stale += [m[0] for m in members if m[1] != bucket_timestamp]
+
+        with transaction.atomic():
+            Reading.objects.bulk_create(
+                averaged,
+                update_conflicts=True,
+                unique_fields=["sensor", "timestamp"],
+                update_fields=["temperature", "humidity"],
+            )
+            Reading.objects.filter(id__in=stale).delete()
+            RetentionState.objects.update_or_create(sensor_id=sensor_id, defaults={"downsampled_until": end})
+        removed += len(rows)
+        written += len(averaged)
+        start = end
+    return removed, written
+
+def apply_retention(sensor_ids=None, chunk_size: int = DEFAULT_CHUNK_SIZE, full: bool = False, now=None):
+    """
+    Enforce retention policies on raw rows and compacted chunks alike.
+    Yields (sensor_id, readings removed, downsampled readings written).
+    """
+    now = now or timezone.now()
+    for sensor_id, policy in policies_by_sensor(sensor_ids):
+        cutoff = now - timedelta(days=policy.raw_days)
+        if policy.downsample_seconds:
+            removed, written = downsample_expired(sensor_id, cutoff, policy.downsample_seconds, chunk_size, full)
+            cold_removed, cold_written = downsample_chunks(sensor_id, cutoff, policy.downsample_seconds)
+        else:
+            removed, written = delete_expired(sensor_id, cutoff, chunk_size), 0
+            cold_removed, cold_written = expire_chunks(sensor_id, cutoff), 0
+        removed, written = removed + cold_removed, written + cold_written
+        if removed or written:
+            bump_data_version([sensor_id])
+            mark_stale([sensor_id])
+            rebuild_latest([sensor_id])
+        yield sensor_id, removed, written
@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import connection, transaction
+from django.db.models import Max, Min, Sum
+from django.db.models.functions import Trunc
+from .models import Sensor, Reading, ReadingRollup, RollupDirtyRange
+from .streaming import READING_COLUMNS, iter_values
+
+HOUR = ReadingRollup.HOUR
+DAY = ReadingRollup.DAY
+RESOLUTIONS = (HOUR, DAY)
+
+FIELDS = ("temperature", "humidity")
+ROLLUP_COLUMNS = (
+    "count",
+    "temperature_sum", "temperature_sumsq", "temperature_min", "temperature_max",
+    "humidity_sum", "humidity_sumsq", "humidity_min", "humidity_max",
+)
+
+# Rows per INSERT statement, keeping well under SQLite's bound parameter limit
+UPSERT_BATCH_SIZE = 500
+
+def bucket_start(timestamp, resolution: int):
+    """
+    Start of the UTC-aligned bucket of `resolution` seconds containing `timestamp`.
+    """
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % resolution, tz=dt_timezone.utc)
+
+def summarize(rows, resolutions=RESOLUTIONS) -> dict:
+    """
+    Fold (sensor_id, timestamp, temperature, humidity) tuples into rollup deltas
+    keyed by (sensor_id, resolution, bucket).
+    """
+    deltas = {}
+    for sensor_id, timestamp, temperature, humidity in rows:
+        for resolution in resolutions:
+            key = (sensor_id, resolution, bucket_start(timestamp, resolution))
+            d = deltas.get(key)
+            if d is None:
+                deltas[key] = [
+                    1,
+                    temperature, temperature * temperature, temperature, temperature,
+                    humidity, humidity * humidity, humidity, humidity,
+                ]
+                continue
+            d[0] += 1
+            for offset, value in ((1, temperature), (5, humidity)):
+                d[offset] += value
+                d[offset + 1] += value * value
+                d[offset + 2] = min(d[offset + 2], value)
+                d[offset + 3] = max(d[offset + 3], value)
+    return deltas
+
+def _upsert_sql(rows: int) -> str:
+    qn = connection.ops.quote_name
+    least, greatest = ("LEAST", "GREATEST") if connection.vendor == "postgresql" else ("MIN", "MAX")
+    table = qn(ReadingRollup._meta.db_table)
+    columns = ("sensor_id", "resolution", "bucket") + ROLLUP_COLUMNS
+    assignments = []
+    for column in ROLLUP_COLUMNS:
+        current, new = f"{table}.{qn(column)}", f"EXCLUDED.{qn(column)}"
+        if column.endswith("_min"):
+            assignments.append(f"{qn(column)} = {least}({current}, {new})")
+        elif column.endswith("_max"):
+            assignments.append(f"{qn(column)} = {greatest}({current}, {new})")
+        else:
+            assignments.append(f"{qn(column)} = {current} + {new}")
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * rows)
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES {placeholders} "
+        f"ON CONFLICT ({qn('sensor_id')}, {qn('resolution')}, {qn('bucket')}) "
+        f"DO UPDATE SET {', '.join(assignments)}"
+    )
+
+def apply_rollups(rows):
+    """
+    Add newly inserted readings to the hourly and daily rollups, merging into existing
+    buckets with a single INSERT ... ON CONFLICT DO UPDATE per batch of buckets.
+    """
+    deltas = list(summarize(rows).items())
+    bucket_field = ReadingRollup._meta.get_field("bucket")
+    with connection.cursor() as cursor:
+        for i in range(0, len(deltas), UPSERT_BATCH_SIZE):
+            batch = deltas[i:i + UPSERT_BATCH_SIZE]
+            params = []
+            for (sensor_id, resolution, bucket), values in batch:
+                params += [sensor_id, resolution, bucket_field.get_db_prep_value(bucket, connection), *values]
+            cursor.execute(_upsert_sql(len(batch)), params)
+
+def mark_dirty(keys):
+    """
+    Flag the hours containing the given (sensor_id, timestamp) pairs for `refresh_rollups`.
+    Used where readings changed in ways that cannot be folded in incrementally.
+    """
+    hours = {(sensor_id, bucket_start(timestamp, HOUR)) for sensor_id, timestamp in keys}
+    # A no-op update rather than DO NOTHING: it locks an existing mark until our commit,
+    # so a refresh cannot claim it before the readings it stands for are visible
+    RollupDirtyRange.objects.bulk_create(
+        [RollupDirtyRange(sensor_id=sensor_id, bucket=bucket) for sensor_id, bucket in hours],
+        update_conflicts=True,
+        unique_fields=["sensor", "bucket"],
+        update_fields=["bucket"],
+    )
+
+def _runs(buckets, step: timedelta):
+    """
+    Collapse sorted bucket starts into contiguous [start, end) ranges.
+    """
+    runs = []
+    for bucket in buckets:
+        if runs and runs[-1][1] == bucket:
+            runs[-1][1] = bucket + step
+        else:
+            runs.append([bucket, bucket + step])
+    return runs
+
+def _rebuild(sensor_id: int, resolution: int, source, column: str, aggregates: dict, start=None, end=None):
+    """
+    Replace the rollups of one sensor at `resolution` within [start, end) (or entirely)
+    with a GROUP BY over `source`, a queryset bucketed on `column`.
+    """
+    if start is not None:
+        source = source.filter(**{f"{column}__gte": start, f"{column}__lt": end})
+    existing = ReadingRollup.objects.filter(sensor_id=sensor_id, resolution=resolution)
+    if start is not None:
+        existing = existing.filter(bucket__gte=start, bucket__lt=end)
+    existing.delete()
+
+    truncate = "hour" if resolution == HOUR else "day"
+    rows = (
+        source.annotate(rollup_bucket=Trunc(column, truncate, tzinfo=dt_timezone.utc))
+        .values("rollup_bucket")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    ReadingRollup.objects.bulk_create(
+        [
+            ReadingRollup(sensor_id=sensor_id, resolution=resolution, bucket=row.pop("rollup_bucket"), **row)
+            for row in rows
+        ],
+        batch_size=UPSERT_BATCH_SIZE,
+    )
+
+def _hourly_aggregates() -> dict:
+    aggregates = {"count": Sum("count")}
+    for field in FIELDS:
+        aggregates[f"{field}_sum"] = Sum(f"{field}_sum")
+        aggregates[f"{field}_sumsq"] = Sum(f"{field}_sumsq")
+        aggregates[f"{field}_min"] = Min(f"{field}_min")
+        aggregates[f"{field}_max"] = Max(f"{field}_max")
+    return aggregates
+
+def rebuild_hours(sensor_id: int, start=None, end=None):
+    """
+    Replace the hourly rollups of one sensor within [start, end) (or entirely) with a
+    pass over its raw and compacted readings.
+    """
+    # coldstorage buckets its windows with `bucket_start`, so it cannot be imported at the top
+    from .coldstorage import cold_rows, merge_rows
+
+    raw = Reading.objects.filter(sensor_id=sensor_id).order_by("timestamp")
+    existing = ReadingRollup.objects.filter(sensor_id=sensor_id, resolution=HOUR)
+    if start is not None:
+        raw = raw.filter(timestamp__gte=start, timestamp__lt=end)
+        existing = existing.filter(bucket__gte=start, bucket__lt=end)
+    existing.delete()
+
+    cold = (row for row in cold_rows(sensor_id, start, end) if end is None or row[4] < end)
+    rows = merge_rows(iter_values(raw, READING_COLUMNS), cold)
+    deltas = summarize(((row[1], row[4], row[2], row[3]) for row in rows), (HOUR,))
+    ReadingRollup.objects.bulk_create(
+        [
+            ReadingRollup(sensor_id=sensor_id, resolution=HOUR, bucket=bucket, **dict(zip(ROLLUP_COLUMNS, values)))
+            for (_, _, bucket), values in deltas.items()
+        ],
+        batch_size=UPSERT_BATCH_SIZE,
+    )
+
+def rebuild_days(sensor_id: int, start=None, end=None):
+    hourly = ReadingRollup.objects.filter(sensor_id=sensor_id, resolution=HOUR)
+    _rebuild(sensor_id, DAY, hourly, "bucket", _hourly_aggregates(), start, end)
+
+def refresh_rollups(sensor_ids=None) -> int:
+    """
+    Recompute the rollups of dirty hours from raw readings, then the days containing them.
+    Returns the number of hours refreshed.
+    """
+    marks = RollupDirtyRange.objects.all()
+    if sensor_ids is not None:
+        marks = marks.filter(sensor_id__in=sensor_ids)
+
+    refreshed = 0
+    for sensor_id in marks.values_list("sensor_id", flat=True).distinct().order_by():
+        with transaction.atomic():
+            # Claim the marks before recomputing: an hour marked from here on gets a new
+            # mark (on PostgreSQL once we commit) that the next refresh picks up
+            dirty = list(
+                RollupDirtyRange.objects.select_for_update()
+                .filter(sensor_id=sensor_id)
+                .order_by("bucket")
+                .values_list("id", "bucket")
+            )
+            RollupDirtyRange.objects.filter(id__in=[pk for pk, _ in dirty]).delete()
+            hours = [bucket for _, bucket in dirty]
+            for start, end in _runs(hours, timedelta(seconds=HOUR)):
+                rebuild_hours(sensor_id, start, end)
+            days = sorted({bucket_start(bucket, DAY) for bucket in hours})
+            for start, end in _runs(days, timedelta(seconds=DAY)):
+                rebuild_days(sensor_id, start, end)
+        refreshed += len(dirty)
+    return refreshed
+
+def rebuild_rollups(sensor_ids=None) -> int:
+    """
+    Recompute all rollups from raw readings. Returns the number of sensors processed.
+    """
+    qs = Sensor.objects.all()
+    if sensor_ids is not None:
+        qs = qs.filter(id__in=sensor_ids)
+    count = 0
+    for sensor_id in qs.values_list("id", flat=True).iterator():
+        with transaction.atomic():
+            # Claimed first, as in `refresh_rollups`
+            RollupDirtyRange.objects.filter(sensor_id=sensor_id).delete()
+            rebuild_hours(sensor_id)
+            rebuild_days(sensor_id)
+        count += 1
+    return count
@@ -0,0 +1,23 @@
+from django.db.models import Q
+
+SEARCH_FIELDS = ("name", "model")
+
+# (mode, ignore_case) -> lookup. On PostgreSQL these compile to LIKE on `field::text`,
+# or on `UPPER(field::text)` when ignoring case, which is exactly what the trigram
+# indexes of migration 0007 cover; elsewhere they fall back to a scan of the owner's sensors.
+SEARCH_LOOKUPS = {
+    ("contains", False): "contains",
+    ("contains", True): "icontains",
+    ("prefix", False): "startswith",
+    ("prefix", True): "istartswith",
+}
+
+def search_filter(q: str, mode: str = "contains", ignore_case: bool = False) -> Q:
+    """
+    Match sensors whose name or model contains (or starts with) `q`.
+    """
+    lookup = SEARCH_LOOKUPS[(mode, ignore_case)]
+    expression = Q()
+    for field in SEARCH_FIELDS:
+        expression |= Q(**{f"{field}__{lookup}": q})
+    return expression
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .access import forget_sensor
+from .models import Sensor
+from .principals import forget_user
+from .timing import instrument
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Any change may deactivate the account or alter what the API sees, so drop the cached copy
+    forget_user(instance.pk)
+
+@receiver([post_save, post_delete], sender=Sensor)
+def invalidate_cached_owner(sender, instance, **kwargs):
+    forget_sensor(instance.pk)
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Lets ServerTimingMiddleware time the queries of every request, whichever thread runs them
+    instrument(connection)
@@ -0,0 +1,115 @@
+import numpy as np
+from django.db import transaction
+from .coldstorage import cold_rows, merge_rows
+from .models import Reading, SensorStats
+from .streaming import READING_COLUMNS, iter_values, iter_chunks
+from .tdigest import TDigest
+
+FIELDS = ("temperature", "humidity")
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Readings folded at once when rebuilding from raw data
+REBUILD_CHUNK_SIZE = 100000
+
+def combine(n_a: int, mean_a: float, m2_a: float, n_b: int, mean_b: float, m2_b: float):
+    """
+    Merge two Welford states (Chan et al.), so a whole batch updates the running
+    mean and m2 in one step without loss of precision.
+    """
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return n, mean, m2
+
+def fold(stats: SensorStats, values: dict):
+    """
+    Add arrays of new `temperature` and `humidity` values to `stats` in place.
+    """
+    n_b = len(values["temperature"])
+    if not n_b:
+        return
+    for field in FIELDS:
+        column = np.asarray(values[field], dtype=np.float64)
+        mean_b = float(column.mean())
+        m2_b = float(((column - mean_b) ** 2).sum())
+        _, mean, m2 = combine(stats.count, getattr(stats, f"{field}_mean"), getattr(stats, f"{field}_m2"), n_b, mean_b, m2_b)
+        setattr(stats, f"{field}_mean", mean)
+        setattr(stats, f"{field}_m2", m2)
+        low, high = getattr(stats, f"{field}_min"), getattr(stats, f"{field}_max")
+        setattr(stats, f"{field}_min", float(column.min()) if low is None else min(low, float(column.min())))
+        setattr(stats, f"{field}_max", float(column.max()) if high is None else max(high, float(column.max())))
+        digest = TDigest.from_bytes(getattr(stats, f"{field}_digest"))
+        digest.update(column)
+        setattr(stats, f"{field}_digest", digest.to_bytes())
+    stats.count += n_b
+
+UPDATE_FIELDS = ["count", "stale", "updated_at"] + [
+    f"{field}_{part}" for field in FIELDS for part in ("mean", "m2", "min", "max", "digest")
+]
+
+def _locked_stats(sensor_ids) -> dict:
+    # Locked in ID order so that concurrent batches cannot deadlock
+    locked = SensorStats.objects.select_for_update().filter(sensor_id__in=sensor_ids).order_by("sensor_id")
+    stats = {s.sensor_id: s for s in locked}
+    missing = set(sensor_ids) - stats.keys()
+    if missing:
+        SensorStats.objects.bulk_create([SensorStats(sensor_id=sensor_id) for sensor_id in missing], ignore_conflicts=True)
+        stats.update({s.sensor_id: s for s in locked.filter(sensor_id__in=missing)})
+    return stats
+
+def apply_stats(rows):
+    """
+    Fold newly inserted (sensor_id, timestamp, temperature, humidity) tuples into the
+    sensors' running statistics. Must run inside the writing transaction.
+    """
+    values = {}
+    for sensor_id, _, temperature, humidity in rows:
+        columns = values.setdefault(sensor_id, {"temperature": [], "humidity": []})
+        columns["temperature"].append(temperature)
+        columns["humidity"].append(humidity)
+    if not values:
+        return
+    stats = _locked_stats(sorted(values))
+    for sensor_id, columns in values.items():
+        fold(stats[sensor_id], columns)
+    SensorStats.objects.bulk_update(list(stats.values()), UPDATE_FIELDS)
+
+def mark_stale(sensor_ids):
+    SensorStats.objects.filter(sensor_id__in=set(sensor_ids)).update(stale=True)
+
+def rebuild_stats(sensor_ids) -> int:
+    """
+    Recompute the statistics of the given sensors from their raw and compacted
+    readings, holding the stats row lock so concurrent ingest cannot be lost.
+    Returns the number of readings read.
+    """
+    total = 0
+    for sensor_id in sensor_ids:
+        with transaction.atomic():
+            _locked_stats([sensor_id])
+            stats = SensorStats(sensor_id=sensor_id)
+            qs = Reading.objects.filter(sensor_id=sensor_id).order_by("timestamp")
+            rows = merge_rows(iter_values(qs, READING_COLUMNS), cold_rows(sensor_id))
+            for chunk in iter_chunks(rows, REBUILD_CHUNK_SIZE):
+                fold(stats, {
+                    "temperature": [row[2] for row in chunk],
+                    "humidity": [row[3] for row in chunk],
+                })
+            stats.save()
+        total += stats.count
+    return total
+
+def describe(stats: SensorStats, field: str) -> dict:
+    count = stats.count
+    digest = TDigest.from_bytes(getattr(stats, f"{field}_digest"))
+    return {
+        "mean": getattr(stats, f"{field}_mean") if count else None,
+        # Sample standard deviation
+        "std": float(np.sqrt(getattr(stats, f"{field}_m2") / (count - 1))) if count > 1 else None,
+        "min": getattr(stats, f"{field}_min"),
+        "max": getattr(stats, f"{field}_max"),
+        **{f"p{int(q * 100)}": digest.quantile(q) for q in QUANTILES},
+    }
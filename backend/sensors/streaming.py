@@ -0,0 +1,102 @@
+import csv
+import datetime
+import json
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+STREAM_CHUNK_SIZE = 2000
+
+EXPORT_CHUNK_SIZE = 5000
+
+# Keys of `ReadingSchema`, paired with the columns they are read from
+READING_KEYS = ("id", "sensor", "temperature", "humidity", "timestamp")
+READING_COLUMNS = ("id", "sensor_id", "temperature", "humidity", "timestamp")
+
+class ReadingJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder that keeps datetimes to the microsecond instead of cutting them to
+    milliseconds, so timestamps read back compare equal to the stored ones.
+    """
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            r = o.isoformat()
+            if r.endswith("+00:00"):
+                r = r[:-6] + "Z"
+            return r
+        return super().default(o)
+
+def iter_values(qs, columns, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Iterate over a queryset as tuples through a server-side cursor, without building model instances.
+    """
+    return qs.values_list(*columns).iterator(chunk_size=chunk_size)
+
+def iter_chunks(rows, size=STREAM_CHUNK_SIZE):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+def json_array_stream(rows, keys):
+    """
+    Encode tuples as a JSON array of objects, one chunk at a time.
+    """
+    yield "["
+    separator = ""
+    for chunk in iter_chunks(rows):
+        body = ",".join(json.dumps(dict(zip(keys, row)), cls=ReadingJSONEncoder) for row in chunk)
+        yield separator + body
+        separator = ","
+    yield "]"
+
+def stream_readings(rows):
+    """
+    Stream (id, sensor_id, temperature, humidity, timestamp) tuples as the JSON array
+    `List[ReadingSchema]` would produce, keeping memory flat regardless of the number of rows.
+    """
+    return StreamingHttpResponse(json_array_stream(rows, READING_KEYS), content_type="application/json")
+
+def render_readings(rows):
+    """
+    Non-streaming counterpart of `stream_readings`, for short lists such as a page of readings.
+    """
+    return HttpResponse("".join(json_array_stream(rows, READING_KEYS)), content_type="application/json")
+
+# Same layout as seed_data/sensor_readings_wide.csv, so exports can be loaded back
+EXPORT_KEYS = ("timestamp", "device_id", "temperature", "humidity")
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+class Echo:
+    """
+    File-like object whose `write` hands back the value, so csv.writer can be streamed.
+    """
+    def write(self, value):
+        return value
+
+def csv_stream(rows, header):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for chunk in iter_chunks(rows):
+        yield "".join(writer.writerow(row) for row in chunk)
+
+def ndjson_stream(rows, keys):
+    for chunk in iter_chunks(rows):
+        yield "".join(json.dumps(dict(zip(keys, row)), cls=ReadingJSONEncoder) + "\n" for row in chunk)
+
+def export_readings(rows, names, format, filename):
+    """
+    Stream (id, sensor_id, temperature, humidity, timestamp) tuples as a CSV or NDJSON
+    download in constant memory. `names` maps sensor IDs to the device names written out.
+    """
+    rows = ((timestamp, names[sensor_id], temperature, humidity) for _, sensor_id, temperature, humidity, timestamp in rows)
+    if format == "csv":
+        content = csv_stream(rows, EXPORT_KEYS)
+    else:
+        content = ndjson_stream(rows, EXPORT_KEYS)
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{format}"'
+    return response
@@ -0,0 +1,102 @@
+import re
+from datetime import timedelta
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from .ingest import write_readings
+from .models import Sensor
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+SENSOR_MODELS = ("EnviroSense", "ClimaTrack", "AeroMonitor", "HydroTherm", "EcoStat")
+
+def parse_duration(value: str) -> int:
+    """
+    Parse durations like "1s", "5m" or "1h" into seconds.
+    """
+    match = re.fullmatch(r"(\d+)([smhd])", value.strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid duration '{value}', expected e.g. 1s, 5m, 1h or 1d")
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+def create_fleet(users: int, sensors: int, prefix: str = "loadtest", password: str = "loadtest"):
+    """
+    Create `users` users and spread `sensors` sensors over them round-robin.
+    Returns the created sensors in creation order.
+    """
+    User = get_user_model()
+    # Hash once: every generated user shares the password
+    password_hash = make_password(password)
+    owners = User.objects.bulk_create(
+        [User(username=f"{prefix}-user-{i:05d}", password=password_hash) for i in range(users)]
+    )
+    return Sensor.objects.bulk_create(
+        [
+            Sensor(
+                owner=owners[i % users],
+                name=f"{prefix}-sensor-{i:06d}",
+                model=SENSOR_MODELS[i % len(SENSOR_MODELS)],
+            )
+            for i in range(sensors)
+        ],
+        batch_size=5000,
+    )
+
+class SensorSignal:
+    """
+    Deterministic temperature/humidity generator for one sensor: a daily cycle,
+    a slow random-walk drift and measurement noise, with humidity moving against
+    temperature. Successive `sample` calls continue the same series.
+    """
+    def __init__(self, seed: int, index: int, step: int):
+        self.rng = np.random.default_rng([seed, index])
+        self.step = step
+        self.offset = 0
+        self.drift = 0.0
+        self.base_temperature = self.rng.uniform(15, 25)
+        self.amplitude = self.rng.uniform(2, 6)
+        self.phase = self.rng.uniform(0, 2 * np.pi)
+        self.base_humidity = self.rng.uniform(40, 70)
+
+    def sample(self, count: int):
+        seconds = (self.offset + np.arange(count)) * self.step
+        self.offset += count
+        daily = np.sin(2 * np.pi * seconds / 86400 + self.phase)
+        drift = self.drift + np.cumsum(self.rng.normal(0, 0.02 * np.sqrt(self.step / 60), count))
+        self.drift = drift[-1]
+        temperature = self.base_temperature + self.amplitude * daily + drift + self.rng.normal(0, 0.15, count)
+        humidity = self.base_humidity - 2.5 * self.amplitude * daily - drift + self.rng.normal(0, 0.8, count)
+        return np.round(temperature, 2), np.round(np.clip(humidity, 0, 100), 2)
+
+def generate_readings(sensor_ids, start, step: int, count: int, seed: int = 0, batch_size: int = 10000, progress=None):
+    """
+    Write `count` readings every `step` seconds from `start` for every sensor, in batches
+    of `batch_size` rows through the bulk write path. Values depend only on `seed`,
+    the sensor's position in `sensor_ids` and the sample index.
+    """
+    totals = {"inserted": 0, "updated": 0, "skipped": 0}
+    batch = []
+
+    def flush():
+        result = write_readings(batch)
+        for key in totals:
+            totals[key] += result[key]
+        batch.clear()
+        if progress:
+            progress(totals)
+
+    delta = timedelta(seconds=step)
+    for index, sensor_id in enumerate(sensor_ids):
+        signal = SensorSignal(seed, index, step)
+        for chunk_start in range(0, count, batch_size):
+            size = min(batch_size, count - chunk_start)
+            temperature, humidity = signal.sample(size)
+            first = start + delta * chunk_start
+            batch.extend(
+                (sensor_id, first + delta * i, t, h)
+                for i, t, h in zip(range(size), temperature.tolist(), humidity.tolist())
+            )
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    return totals
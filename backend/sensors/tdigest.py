@@ -0,0 +1,68 @@
+import numpy as np
+
+DEFAULT_COMPRESSION = 200
+
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl): a sorted list of weighted centroids whose
+    sizes shrink towards the tails, so extreme quantiles stay accurate while the
+    digest holds about `compression / 2` centroids whatever the number of values.
+    """
+    def __init__(self, compression: float = DEFAULT_COMPRESSION, means=None, weights=None):
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype=np.float64)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=np.float64)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """
+        Add raw values, each as a centroid of weight one, and recompress.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self._compress(np.concatenate((self.means, values)), np.concatenate((self.weights, np.ones(len(values)))))
+
+    def merge(self, other: "TDigest"):
+        self._compress(np.concatenate((self.means, other.means)), np.concatenate((self.weights, other.weights)))
+
+    def _k(self, q):
+        # k1 scale function: centroids may span a constant step in k
+        return self.compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+    def _compress(self, means, weights):
+        if len(means) == 0:
+            self.means, self.weights = means, weights
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        # Each centroid may span one unit of k; bin every centroid by the k of its midpoint
+        # quantile, so neighbours falling in the same unit merge (vectorized merging pass)
+        q_mid = (np.cumsum(weights) - weights / 2) / weights.sum()
+        bins = np.floor(self._k(q_mid) - self._k(0)).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float):
+        """
+        Estimate the `q` quantile by interpolating between centroid centers.
+        """
+        if len(self.means) == 0:
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        return float(np.interp(q, centers, self.means))
+
+    def to_bytes(self) -> bytes:
+        return np.concatenate(([len(self.means)], self.means, self.weights)).astype("<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, compression: float = DEFAULT_COMPRESSION) -> "TDigest":
+        if not data:
+            return cls(compression)
+        values = np.frombuffer(bytes(data), dtype="<f8")
+        size = int(values[0])
+        return cls(compression, values[1:1 + size], values[1 + size:1 + 2 * size])
@@ -0,0 +1,153 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Phases reported in the Server-Timing header, in order, besides `db` and `total`
+PHASES = ("auth", "ownership", "serialize")
+
+SLOW_REQUEST_TOP_QUERIES = 10
+
+class RequestTiming:
+    """
+    What one request spent its time on: named phases in seconds and the (sql, seconds)
+    of every query it ran.
+    """
+    def __init__(self):
+        self.started = perf_counter()
+        self.phases = {}
+        self.queries = []
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(duration for _, duration in self.queries)
+
+# Timing of the request being handled; follows the request into sync_to_async threads
+_current: ContextVar = ContextVar("sensors_request_timing", default=None)
+
+def current_timing():
+    return _current.get()
+
+@contextmanager
+def phase(name: str):
+    """
+    Add the time spent in the block to phase `name` of the current request.
+    Does nothing outside the middleware, e.g. in management commands.
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timing.phases[name] = timing.phases.get(name, 0.0) + perf_counter() - started
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing every query run on behalf of a timed request.
+    """
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.queries.append((sql, perf_counter() - started))
+
+def instrument(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+def fingerprint(sql: str) -> str:
+    """
+    Reduce a query to its shape: literals and placeholders become `?` and lists of them,
+    as in IN (...) or multi-row VALUES, collapse to one, so repeats of a query group together.
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _LISTS.sub("?", sql)
+    sql = _ROWS.sub("(?)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+def summarize_queries(queries, top: int = SLOW_REQUEST_TOP_QUERIES) -> list:
+    """
+    (count, seconds, fingerprint) per query shape, slowest first.
+    """
+    counts, seconds = Counter(), Counter()
+    for sql, duration in queries:
+        shape = fingerprint(sql)
+        counts[shape] += 1
+        seconds[shape] += duration
+    return [(counts[shape], total, shape) for shape, total in seconds.most_common(top)]
+
+def server_timing(timing: RequestTiming, total: float) -> str:
+    metrics = [f'db;dur={timing.db_seconds * 1000:.1f};desc="{len(timing.queries)} queries"']
+    metrics += [f"{name};dur={timing.phases[name] * 1000:.1f}" for name in PHASES if name in timing.phases]
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+class ServerTimingMiddleware:
+    """
+    Time each request's queries and phases, report them in a `Server-Timing` header
+    (SENSORS_SERVER_TIMING, by default only with DEBUG, as it tells clients about the
+    server's internals) and log requests slower than SENSORS_SLOW_REQUEST_MS with
+    the shapes of the queries they ran. Bodies of streaming responses are produced
+    after the header is sent and are not included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timing)
+
+    def finish(self, request, response, timing: RequestTiming):
+        total = perf_counter() - timing.started
+        if getattr(settings, "SENSORS_SERVER_TIMING", settings.DEBUG):
+            response["Server-Timing"] = server_timing(timing, total)
+        threshold = getattr(settings, "SENSORS_SLOW_REQUEST_MS", 500)
+        if threshold is not None and total * 1000 >= threshold:
+            queries = "".join(
+                f"\n  {count}x {seconds * 1000:.1f}ms {shape}" for count, seconds, shape in summarize_queries(timing.queries)
+            )
+            logger.warning(
+                "Slow request: %s %s -> %s in %.1fms, %d queries in %.1fms%s",
+                request.method, request.get_full_path(), response.status_code, total * 1000,
+                len(timing.queries), timing.db_seconds * 1000, queries,
+            )
+        return response
@@ -0,0 +1,343 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, connections
+from django.utils.dateparse import parse_datetime
+from .ingest import ON_CONFLICT_IGNORE, as_aware, write_readings
+
+logger = logging.getLogger(__name__)
+
+class BufferFull(Exception):
+    """
+    Raised when readings could not be accepted before the backpressure timeout.
+    """
+
+def encode_rows(rows) -> bytes:
+    return b"".join(
+        json.dumps([sensor_id, as_aware(timestamp).isoformat(), temperature, humidity]).encode() + b"\n"
+        for sensor_id, timestamp, temperature, humidity in rows
+    )
+
+def decode_rows(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            sensor_id, timestamp, temperature, humidity = json.loads(line)
+        except ValueError:
+            # A torn last line from a crash mid-write was never acknowledged
+            continue
+        yield sensor_id, parse_datetime(timestamp), temperature, humidity
+
+class SpoolSegment:
+    """
+    Append-only NDJSON file holding acknowledged but unflushed readings.
+
+    The owning process keeps an exclusive lock on it until every reading in it
+    reached the database; a segment that can be locked belongs to a dead process.
+    """
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, f"{os.getpid()}-{time.time_ns()}.ndjson")
+        self.file = open(self.path, "ab")
+        fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self.unflushed = 0
+        self.retired = False
+
+    def append(self, data: bytes):
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def discard(self):
+        os.unlink(self.path)
+        self.file.close()
+
+REJECTED_DIR = "rejected"
+
+def write_isolating(rows) -> list:
+    """
+    Write (sensor_id, timestamp, temperature, humidity) tuples, skipping existing ones.
+    A batch the database rejects for its data, e.g. readings of a deleted sensor, is split
+    until the offending rows are isolated; those are returned instead of written.
+    Other errors, such as a lost connection, propagate.
+    """
+    try:
+        write_readings(rows, on_conflict=ON_CONFLICT_IGNORE)
+        return []
+    except (DataError, IntegrityError):
+        if len(rows) == 1:
+            return list(rows)
+        middle = len(rows) // 2
+        return write_isolating(rows[:middle]) + write_isolating(rows[middle:])
+
+def set_aside(rows, directory=None):
+    """
+    Keep readings the database will never accept out of the way of the ones it will:
+    they are logged and, with a spool, saved under its `rejected` directory for inspection.
+    """
+    if not rows:
+        return
+    logger.error("Setting aside %d reading(s) the database rejected, e.g. %r", len(rows), rows[0])
+    if directory:
+        rejected = os.path.join(directory, REJECTED_DIR)
+        os.makedirs(rejected, exist_ok=True)
+        with open(os.path.join(rejected, f"{os.getpid()}-{time.time_ns()}.ndjson"), "ab") as file:
+            file.write(encode_rows(rows))
+
+def replay_spool(directory: str) -> int:
+    """
+    Write the readings of segments left behind by dead processes, then remove them.
+    Replays are idempotent: readings already in the database are skipped, and rejected
+    ones are set aside. Returns the number of readings found.
+    """
+    found = 0
+    for path in sorted(glob.glob(os.path.join(directory, "*.ndjson"))):
+        with open(path, "rb") as file:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # still owned by a live process
+            rows = list(decode_rows(file))
+            set_aside(write_isolating(rows), directory)
+            os.unlink(path)
+        found += len(rows)
+    return found
+
+class WriteBehindBuffer:
+    """
+    In-process buffer between ingest endpoints and the database.
+
+    The buffer runs its own event loop in a dedicated thread, so it outlives the
+    per-request loops async views get under WSGI; `submit`, `flush` and `close` may be
+    awaited from any loop. `submit` appends readings to the spool (one fsync for all
+    concurrent submitters) and returns once they are durable; the flusher writes them
+    with `write_readings` when `batch_size` rows are pending or the oldest pending row
+    is `max_delay` seconds old. Rows the database rejects are set aside rather than
+    retried. At most `capacity` rows are held; beyond that submitters wait up to
+    `timeout` seconds for a flush and then get `BufferFull`.
+    Without a spool directory readings are only held in memory.
+    """
+    def __init__(self, batch_size=5000, max_delay=0.2, capacity=100000, timeout=5.0, spool_dir=None):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.capacity = capacity
+        self.timeout = timeout
+        self.spool_dir = spool_dir
+        self.pending = []  # [(segment, rows)]
+        self.pending_rows = 0
+        self.size = 0  # rows held, pending or being flushed
+        self._loop = None
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            batch_size=getattr(settings, "SENSORS_INGEST_BATCH_SIZE", 5000),
+            max_delay=getattr(settings, "SENSORS_INGEST_MAX_DELAY_MS", 200) / 1000,
+            capacity=getattr(settings, "SENSORS_INGEST_BUFFER_CAPACITY", 100000),
+            timeout=getattr(settings, "SENSORS_INGEST_BACKPRESSURE_TIMEOUT", 5.0),
+            spool_dir=getattr(settings, "SENSORS_INGEST_SPOOL_DIR", None),
+        )
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            if self.spool_dir:
+                os.makedirs(self.spool_dir, exist_ok=True)
+            self._segment = SpoolSegment(self.spool_dir) if self.spool_dir else None
+            self._arrived = asyncio.Event()
+            self._full = asyncio.Event()
+            self._space = asyncio.Condition()
+            self._spool_waiters = []
+            self._syncing = False
+            # One thread, hence one database connection, for all writes
+            self._writer = ThreadPoolExecutor(1, thread_name_prefix="ingest-writer")
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._serve, name="ingest-flusher", daemon=True)
+            self._thread.start()
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._run())
+        self._loop.run_forever()
+
+    async def _call(self, coro):
+        """
+        Run `coro` on the flusher's loop and wait for it from the caller's loop.
+        """
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def _write(self, function, *args):
+        def run():
+            close_old_connections()
+            return function(*args)
+        return self._loop.run_in_executor(self._writer, run)
+
+    async def submit(self, rows):
+        """
+        Accept (sensor_id, timestamp, temperature, humidity) tuples, returning once they are durable.
+        """
+        rows = [(sensor_id, as_aware(ts), t, h) for sensor_id, ts, t, h in rows]
+        if not rows:
+            return
+        if len(rows) > self.capacity:
+            raise BufferFull(f"Batch exceeds buffer capacity of {self.capacity} readings")
+        self._ensure_started()
+        await self._call(self._submit(rows))
+
+    async def _submit(self, rows):
+        async with self._space:
+            try:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self.size + len(rows) <= self.capacity), self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise BufferFull("Ingest buffer is full")
+            self.size += len(rows)
+        try:
+            segment = await self._persist(rows)
+        except BaseException:
+            await self._release(len(rows))
+            raise
+        self.pending.append((segment, rows))
+        self.pending_rows += len(rows)
+        self._arrived.set()
+        if self.pending_rows >= self.batch_size:
+            self._full.set()
+
+    async def _persist(self, rows):
+        if self._segment is None:
+            return None
+        future = self._loop.create_future()
+        self._spool_waiters.append((encode_rows(rows), len(rows), future))
+        if not self._syncing:
+            self._syncing = True
+            self._loop.create_task(self._sync_spool())
+        return await future
+
+    async def _sync_spool(self):
+        # Group commit: everything queued while the previous fsync ran goes out in one write
+        try:
+            while self._spool_waiters:
+                waiters, self._spool_waiters = self._spool_waiters, []
+                segment = self._segment
+                count = sum(count for _, count, _ in waiters)
+                # Counted before writing, so a flush cannot discard the segment mid-append
+                segment.unflushed += count
+                try:
+                    await asyncio.to_thread(segment.append, b"".join(data for data, _, _ in waiters))
+                except Exception as e:
+                    segment.unflushed -= count
+                    for _, _, future in waiters:
+                        future.set_exception(e)
+                    continue
+                for _, _, future in waiters:
+                    future.set_result(segment)
+        finally:
+            self._syncing = False
+
+    async def _release(self, count: int):
+        async with self._space:
+            self.size -= count
+            self._space.notify_all()
+
+    async def _run(self):
+        if self.spool_dir:
+            try:
+                await self._write(replay_spool, self.spool_dir)
+            except Exception:
+                # What is left stays in the spool for the next start or `replay_spool`
+                logger.exception("Replaying the ingest spool failed")
+        while True:
+            await self._arrived.wait()
+            # The oldest pending reading waits at most max_delay, less when a batch fills up
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception("Flushing buffered readings failed; retrying")
+                await asyncio.sleep(self.max_delay)
+            if not self.pending:
+                self._arrived.clear()
+
+    async def flush(self):
+        """
+        Write all pending readings now. On failure they stay pending.
+        """
+        if self._loop is not None:
+            await self._call(self._flush())
+
+    async def _flush(self):
+        batches, self.pending = self.pending, []
+        rows = [row for _, batch in batches for row in batch]
+        self.pending_rows -= len(rows)
+        if not rows:
+            return
+        if self._segment is not None and self._segment.unflushed:
+            # Later readings go to a fresh segment, so this one can be removed once written
+            self._segment.retired = True
+            self._segment = SpoolSegment(self.spool_dir)
+        rejected = []
+        try:
+            for i in range(0, len(rows), self.batch_size):
+                rejected += await self._write(write_isolating, rows[i:i + self.batch_size])
+        except BaseException:
+            self.pending = batches + self.pending
+            self.pending_rows += len(rows)
+            raise
+        # Only once the whole flush went through, so a retry cannot set rows aside twice
+        await asyncio.to_thread(set_aside, rejected, self.spool_dir)
+        for segment, batch in batches:
+            if segment is not None:
+                segment.unflushed -= len(batch)
+                if segment.retired and not segment.unflushed:
+                    segment.discard()
+        await self._release(len(rows))
+
+    async def close(self):
+        """
+        Flush what is pending and stop the flusher thread.
+        """
+        if self._loop is None:
+            return
+        await self._call(self._shutdown())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        await asyncio.to_thread(self._thread.join)
+        self._loop.close()
+        self._loop = None
+
+    async def _shutdown(self):
+        await self._flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._segment is not None and not self._segment.unflushed:
+            self._segment.discard()
+        await self._write(connections.close_all)
+        self._writer.shutdown(wait=False)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+def get_ingest_buffer() -> WriteBehindBuffer:
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = WriteBehindBuffer.from_settings()
+        return _buffer
@@ -1,11 +1,29 @@
 import os
 os.environ["NINJA_SKIP_REGISTRY"] = "1"
+from contextlib import contextmanager
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.test import Client
-from ninja.testing import TestClient
+from ninja.testing import TestAsyncClient, TestClient
 from sensors.api import api
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
+from sensors.principals import user_cache
+from sensors.access import owner_cache
+from django.core.cache import caches
+from sensors.timing import summarize_queries
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    In-process caches outlive the per-test database rollback, so start every test cold.
+    """
+    for cache in (user_cache, owner_cache, *caches.all()):
+        cache.clear()
+    yield
+    for cache in (user_cache, owner_cache, *caches.all()):
+        cache.clear()
 
 @pytest.fixture
 def client(db):
@@ -38,4 +56,30 @@ def other_user(db):
     Creates another user, separate from the test user.
     """
     User = get_user_model()
-    return User.objects.create_user(username="otheruser", password="pass")
\ No newline at end of file
+    return User.objects.create_user(username="otheruser", password="pass")
+
+@pytest.fixture
+def async_client(db, user):
+    """
+    Authenticated Ninja Client for async endpoints.
+    """
+    client = TestAsyncClient(api)
+    refresh = RefreshToken.for_user(user)
+    client.headers["Authorization"] = f"Bearer {refresh.access_token}"
+    return client
+
+@pytest.fixture
+def assert_max_queries(db):
+    """
+    Context manager failing the test when its block runs more than `limit` queries.
+    The failure lists the queries grouped by shape, so N+1 patterns stand out.
+    """
+    @contextmanager
+    def check(limit: int):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        queries = [(query["sql"], float(query["time"])) for query in ctx.captured_queries]
+        if len(queries) > limit:
+            shapes = "".join(f"\n  {count}x {shape}" for count, _, shape in summarize_queries(queries, top=None))
+            pytest.fail(f"{len(queries)} queries, expected at most {limit}:{shapes}")
+    return check
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from io import StringIO
+import numpy as np
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from sensors.anomaly import linear_recurrence, score
+from sensors.models import Sensor, AnomalyFlag, AnomalyState
+
+BASE = timezone.make_aware(datetime(2025, 9, 23, 14, 0))
+
+def signal(count, spikes=()):
+    rng = np.random.default_rng(3)
+    values = 20 + rng.normal(0, 0.2, count)
+    for i in spikes:
+        values[i] += 10
+    return values.round(3).tolist()
+
+def test_linear_recurrence_matches_loop():
+    b = np.random.default_rng(4).normal(size=1000)
+    expected, y = [], 1.5
+    for value in b:
+        y = 0.9 * y + value
+        expected.append(y)
+    assert np.allclose(linear_recurrence(0.9, b, 1.5), expected)
+
+def test_score_in_pieces_matches_score_at_once():
+    values = signal(500, spikes=[200, 400])
+    z_all, _, mean_all, var_all = score(values, 0, 0, 0, alpha=0.05, warmup=30)
+
+    z_head, _, mean, var = score(values[:123], 0, 0, 0, alpha=0.05, warmup=30)
+    z_tail, _, mean, var = score(values[123:], mean, var, 123, alpha=0.05, warmup=30)
+    assert np.allclose(np.concatenate((z_head, z_tail)), z_all)
+    assert np.isclose(mean, mean_all) and np.isclose(var, var_all)
+    assert set(np.flatnonzero(np.abs(z_all) > 4)) == {200, 400}
+
+def test_flat_signal_steps_are_not_anomalies():
+    # A constant reading with an occasional step of the sensor's resolution
+    values = [20.0] * 100
+    for i in (40, 60, 80):
+        values[i] = 20.1
+    values[90] = 30.0
+
+    z, _, _, _ = score(values, 0, 0, 0, alpha=0.5, warmup=30)
+    assert {60, 80} < set(np.flatnonzero(np.abs(z) > 4))
+    z, _, _, _ = score(values, 0, 0, 0, alpha=0.5, warmup=30, min_std=0.1)
+    assert set(np.flatnonzero(np.abs(z) > 4)) == {90}
+
+def test_ingest_flags_spikes(auth_client, user):
+    sensor = Sensor.objects.create(name="Anom_001", model="TestSensor", owner=user)
+    values = signal(100, spikes=[60])
+    payload = [
+        {"temperature": v, "humidity": 50.0, "timestamp": (BASE + timedelta(minutes=i)).isoformat()}
+        for i, v in enumerate(values)
+    ]
+    # Batches and single readings share the detector state
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload[:59])
+    auth_client.post(f"/sensors/{sensor.id}/readings", json=payload[59])
+    auth_client.post(f"/sensors/{sensor.id}/readings", json=payload[60])
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload[61:])
+
+    response = auth_client.get(f"/sensors/{sensor.id}/anomalies")
+    assert response.status_code == 200
+    flags = response.json()
+    assert [(flag["field"], flag["value"]) for flag in flags] == [("temperature", values[60])]
+    assert flags[0]["score"] > 4
+    assert abs(flags[0]["expected"] - 20) < 1
+
+    assert auth_client.get(f"/sensors/{sensor.id}/anomalies?field=humidity").json() == []
+    assert auth_client.get(
+        f"/sensors/{sensor.id}/anomalies?timestamp_from=2025-09-23T15:01:00"
+    ).json() == []
+
+def test_detector_state_is_shared_between_workers(auth_client, user):
+    sensor = Sensor.objects.create(name="Anom_002", model="TestSensor", owner=user)
+    for i, value in enumerate(signal(25)):
+        auth_client.post(f"/sensors/{sensor.id}/readings",
+                         json={"temperature": value, "humidity": 50.0, "timestamp": (BASE + timedelta(minutes=i)).isoformat()})
+    assert AnomalyState.objects.get(sensor=sensor).count == 25
+
+    # Another worker moved the detector on; this one continues from its state
+    AnomalyState.objects.filter(sensor=sensor).update(count=100, temperature_mean=30.0)
+    auth_client.post(f"/sensors/{sensor.id}/readings",
+                     json={"temperature": 30.0, "humidity": 50.0, "timestamp": (BASE + timedelta(hours=1)).isoformat()})
+    state = AnomalyState.objects.get(sensor=sensor)
+    assert (state.count, state.temperature_mean) == (101, pytest.approx(30.0))
+    assert not AnomalyFlag.objects.filter(sensor=sensor, field="temperature").exists()
+
+def test_backfill_matches_online_detection(auth_client, user):
+    sensor = Sensor.objects.create(name="Anom_003", model="TestSensor", owner=user)
+    values = signal(300, spikes=[100, 250])
+    payload = [
+        {"temperature": v, "humidity": 50.0, "timestamp": (BASE + timedelta(minutes=i)).isoformat()}
+        for i, v in enumerate(values)
+    ]
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+    online = list(AnomalyFlag.objects.filter(sensor=sensor).order_by("timestamp").values_list("timestamp", "score"))
+    assert len(online) == 2
+
+    AnomalyFlag.objects.all().delete()
+    out = StringIO()
+    call_command("backfill_anomalies", "--sensor", str(sensor.id), "--chunk-size", "70", stdout=out)
+    assert "Scored 300 readings, flagged 2 anomalies" in out.getvalue()
+    backfilled = list(AnomalyFlag.objects.filter(sensor=sensor).order_by("timestamp").values_list("timestamp", "score"))
+    assert [ts for ts, _ in backfilled] == [ts for ts, _ in online]
+    assert np.allclose([s for _, s in backfilled], [s for _, s in online])
+
+def test_user_cannot_list_others_sensor_anomalies(auth_client, other_user):
+    other_sensor = Sensor.objects.create(name="Anom_004", model="TestSensor", owner=other_user)
+    assert auth_client.get(f"/sensors/{other_sensor.id}/anomalies").status_code == 403
@@ -17,3 +17,21 @@ def test_login(client, django_user_model):
     assert response.status_code == 200
     assert "access" in response.json()
 
+
+def test_authenticated_user_is_cached(auth_client, user, django_assert_num_queries):
+    auth_client.get("/sensors")
+    with django_assert_num_queries(2):
+        # Count and page of sensors only, no user lookup
+        response = auth_client.get("/sensors")
+    assert response.status_code == 200
+
+def test_deactivated_user_is_rejected(auth_client, user):
+    assert auth_client.get("/sensors").status_code == 200
+    user.is_active = False
+    user.save()
+    assert auth_client.get("/sensors").status_code == 401
+
+def test_deleted_user_is_rejected(auth_client, user):
+    assert auth_client.get("/sensors").status_code == 200
+    user.delete()
+    assert auth_client.get("/sensors").status_code == 401
@@ -0,0 +1,13 @@
+from sensors.benchmarks import build_dataset, compare, run_benchmarks
+
+def test_run_benchmarks(db):
+    dataset = build_dataset(sensors=3, readings=50, step=60)
+    results = run_benchmarks(dataset, iterations=2)
+    assert {"create_reading", "list_readings_full_range", "list_sensors_search", "jwt_auth_cached"} <= results.keys()
+    assert all(r["ops"] > 0 and r["p50_ms"] >= 0 for r in results.values())
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"fast": {"p50_ms": 10.0}, "slow": {"p50_ms": 10.0}}}
+    current = {"results": {"fast": {"p50_ms": 10.5}, "slow": {"p50_ms": 20.0}, "new": {"p50_ms": 1.0}}}
+    rows = {name: regressed for name, _, _, _, regressed in compare(current, baseline, threshold=0.2)}
+    assert rows == {"fast": False, "slow": True}
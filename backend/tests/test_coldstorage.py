@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+import numpy as np
+import pytest
+from django.core.management import call_command
+from sensors.api import api
+from sensors.coldstorage import compact_sensor, decode_chunk, encode_chunk
+from sensors.models import Sensor, Reading, ReadingChunk, SensorLatestReading
+
+START = datetime(2025, 9, 1, tzinfo=dt_timezone.utc)
+DAY = 86400
+
+def create_minutely(sensor, start, minutes):
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=20 + (i % 7) * 0.1, humidity=50 + (i % 3), timestamp=start + timedelta(minutes=i))
+        for i in range(minutes)
+    )
+
+def strip_ids(readings):
+    return [{key: value for key, value in reading.items() if key != "id"} for reading in readings]
+
+def test_chunk_codec_round_trip_is_lossless():
+    rng = np.random.default_rng(1)
+    timestamps = np.cumsum(rng.integers(1, 120_000_000, 1000))
+    temperature = rng.normal(20, 5, 1000)
+    humidity = rng.uniform(0, 100, 1000)
+
+    decoded = decode_chunk(encode_chunk(timestamps, temperature, humidity))
+    assert np.array_equal(decoded[0], timestamps)
+    assert np.array_equal(decoded[1], temperature)
+    assert np.array_equal(decoded[2], humidity)
+
+def test_chunk_codec_compresses_regular_series():
+    timestamps = np.arange(1440, dtype=np.int64) * 60_000_000
+    temperature = np.round(20 + np.sin(np.arange(1440) / 100), 1)
+    humidity = np.full(1440, 55.0)
+
+    data = encode_chunk(timestamps, temperature, humidity)
+    # 24 bytes per raw reading
+    assert len(data) < 1440 * 24 / 8
+
+def test_compact_moves_complete_windows_only(user):
+    sensor = Sensor.objects.create(name="Cold_001", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 3 * 24 * 60)
+
+    packed, chunks = compact_sensor(sensor.id, START + timedelta(days=2, hours=12), DAY)
+    assert (packed, chunks) == (2 * 24 * 60, 2)
+    assert Reading.objects.filter(sensor=sensor).count() == 24 * 60
+    assert list(ReadingChunk.objects.filter(sensor=sensor).values_list("count", flat=True)) == [1440, 1440]
+
+    # Nothing left to do until another window completes
+    assert compact_sensor(sensor.id, START + timedelta(days=2, hours=12), DAY) == (0, 0)
+
+def test_compact_merges_late_readings_into_existing_chunk(user):
+    sensor = Sensor.objects.create(name="Cold_002", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 60)
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+
+    Reading.objects.create(sensor=sensor, temperature=1, humidity=2, timestamp=START + timedelta(seconds=30))
+    assert compact_sensor(sensor.id, START + timedelta(days=1), DAY) == (1, 1)
+
+    chunk = ReadingChunk.objects.get(sensor=sensor)
+    timestamps, temperature, _ = decode_chunk(chunk.data)
+    assert chunk.count == len(timestamps) == 61
+    assert temperature[1] == 1
+
+def test_list_readings_merges_hot_and_cold_rows(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_003", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 2 * 24 * 60)
+    url = f"/sensors/{sensor.id}/readings?timestamp_from=2025-09-01T12:00:00&timestamp_to=2025-09-02T12:00:00"
+    before = auth_client.get(url)
+
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+    after = auth_client.get(url)
+
+    assert after.status_code == 200
+    readings = after.json()
+    assert len(readings) == 24 * 60 + 1
+    assert strip_ids(readings) == strip_ids(before.json())
+    assert readings[0]["id"] is None
+    assert readings[-1]["id"] is not None
+
+def test_list_readings_paginates_across_cold_and_hot_rows(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_004", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 2 * 24 * 60)
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+
+    seen, url = [], f"/sensors/{sensor.id}/readings?limit=1000"
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        seen.extend(reading["timestamp"] for reading in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        url = cursor and f"/sensors/{sensor.id}/readings?limit=1000&after={cursor}"
+
+    assert len(seen) == len(set(seen)) == 2 * 24 * 60
+    assert seen == sorted(seen)
+
+def test_list_readings_downsamples_cold_rows(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_005", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 2 * 24 * 60)
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?max_points=100")
+    assert response.status_code == 200
+    readings = response.json()
+    assert len(readings) == 100
+    assert readings[0]["timestamp"].startswith("2025-09-01T00:00:00")
+
+def test_compact_readings_command(user):
+    sensor = Sensor.objects.create(name="Cold_006", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 60)
+
+    out = StringIO()
+    call_command("compact_readings", "--sensor", str(sensor.id), "--window", "1h", stdout=out)
+    assert "Packed 60 readings into 1 chunk(s)" in out.getvalue()
+    assert not Reading.objects.filter(sensor=sensor).exists()
+    # The newest reading is now only in the chunk
+    latest = SensorLatestReading.objects.get(sensor=sensor)
+    assert (latest.timestamp, latest.temperature) == (START + timedelta(minutes=59), 20 + (59 % 7) * 0.1)
+
+def test_exports_include_compacted_readings(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_007", model="TestSensor", owner=user)
+    other = Sensor.objects.create(name="Cold_008", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 2 * 24 * 60)
+    create_minutely(other, START, 60)
+    url = f"/sensors/{sensor.id}/readings/export?format=ndjson&timestamp_from=2025-09-01T12:00:00"
+    before_one, before_all = auth_client.get(url), auth_client.get("/readings/export")
+
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+    compact_sensor(other.id, START + timedelta(days=1), DAY)
+    after_one, after_all = auth_client.get(url), auth_client.get("/readings/export")
+
+    assert after_one.content == before_one.content
+    assert len(after_one.content.splitlines()) == 36 * 60
+    assert after_all.content == before_all.content
+    assert len(after_all.content.splitlines()) == 1 + 2 * 24 * 60 + 60
+
+def test_raw_aggregates_include_compacted_readings(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_009", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 2 * 24 * 60)
+    url = f"/sensors/{sensor.id}/readings/aggregate?bucket=1d&fn=avg,min,max,sum,count"
+    before = auth_client.get(url).json()
+
+    compact_sensor(sensor.id, START + timedelta(days=1, hours=12), DAY)
+    # A late reading for the compacted day replaces the chunked one
+    Reading.objects.create(sensor=sensor, temperature=100, humidity=50, timestamp=START)
+    after = auth_client.get(url).json()
+
+    assert [bucket["count"] for bucket in after] == [1440, 1440]
+    assert after[0]["temperature_max"] == 100
+    assert after[0]["temperature_sum"] == pytest.approx(before[0]["temperature_sum"] + 80)
+    assert after[1] == pytest.approx(before[1])
+
+def test_reading_schema_allows_compacted_readings_without_id():
+    schema = api.get_openapi_schema()["components"]["schemas"]["ReadingSchema"]
+    assert "id" not in schema.get("required", [])
+    assert "compacted" in schema["description"]
+
+def test_batch_skips_readings_already_compacted(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_010", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 60)
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+    payload = [
+        {"temperature": 99, "humidity": 99, "timestamp": "2025-09-01T00:00:00Z"},
+        {"temperature": 99, "humidity": 99, "timestamp": "2025-09-01T00:00:30Z"},
+    ]
+
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+    assert response.json() == {"inserted": 1, "updated": 0, "skipped": 1}
+
+    readings = auth_client.get(f"/sensors/{sensor.id}/readings?timestamp_to=2025-09-01T00:00:30").json()
+    assert [(r["temperature"], r["humidity"]) for r in readings] == [(20, 50), (99, 99)]
+    assert ReadingChunk.objects.get(sensor=sensor).count == 60
+
+def test_batch_update_rewrites_compacted_readings(auth_client, user):
+    sensor = Sensor.objects.create(name="Cold_011", model="TestSensor", owner=user)
+    create_minutely(sensor, START, 60)
+    compact_sensor(sensor.id, START + timedelta(days=1), DAY)
+    payload = [{"temperature": 99, "humidity": 98, "timestamp": "2025-09-01T00:01:00Z"}]
+
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch?on_conflict=update", json=payload)
+    assert response.json() == {"inserted": 0, "updated": 1, "skipped": 0}
+
+    assert not Reading.objects.filter(sensor=sensor).exists()
+    timestamps, temperature, humidity = decode_chunk(ReadingChunk.objects.get(sensor=sensor).data)
+    assert len(timestamps) == 60
+    assert (temperature[1], humidity[1]) == (99, 98)
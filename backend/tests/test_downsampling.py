@@ -0,0 +1,41 @@
+import numpy as np
+from datetime import datetime, timedelta
+from django.utils import timezone
+from sensors.downsampling import lttb_indices
+from sensors.models import Sensor, Reading
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[333] = 10
+    y[666] = -10
+    keep = lttb_indices(x, (y,), 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 333 in keep and 666 in keep
+    assert np.all(np.diff(keep) > 0)
+
+def test_lttb_returns_everything_when_below_threshold():
+    x = np.arange(10, dtype=float)
+    assert list(lttb_indices(x, (x,), 50)) == list(range(10))
+
+def test_list_readings_max_points(auth_client, user):
+    sensor = Sensor.objects.create(name="Lttb_001", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=20 + (i == 50) * 10, humidity=50, timestamp=base + timedelta(minutes=i))
+        for i in range(200)
+    )
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?max_points=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 10
+    assert max(r["temperature"] for r in data) == 30
+    assert datetime.fromisoformat(data[0]["timestamp"]) == base
+    assert datetime.fromisoformat(data[-1]["timestamp"]) == base + timedelta(minutes=199)
+
+def test_list_readings_max_points_rejects_pagination(auth_client, user):
+    sensor = Sensor.objects.create(name="Lttb_002", model="TestSensor", owner=user)
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?max_points=10&limit=5")
+    assert response.status_code == 400
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
+import msgpack
+import pyarrow
+import pytest
+from django.utils import timezone
+from sensors import formats
+from sensors.models import Sensor, Reading
+
+COLUMNS = "application/vnd.sensors.columns+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+BASE = timezone.make_aware(datetime(2025, 9, 23, 14, 0))
+
+@pytest.fixture
+def sensor(user):
+    sensor = Sensor.objects.create(name="Format_001", model="Test Sensor", owner=user)
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=20 + i / 100, humidity=50.0, timestamp=BASE + timedelta(seconds=i))
+        for i in range(2500)
+    )
+    return sensor
+
+def get(client, url, accept):
+    # The ninja test client copies header names into META as given, hence the upper case
+    return client.get(url, headers={"ACCEPT": accept})
+
+def as_columns(objects):
+    return {key: [row[key] for row in objects] for key in ("id", "sensor", "temperature", "humidity", "timestamp")}
+
+def test_columnar_json_matches_objects(auth_client, sensor):
+    url = f"/sensors/{sensor.id}/readings?limit=5000"
+    expected = as_columns(auth_client.get(url).json())
+    response = get(auth_client, url, COLUMNS)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == COLUMNS
+    assert response.json() == expected
+    assert len(expected["id"]) == 2500
+
+def test_columnar_json_keeps_microseconds(auth_client, user):
+    sensor = Sensor.objects.create(name="Format_002", model="Test Sensor", owner=user)
+    timestamp = BASE + timedelta(microseconds=123456)
+    Reading.objects.create(sensor=sensor, temperature=20, humidity=50, timestamp=timestamp)
+    columns = get(auth_client, f"/sensors/{sensor.id}/readings?limit=10", COLUMNS).json()
+    assert columns["timestamp"] == [timestamp.astimezone(dt_timezone.utc).isoformat().replace("+00:00", "Z")]
+
+def test_msgpack_matches_objects(auth_client, sensor):
+    url = f"/sensors/{sensor.id}/readings?limit=100"
+    expected = auth_client.get(url).json()
+    response = get(auth_client, url, MSGPACK)
+    assert response.headers["Content-Type"] == MSGPACK
+    assert response.headers["X-Next-Cursor"]
+    columns = msgpack.unpackb(response.content, timestamp=3)
+    assert columns["id"] == [row["id"] for row in expected]
+    assert columns["temperature"] == [row["temperature"] for row in expected]
+    assert columns["timestamp"][1] == BASE + timedelta(seconds=1)
+
+def test_columnar_json_needs_a_limit(auth_client, sensor):
+    response = get(auth_client, f"/sensors/{sensor.id}/readings", COLUMNS)
+    assert response.status_code == 400
+    assert get(auth_client, f"/sensors/{sensor.id}/readings?max_points=100", COLUMNS).status_code == 200
+
+def test_msgpack_stream_is_chunked(auth_client, sensor):
+    response = get(auth_client, f"/sensors/{sensor.id}/readings", MSGPACK)
+    assert response.streaming
+    frames = list(msgpack.Unpacker(BytesIO(response.content), timestamp=3))
+    assert [len(frame["id"]) for frame in frames] == [2000, 500]
+    assert frames[1]["timestamp"][-1] == BASE + timedelta(seconds=2499)
+
+    response = get(auth_client, f"/sensors/{sensor.id}/readings?timestamp_from=2030-01-01T00:00:00", MSGPACK)
+    assert msgpack.unpackb(response.content)["id"] == []
+
+def test_arrow_stream_is_chunked(auth_client, sensor):
+    response = get(auth_client, f"/sensors/{sensor.id}/readings", ARROW)
+    assert response.headers["Content-Type"] == ARROW
+    assert response.streaming
+    reader = pyarrow.ipc.open_stream(response.content)
+    table = reader.read_all()
+    assert table.num_rows == 2500
+    assert table.column("sensor").unique().to_pylist() == [sensor.id]
+    assert table.column("timestamp")[-1].as_py() == BASE + timedelta(seconds=2499)
+    assert len(table.column("id").chunks) == 2
+
+def test_arrow_empty_range(auth_client, sensor):
+    response = get(auth_client, f"/sensors/{sensor.id}/readings?timestamp_from=2030-01-01T00:00:00", ARROW)
+    assert pyarrow.ipc.open_stream(response.content).read_all().num_rows == 0
+
+def test_accept_quality_is_respected(auth_client, sensor):
+    url = f"/sensors/{sensor.id}/readings?limit=10"
+    assert get(auth_client, url, f"application/json;q=0.5, {MSGPACK}").headers["Content-Type"] == MSGPACK
+    assert get(auth_client, url, f"application/json, {MSGPACK};q=0.9").headers["Content-Type"] == "application/json"
+    assert get(auth_client, url, "*/*").headers["Content-Type"] == "application/json"
+
+def test_unavailable_format_is_not_acceptable(auth_client, sensor, monkeypatch):
+    url = f"/sensors/{sensor.id}/readings?limit=10"
+    assert get(auth_client, url, "text/csv").status_code == 406
+
+    monkeypatch.setattr(formats, "msgpack", None)
+    response = get(auth_client, url, MSGPACK)
+    assert response.status_code == 406
+    assert MSGPACK not in response.json()["detail"]
+    assert get(auth_client, url, f"{MSGPACK}, {ARROW};q=0.5").headers["Content-Type"] == ARROW
+
+def test_etag_varies_with_format(auth_client, sensor):
+    url = f"/sensors/{sensor.id}/readings?limit=10"
+    response = auth_client.get(url)
+    assert response.headers["Vary"] == "Accept"
+    etag = response.headers["ETag"]
+    assert auth_client.get(url, headers={"IF-NONE-MATCH": etag}).status_code == 304
+
+    response = auth_client.get(url, headers={"IF-NONE-MATCH": etag, "ACCEPT": MSGPACK})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient, Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from sensors.models import Sensor
+from sensors.pubsub import Hub, event_stream, hub
+
+TS = timezone.make_aware(datetime(2025, 9, 23, 14, 0))
+
+def test_hub_routes_by_sensor_and_owner(user, other_user):
+    sensor = Sensor.objects.create(name="Live_001", model="TestSensor", owner=user)
+    other_sensor = Sensor.objects.create(name="Live_002", model="TestSensor", owner=other_user)
+    local_hub = Hub()
+
+    async def scenario():
+        by_sensor = local_hub.subscribe(sensor_id=sensor.id)
+        by_owner = local_hub.subscribe(owner_id=user.id)
+        # Publishers run in sync code after commit, and may look owners up
+        await sync_to_async(local_hub.publish)([(sensor.id, TS, 21.0, 50.0), (other_sensor.id, TS, 5.0, 50.0)])
+        for subscription in (by_sensor, by_owner):
+            events, dropped = await subscription.get(1)
+            assert [event["temperature"] for event in events] == [21.0]
+            assert dropped == 0
+        local_hub.unsubscribe(by_sensor)
+        local_hub.unsubscribe(by_owner)
+        assert not local_hub.by_sensor and not local_hub.by_owner
+
+    async_to_sync(scenario)()
+
+def test_slow_subscriber_drops_oldest_readings():
+    local_hub = Hub()
+
+    async def scenario():
+        subscription = local_hub.subscribe(sensor_id=1, maxsize=3)
+        for i in range(5):
+            local_hub.publish([(1, TS, float(i), 50.0)])
+        await asyncio.sleep(0)
+        events, dropped = await subscription.get(1)
+        assert [event["temperature"] for event in events] == [2.0, 3.0, 4.0]
+        assert dropped == 2
+
+    async_to_sync(scenario)()
+
+def test_event_stream_sends_heartbeats():
+    local_hub = Hub()
+
+    async def scenario():
+        stream = event_stream(local_hub.subscribe(sensor_id=1), heartbeat=0.01, max_age=60)
+        assert await stream.__anext__() == ": connected\n\n"
+        assert await stream.__anext__() == ": heartbeat\n\n"
+        await stream.aclose()
+
+    async_to_sync(scenario)()
+
+def test_event_stream_ends_after_max_age():
+    local_hub = Hub()
+
+    async def scenario():
+        stream = event_stream(local_hub.subscribe(sensor_id=1), heartbeat=10, max_age=0.05)
+        # Nobody closes it, like the stream of a client that went away
+        assert [part async for part in stream] == [": connected\n\n", ": heartbeat\n\n"]
+        assert not local_hub.by_sensor
+
+    async_to_sync(scenario)()
+
+def test_ingest_publishes_committed_readings(auth_client, user, monkeypatch, django_capture_on_commit_callbacks):
+    sensor = Sensor.objects.create(name="Live_003", model="TestSensor", owner=user)
+    published = []
+    monkeypatch.setattr(hub, "publish", published.extend)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(f"/sensors/{sensor.id}/readings",
+                         json={"temperature": 21.5, "humidity": 55.2, "timestamp": "2025-09-23T14:00:00"})
+    assert published == [(sensor.id, TS, 21.5, 55.2)]
+
+def test_live_endpoint_streams_readings(user, other_user):
+    sensor = Sensor.objects.create(name="Live_004", model="TestSensor", owner=user)
+    other_sensor = Sensor.objects.create(name="Live_005", model="TestSensor", owner=other_user)
+    token = RefreshToken.for_user(user).access_token
+
+    async def scenario():
+        client = AsyncClient()
+        response = await client.get(f"/api/sensors/{other_sensor.id}/readings/live?token={token}")
+        assert response.status_code == 403
+        response = await client.get(f"/api/sensors/{sensor.id}/readings/live?token=garbage")
+        assert response.status_code == 401
+
+        response = await client.get(f"/api/sensors/{sensor.id}/readings/live?token={token}")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        stream = response.streaming_content
+        assert await stream.__anext__() == b": connected\n\n"
+
+        hub.publish([(sensor.id, TS, 21.5, 55.2)])
+        event = await stream.__anext__()
+        assert event.startswith(b"event: readings\ndata: ")
+        assert b'"temperature": 21.5' in event
+        await stream.aclose()
+
+    async_to_sync(scenario)()
+
+def test_publish_drops_subscriptions_of_closed_loops(user):
+    sensor = Sensor.objects.create(name="Live_007", model="TestSensor", owner=user)
+    local_hub = Hub()
+
+    async def scenario():
+        # Like an async view under WSGI: the loop is closed once the request is done
+        local_hub.subscribe(sensor_id=sensor.id)
+        local_hub.subscribe(owner_id=user.id)
+
+    async_to_sync(scenario)()
+    local_hub.publish([(sensor.id, TS, 21.0, 50.0)])
+    assert not local_hub.by_sensor and not local_hub.by_owner
+
+def test_live_endpoints_need_asgi(user):
+    sensor = Sensor.objects.create(name="Live_006", model="TestSensor", owner=user)
+    token = RefreshToken.for_user(user).access_token
+
+    client = Client()
+    for url in (f"/api/sensors/{sensor.id}/readings/live", "/api/readings/live"):
+        response = client.get(f"{url}?token={token}")
+        assert response.status_code == 501
+    assert not hub.by_sensor and not hub.by_owner
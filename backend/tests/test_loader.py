@@ -0,0 +1,77 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from sensors.models import Sensor, Reading, ReadingRollup
+
+CSV = """timestamp,device_id,temperature,humidity
+2024-08-01 00:00:00+00:00,device-001,23.75,45.29
+2024-08-01 00:01:00+00:00,device-001,23.46,46.46
+2024-08-01 00:00:00+00:00,device-002,19.10,60.00
+"""
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "readings.csv"
+    path.write_text(CSV)
+    return path
+
+def test_load_readings(user, csv_path):
+    first = Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    Sensor.objects.create(name="device-002", model="Test Sensor", owner=user)
+
+    out = StringIO()
+    call_command("load_readings", str(csv_path), "--owner", user.username, "--batch-size", "2", stdout=out)
+    assert "Loaded 3 readings" in out.getvalue()
+    assert Reading.objects.count() == 3
+    assert Reading.objects.filter(sensor=first).count() == 2
+    assert ReadingRollup.objects.get(sensor=first, resolution=ReadingRollup.HOUR).count == 2
+
+    # Loading the same file again is a no-op
+    out = StringIO()
+    call_command("load_readings", str(csv_path), "--owner", user.username, stdout=out)
+    assert "Loaded 0 readings (0 updated, 3 skipped)" in out.getvalue()
+    assert Reading.objects.count() == 3
+
+def test_load_readings_updates_on_conflict(user, csv_path):
+    sensor = Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    Sensor.objects.create(name="device-002", model="Test Sensor", owner=user)
+    call_command("load_readings", str(csv_path), "--owner", user.username, stdout=StringIO())
+    Reading.objects.filter(sensor=sensor).update(temperature=0)
+
+    call_command("load_readings", str(csv_path), "--owner", user.username, "--on-conflict", "update", stdout=StringIO())
+    assert not Reading.objects.filter(temperature=0).exists()
+
+def test_load_readings_rejects_unknown_sensor(user, other_user, csv_path):
+    Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    Sensor.objects.create(name="device-002", model="Test Sensor", owner=other_user)
+    with pytest.raises(CommandError, match="device-002"):
+        call_command("load_readings", str(csv_path), "--owner", user.username, stdout=StringIO())
+
+def test_load_readings_rejects_ambiguous_sensor(user, csv_path):
+    Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    Sensor.objects.create(name="device-001", model="Other Sensor", owner=user)
+    Sensor.objects.create(name="device-002", model="Test Sensor", owner=user)
+    with pytest.raises(CommandError, match="Line 2: sensor name 'device-001' is ambiguous"):
+        call_command("load_readings", str(csv_path), "--owner", user.username, stdout=StringIO())
+    assert not Reading.objects.exists()
+
+def test_load_readings_reports_line_of_bad_number(user, tmp_path):
+    Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    path = tmp_path / "bad.csv"
+    path.write_text(CSV.splitlines()[0] + "\n2024-08-01 00:00:00+00:00,device-001,warm,45.29\n")
+    with pytest.raises(CommandError, match="Line 2: invalid temperature 'warm'"):
+        call_command("load_readings", str(path), "--owner", user.username, stdout=StringIO())
+
+def test_load_readings_reports_line_of_impossible_date(user, tmp_path):
+    Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    path = tmp_path / "bad.csv"
+    path.write_text(CSV.splitlines()[0] + "\n2024-13-01 00:00:00+00:00,device-001,21.5,45.29\n")
+    with pytest.raises(CommandError, match="Line 2: invalid timestamp '2024-13-01 00:00:00\\+00:00'"):
+        call_command("load_readings", str(path), "--owner", user.username, stdout=StringIO())
+
+@pytest.mark.parametrize("batch_size", ["0", "-5"])
+def test_load_readings_rejects_non_positive_batch_size(user, csv_path, batch_size):
+    with pytest.raises(CommandError, match="--batch-size: must be a positive integer"):
+        call_command("load_readings", str(csv_path), "--owner", user.username, "--batch-size", batch_size)
+    assert not Reading.objects.exists()
@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from sensors import partitioning
+from sensors.ingest import upsert_readings
+from sensors.models import Sensor, Reading
+from sensors.partitioning import add_months, partition_ranges, partition_start, create_partition_sql
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def test_partition_start_aligns_to_period():
+    assert partition_start(utc(2025, 9, 23, 14), 1) == utc(2025, 9, 1)
+    assert partition_start(utc(2025, 9, 23, 14), 3) == utc(2025, 7, 1)
+    assert partition_start(utc(2025, 12, 31, 23), 12) == utc(2025, 1, 1)
+
+def test_add_months_crosses_years():
+    assert add_months(utc(2025, 11, 1), 3) == utc(2026, 2, 1)
+    assert add_months(utc(2025, 1, 1), -1) == utc(2024, 12, 1)
+
+def test_partition_ranges_cover_interval():
+    ranges = list(partition_ranges(utc(2025, 11, 15), utc(2026, 1, 2), 1))
+    assert ranges == [
+        ("sensors_reading_p2025_11", utc(2025, 11, 1), utc(2025, 12, 1)),
+        ("sensors_reading_p2025_12", utc(2025, 12, 1), utc(2026, 1, 1)),
+        ("sensors_reading_p2026_01", utc(2026, 1, 1), utc(2026, 2, 1)),
+    ]
+
+def test_create_partition_moves_rows_out_of_default_partition():
+    statements = create_partition_sql("sensors_reading_p2025_11", utc(2025, 11, 1), utc(2025, 12, 1))
+    assert "DELETE FROM sensors_reading_default" in statements[1]
+    assert statements[-1].startswith("ALTER TABLE sensors_reading ATTACH PARTITION sensors_reading_p2025_11")
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="checks the non-PostgreSQL guard")
+def test_partition_readings_requires_postgresql(db):
+    with pytest.raises(CommandError, match="PostgreSQL"):
+        call_command("partition_readings", "--list", stdout=StringIO())
+
+def count_rows(table: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="partitioning needs PostgreSQL")
+def test_convert_ensure_and_expire_partitions(user):
+    sensor = Sensor.objects.create(name="Part_001", model="TestSensor", owner=user)
+    months = partitioning.partition_months()
+    now = datetime.now(timezone.utc)
+    old, current = add_months(now, -14), now - timedelta(minutes=1)
+    for timestamp in (old, current):
+        Reading.objects.create(sensor=sensor, temperature=20, humidity=50, timestamp=timestamp)
+
+    out = StringIO()
+    call_command("partition_readings", "--convert", "--ahead", "2", stdout=out)
+    assert "2 rows copied" in out.getvalue()
+    assert partitioning.is_partitioned()
+    names = {name for name, _ in partitioning.list_partitions()}
+    assert {partitioning.DEFAULT_PARTITION, partitioning.partition_name(partition_start(old, months))} <= names
+    assert Reading.objects.count() == 2
+
+    # Writes keep working through the ORM and ON CONFLICT, ids continue after the copied rows
+    far = add_months(now, 24)
+    result = upsert_readings([
+        {"sensor_id": sensor.id, "timestamp": current, "temperature": 21, "humidity": 51},
+        {"sensor_id": sensor.id, "timestamp": far, "temperature": 22, "humidity": 52},
+    ])
+    assert result == {"inserted": 1, "updated": 0, "skipped": 1}
+    assert Reading.objects.get(timestamp=far).id > Reading.objects.get(timestamp=old).id
+    assert count_rows(partitioning.DEFAULT_PARTITION) == 1
+
+    # A new partition takes over its rows from the default partition
+    created = partitioning.ensure_partitions(ahead=25)
+    far_partition = partitioning.partition_name(partition_start(far, months))
+    assert far_partition in created
+    assert count_rows(partitioning.DEFAULT_PARTITION) == 0
+    assert count_rows(far_partition) == 1
+
+    expired = partitioning.expire_partitions(retain=6, drop=True)
+    assert partitioning.partition_name(partition_start(old, months)) in expired
+    assert not Reading.objects.filter(timestamp=old).exists()
+    assert Reading.objects.count() == 2
@@ -0,0 +1,54 @@
+import pytest
+from sensors.models import Sensor
+
+# Most queries each endpoint may run; they must not grow with the number of sensors or readings
+@pytest.fixture(params=[2, 8], ids=lambda n: f"{n}_sensors")
+def fleet(request, auth_client, user):
+    sensors = []
+    for k in range(request.param):
+        sensor = Sensor.objects.create(name=f"budget-{k:03d}", model="Test Sensor", owner=user)
+        readings = [
+            {"temperature": 20 + i, "humidity": 50, "timestamp": f"2025-09-23T14:{i:02d}:00"} for i in range(40)
+        ]
+        auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=readings)
+        sensors.append(sensor)
+    return sensors
+
+@pytest.mark.parametrize("url, budget", [
+    ("/sensors?include_latest=true&page_size=50", 2),
+    ("/sensors/{id}?include_latest=true", 1),
+    ("/sensors/{id}/readings", 3),
+    ("/sensors/{id}/readings?limit=10", 3),
+    ("/sensors/{id}/readings?max_points=10", 3),
+    ("/sensors/{id}/readings/aggregate", 2),
+    ("/sensors/{id}/stats", 1),
+    ("/sensors/{id}/anomalies", 1),
+])
+def test_read_query_budget(auth_client, fleet, assert_max_queries, url, budget):
+    with assert_max_queries(budget):
+        response = auth_client.get(url.format(id=fleet[0].id))
+    assert response.status_code == 200
+
+def test_create_reading_query_budget(auth_client, fleet, assert_max_queries):
+    payload = {"temperature": 21.5, "humidity": 55.0, "timestamp": "2025-09-24T00:00:00"}
+    with assert_max_queries(11):
+        assert auth_client.post(f"/sensors/{fleet[0].id}/readings", json=payload).status_code == 200
+
+def test_create_readings_batch_query_budget(auth_client, fleet, assert_max_queries):
+    payload = [{"temperature": 21.5, "humidity": 55.0, "timestamp": f"2025-09-24T00:{i:02d}:00"} for i in range(20)]
+    with assert_max_queries(12):
+        assert auth_client.post(f"/sensors/{fleet[0].id}/readings/batch", json=payload).status_code == 200
+
+def test_create_readings_bulk_query_budget(auth_client, fleet, assert_max_queries):
+    payload = [
+        {"sensor": sensor.name, "temperature": 21.5, "humidity": 55.0, "timestamp": "2025-09-24T00:00:00"}
+        for sensor in fleet
+    ]
+    with assert_max_queries(13):
+        assert auth_client.post("/readings/bulk", json=payload).status_code == 200
+
+def test_assert_max_queries_reports_repeated_queries(fleet, assert_max_queries):
+    with pytest.raises(pytest.fail.Exception, match=r"queries, expected at most 1:\n  \d+x SELECT"):
+        with assert_max_queries(1):
+            for sensor in fleet:
+                Sensor.objects.get(id=sensor.id)
@@ -1,5 +1,9 @@
+import json
 from datetime import datetime, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from sensors.conditional import bump_all_data_versions, bump_data_version, get_data_version
 from sensors.models import Sensor, Reading
 
 def test_create_reading(auth_client, user):
@@ -58,6 +62,22 @@ def test_list_readings_with_filters(auth_client, user):
     data = response.json()
     assert all(datetime.fromisoformat(r["timestamp"]) <= ts_to for r in data)
 
+def test_filter_readings_by_aware_timestamps(auth_client, user):
+    sensor = Sensor.objects.create(name="Test_003b", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for i in range(5):
+        Reading.objects.create(sensor=sensor, temperature=20 + i, humidity=50 + i, timestamp=base + timedelta(days=i))
+
+    # 02:00 at +02:00 is midnight UTC
+    bounds = "timestamp_from=2025-09-22T00:00:00Z&timestamp_to=2025-09-23T02:00:00%2B02:00"
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?{bounds}")
+    assert response.status_code == 200
+    assert [r["temperature"] for r in response.json()] == [22, 23]
+
+    for path in ("readings/export?", "readings/aggregate?bucket=1m&fn=count&", "anomalies?"):
+        response = auth_client.get(f"/sensors/{sensor.id}/{path}{bounds}")
+        assert response.status_code == 200, path
+
 def test_user_cannot_create_readings_for_others_sensors(auth_client, other_user):
     other_sensor = Sensor.objects.create(name="Other_001", model="Test Sensor", owner=other_user)
     payload = {
@@ -80,4 +100,306 @@ def test_user_cannot_list_readings_for_others_sensors(auth_client, other_user):
             timestamp=base + timedelta(days=i)
         )
     response = auth_client.get(f"/sensors/{other_sensor.id}/readings")
-    assert response.status_code == 403
\ No newline at end of file
+    assert response.status_code == 403
+
+def test_create_readings_batch(auth_client, user):
+    sensor = Sensor.objects.create(name="Batch_001", model="Test Sensor", owner=user)
+    payload = [
+        {"temperature": 20 + i, "humidity": 50 + i, "timestamp": f"2025-09-23T14:0{i}:00"}
+        for i in range(5)
+    ]
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 5, "updated": 0, "skipped": 0}
+    assert Reading.objects.filter(sensor=sensor).count() == 5
+
+def test_create_readings_batch_resolves_duplicates_in_the_insert(auth_client, user):
+    sensor = Sensor.objects.create(name="Batch_006", model="Test Sensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 1))
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=20, humidity=50, timestamp=base + timedelta(minutes=i))
+        for i in range(1, 500)
+    )
+    payload = [
+        {"temperature": 21, "humidity": 51, "timestamp": base.isoformat()},
+        {"temperature": 22, "humidity": 52, "timestamp": (base + timedelta(minutes=1)).isoformat()},
+    ]
+    with CaptureQueriesContext(connection) as ctx:
+        response = auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+    assert response.json() == {"inserted": 1, "updated": 0, "skipped": 1}
+    # New rows are told from existing ones by what the insert returns, without reading ahead
+    statements = [q["sql"] for q in ctx.captured_queries if '"sensors_reading"' in q["sql"]]
+    assert len(statements) == 1
+    assert statements[0].startswith('INSERT INTO "sensors_reading"')
+    assert "ON CONFLICT (sensor_id, timestamp) DO NOTHING RETURNING" in statements[0]
+    assert Reading.objects.get(sensor=sensor, timestamp=base + timedelta(minutes=1)).temperature == 20
+
+def test_create_readings_batch_is_idempotent(auth_client, user):
+    sensor = Sensor.objects.create(name="Batch_002", model="Test Sensor", owner=user)
+    payload = [
+        {"temperature": 20, "humidity": 50, "timestamp": "2025-09-23T14:00:00"},
+        {"temperature": 21, "humidity": 51, "timestamp": "2025-09-23T14:01:00"},
+    ]
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+
+    # Retry with one new reading and one duplicated within the payload
+    payload += [
+        {"temperature": 22, "humidity": 52, "timestamp": "2025-09-23T14:02:00"},
+        {"temperature": 22, "humidity": 52, "timestamp": "2025-09-23T14:02:00"},
+    ]
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 1, "updated": 0, "skipped": 3}
+    assert Reading.objects.filter(sensor=sensor).count() == 3
+
+def test_create_readings_batch_updates_duplicates(auth_client, user):
+    sensor = Sensor.objects.create(name="Batch_003", model="Test Sensor", owner=user)
+    Reading.objects.create(
+        sensor=sensor, temperature=20, humidity=50,
+        timestamp=timezone.make_aware(datetime(2025, 9, 23, 14, 0)),
+    )
+    payload = [
+        {"temperature": 30, "humidity": 60, "timestamp": "2025-09-23T14:00:00"},
+        {"temperature": 31, "humidity": 61, "timestamp": "2025-09-23T14:01:00"},
+    ]
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch?on_conflict=update", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 1, "updated": 1, "skipped": 0}
+    assert Reading.objects.get(sensor=sensor, temperature=30).humidity == 60
+
+def test_user_cannot_create_readings_batch_for_others_sensors(auth_client, other_user):
+    other_sensor = Sensor.objects.create(name="Other_003", model="Test Sensor", owner=other_user)
+    payload = [{"temperature": 20, "humidity": 50, "timestamp": "2025-09-23T14:00:00"}]
+    response = auth_client.post(f"/sensors/{other_sensor.id}/readings/batch", json=payload)
+    assert response.status_code == 403
+    assert not Reading.objects.filter(sensor=other_sensor).exists()
+
+def test_create_readings_bulk(auth_client, user):
+    first = Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    second = Sensor.objects.create(name="device-002", model="Test Sensor", owner=user)
+    payload = [
+        {"sensor": "device-001", "temperature": 20, "humidity": 50, "timestamp": "2025-09-23T14:00:00"},
+        {"sensor": "device-002", "temperature": 21, "humidity": 51, "timestamp": "2025-09-23T14:00:00"},
+        {"sensor": "device-001", "temperature": 22, "humidity": 52, "timestamp": "2025-09-23T14:01:00"},
+    ]
+    response = auth_client.post("/readings/bulk", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 3, "updated": 0, "skipped": 0}
+    assert Reading.objects.filter(sensor=first).count() == 2
+    assert Reading.objects.filter(sensor=second).count() == 1
+
+def test_create_readings_bulk_rejects_unknown_and_others_sensors(auth_client, user, other_user):
+    Sensor.objects.create(name="device-001", model="Test Sensor", owner=user)
+    Sensor.objects.create(name="device-002", model="Test Sensor", owner=other_user)
+    payload = [
+        {"sensor": "device-001", "temperature": 20, "humidity": 50, "timestamp": "2025-09-23T14:00:00"},
+        {"sensor": "device-002", "temperature": 21, "humidity": 51, "timestamp": "2025-09-23T14:00:00"},
+    ]
+    response = auth_client.post("/readings/bulk", json=payload)
+    assert response.status_code == 404
+    assert not Reading.objects.exists()
+
+def test_list_readings_keyset_pagination(auth_client, user):
+    sensor = Sensor.objects.create(name="Page_001", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for i in range(5):
+        Reading.objects.create(sensor=sensor, temperature=20+i, humidity=50+i, timestamp=base + timedelta(hours=i))
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?limit=2")
+    assert response.status_code == 200
+    assert [r["temperature"] for r in response.json()] == [20, 21]
+    cursor = response["X-Next-Cursor"]
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?limit=2&after={cursor}")
+    assert [r["temperature"] for r in response.json()] == [22, 23]
+    cursor = response["X-Next-Cursor"]
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?limit=2&after={cursor}")
+    assert [r["temperature"] for r in response.json()] == [24]
+    assert not response.has_header("X-Next-Cursor")
+
+def test_list_readings_keeps_microseconds(auth_client, user):
+    sensor = Sensor.objects.create(name="Page_003", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    # Several readings within one millisecond
+    timestamps = [base + timedelta(microseconds=100 * i) for i in range(6)]
+    for i, timestamp in enumerate(timestamps):
+        Reading.objects.create(sensor=sensor, temperature=20+i, humidity=50, timestamp=timestamp)
+
+    seen, url = [], f"/sensors/{sensor.id}/readings?limit=2"
+    while url:
+        response = auth_client.get(url)
+        seen += [r["temperature"] for r in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        url = cursor and f"/sensors/{sensor.id}/readings?limit=2&after={cursor}"
+    assert seen == [20, 21, 22, 23, 24, 25]
+
+    streamed = auth_client.get(f"/sensors/{sensor.id}/readings").json()
+    assert [datetime.fromisoformat(r["timestamp"].replace("Z", "+00:00")) for r in streamed] == timestamps
+
+def test_list_readings_rejects_invalid_cursor(auth_client, user):
+    sensor = Sensor.objects.create(name="Page_002", model="TestSensor", owner=user)
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?after=not-a-cursor")
+    assert response.status_code == 400
+
+def test_list_readings_streams_unpaginated_results(auth_client, user):
+    sensor = Sensor.objects.create(name="Stream_001", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for i in range(3):
+        Reading.objects.create(sensor=sensor, temperature=20+i, humidity=50+i, timestamp=base + timedelta(hours=i))
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings")
+    assert response.streaming
+    data = response.json()
+    assert [r["temperature"] for r in data] == [20, 21, 22]
+    assert set(data[0]) == {"id", "sensor", "temperature", "humidity", "timestamp"}
+    assert data[0]["sensor"] == sensor.id
+
+def test_export_sensor_readings_csv(auth_client, user):
+    sensor = Sensor.objects.create(name="device-001", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for i in range(3):
+        Reading.objects.create(sensor=sensor, temperature=20+i, humidity=50+i, timestamp=base + timedelta(days=i))
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings/export?timestamp_from=2025-09-21T00:00:00")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    lines = response.content.decode().splitlines()
+    assert lines[0] == "timestamp,device_id,temperature,humidity"
+    assert lines[1:] == [
+        "2025-09-21 00:00:00+00:00,device-001,21.0,51.0",
+        "2025-09-22 00:00:00+00:00,device-001,22.0,52.0",
+    ]
+
+def test_export_all_readings_ndjson(auth_client, user, other_user):
+    first = Sensor.objects.create(name="device-001", model="TestSensor", owner=user)
+    second = Sensor.objects.create(name="device-002", model="TestSensor", owner=user)
+    other = Sensor.objects.create(name="device-003", model="TestSensor", owner=other_user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for sensor in (first, second, other):
+        Reading.objects.create(sensor=sensor, temperature=20, humidity=50, timestamp=base)
+
+    response = auth_client.get("/readings/export?format=ndjson")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.content.decode().splitlines()]
+    assert [r["device_id"] for r in rows] == ["device-001", "device-002"]
+
+def test_user_cannot_export_others_sensor_readings(auth_client, other_user):
+    other_sensor = Sensor.objects.create(name="Other_004", model="Test Sensor", owner=other_user)
+    response = auth_client.get(f"/sensors/{other_sensor.id}/readings/export")
+    assert response.status_code == 403
+
+def test_aggregate_readings(auth_client, user):
+    sensor = Sensor.objects.create(name="Agg_001", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for i in range(6):
+        # Two hourly buckets with three readings each
+        Reading.objects.create(sensor=sensor, temperature=20+i, humidity=50, timestamp=base + timedelta(minutes=20*i))
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings/aggregate?bucket=1h&fn=avg,max,count")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 2
+    assert datetime.fromisoformat(data[0]["bucket"]) == base
+    assert data[0]["count"] == 3
+    assert data[0]["temperature_avg"] == 21
+    assert data[1]["temperature_max"] == 25
+    assert "temperature_min" not in data[0]
+
+def test_aggregate_readings_with_filters(auth_client, user):
+    sensor = Sensor.objects.create(name="Agg_002", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    for i in range(5):
+        Reading.objects.create(sensor=sensor, temperature=20+i, humidity=50+i, timestamp=base + timedelta(days=i))
+
+    response = auth_client.get(
+        f"/sensors/{sensor.id}/readings/aggregate?bucket=1d&fn=count&timestamp_from=2025-09-22T00:00:00"
+    )
+    assert response.status_code == 200
+    assert [r["count"] for r in response.json()] == [1, 1, 1]
+
+def test_aggregate_readings_rejects_unknown_function(auth_client, user):
+    sensor = Sensor.objects.create(name="Agg_003", model="TestSensor", owner=user)
+    response = auth_client.get(f"/sensors/{sensor.id}/readings/aggregate?fn=median")
+    assert response.status_code == 400
+
+def test_user_cannot_aggregate_others_sensor_readings(auth_client, other_user):
+    other_sensor = Sensor.objects.create(name="Other_005", model="Test Sensor", owner=other_user)
+    response = auth_client.get(f"/sensors/{other_sensor.id}/readings/aggregate")
+    assert response.status_code == 403
+
+def test_create_reading_for_known_sensor_needs_no_authorization_queries(auth_client, user):
+    sensor = Sensor.objects.create(name="Auth_001", model="Test Sensor", owner=user)
+    payload = {"temperature": 22.5, "humidity": 55.2, "timestamp": "2025-09-23T14:00:00"}
+    auth_client.post(f"/sensors/{sensor.id}/readings", json=payload)
+
+    payload["timestamp"] = "2025-09-23T14:01:00"
+    with CaptureQueriesContext(connection) as ctx:
+        response = auth_client.post(f"/sensors/{sensor.id}/readings", json=payload)
+    assert response.status_code == 200
+    tables = ('"sensors_sensor"', '"sensors_user"')
+    assert not [q["sql"] for q in ctx.captured_queries if any(t in q["sql"] for t in tables)]
+
+def test_list_readings_etag(auth_client, user):
+    sensor = Sensor.objects.create(name="Etag_001", model="Test Sensor", owner=user)
+    payload = {"temperature": 22.5, "humidity": 55.2, "timestamp": "2025-09-23T14:00:00"}
+    auth_client.post(f"/sensors/{sensor.id}/readings", json=payload)
+
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?limit=10")
+    etag = response.headers["ETag"]
+    # The ninja test client copies header names into META as given, hence the upper case
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?limit=10", headers={"IF-NONE-MATCH": etag})
+    assert response.status_code == 304
+
+    payload["timestamp"] = "2025-09-23T14:01:00"
+    auth_client.post(f"/sensors/{sensor.id}/readings", json=payload)
+    response = auth_client.get(f"/sensors/{sensor.id}/readings?limit=10", headers={"IF-NONE-MATCH": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+def test_data_versions_count_up_per_sensor(user):
+    first = Sensor.objects.create(name="Version_001", model="Test Sensor", owner=user)
+    second = Sensor.objects.create(name="Version_002", model="Test Sensor", owner=user)
+    bump_data_version([first.id, first.id])
+    bump_data_version([first.id])
+    assert (get_data_version(first.id), get_data_version(second.id)) == (2, 0)
+
+    bump_all_data_versions()
+    assert (get_data_version(first.id), get_data_version(second.id)) == (3, 1)
+
+def test_get_sensor_etag_follows_updates(auth_client, user):
+    sensor = Sensor.objects.create(name="Etag_002", model="Test Sensor", owner=user)
+    etag = auth_client.get(f"/sensors/{sensor.id}").headers["ETag"]
+    assert auth_client.get(f"/sensors/{sensor.id}", headers={"IF-NONE-MATCH": etag}).status_code == 304
+
+    auth_client.put(f"/sensors/{sensor.id}", json={"description": "moved"})
+    response = auth_client.get(f"/sensors/{sensor.id}", headers={"IF-NONE-MATCH": etag})
+    assert response.status_code == 200
+    assert response.json()["description"] == "moved"
+
+def test_closed_range_responses_are_cached(auth_client, user, settings):
+    settings.SENSORS_RESPONSE_CACHE = "default"
+    sensor = Sensor.objects.create(name="Cache_001", model="Test Sensor", owner=user)
+    base_time = timezone.make_aware(datetime(2025, 9, 23, 14, 0))
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=i, humidity=50, timestamp=base_time + timedelta(minutes=i)) for i in range(5)
+    )
+    url = f"/sensors/{sensor.id}/readings?timestamp_from=2025-09-23T14:00:00&timestamp_to=2025-09-23T15:00:00"
+    first = auth_client.get(url)
+    assert len(first.json()) == 5
+
+    with CaptureQueriesContext(connection) as ctx:
+        second = auth_client.get(url)
+    assert second.json() == first.json()
+    assert not [q["sql"] for q in ctx.captured_queries if '"sensors_reading"' in q["sql"]]
+
+    # New data moves the version on, so the cached copy is never served again
+    auth_client.post(f"/sensors/{sensor.id}/readings",
+                     json={"temperature": 99, "humidity": 50, "timestamp": "2025-09-23T14:30:00"})
+    assert len(auth_client.get(url).json()) == 6
+
+    # Pages keep their cursor header when served from the cache
+    page = auth_client.get(url + "&limit=2")
+    cached = auth_client.get(url + "&limit=2")
+    assert cached.headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
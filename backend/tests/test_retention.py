@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from sensors.coldstorage import compact_sensor, decode_chunk, from_micros
+from sensors.latest import record_latest
+from sensors.models import Sensor, Reading, ReadingChunk, RetentionPolicy, SensorLatestReading
+from sensors.retention import apply_retention
+
+NOW = timezone.make_aware(datetime(2025, 10, 1))
+
+def create_minutely(sensor, start, minutes):
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=i, humidity=50, timestamp=start + timedelta(minutes=i))
+        for i in range(minutes)
+    )
+
+def test_retention_deletes_expired_readings(user):
+    sensor = Sensor.objects.create(name="Ret_001", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(raw_days=30)
+    create_minutely(sensor, NOW - timedelta(days=31), 60)
+    create_minutely(sensor, NOW - timedelta(days=1), 60)
+
+    assert list(apply_retention(chunk_size=7, now=NOW)) == [(sensor.id, 60, 0)]
+    assert Reading.objects.filter(sensor=sensor).count() == 60
+
+def test_retention_downsamples_before_removing(user):
+    sensor = Sensor.objects.create(name="Ret_002", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(sensor=sensor, raw_days=30, downsample_seconds=300)
+    old = NOW - timedelta(days=31)
+    create_minutely(sensor, old, 60)
+    create_minutely(sensor, NOW - timedelta(days=1), 10)
+
+    assert list(apply_retention(chunk_size=7, now=NOW)) == [(sensor.id, 60, 12)]
+    downsampled = Reading.objects.filter(sensor=sensor, timestamp__lt=NOW - timedelta(days=30)).order_by("timestamp")
+    assert [(r.timestamp, r.temperature) for r in downsampled] == [
+        (old + timedelta(minutes=5 * i), 5 * i + 2) for i in range(12)
+    ]
+    assert Reading.objects.filter(sensor=sensor).count() == 22
+
+    # Already downsampled history is not processed again
+    assert list(apply_retention(now=NOW)) == [(sensor.id, 0, 0)]
+
+def test_sensor_policy_overrides_global_policy(user):
+    kept = Sensor.objects.create(name="Ret_003", model="TestSensor", owner=user)
+    pruned = Sensor.objects.create(name="Ret_004", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(raw_days=30)
+    RetentionPolicy.objects.create(sensor=kept, raw_days=365)
+    for sensor in (kept, pruned):
+        create_minutely(sensor, timezone.now() - timedelta(days=60), 5)
+
+    call_command("apply_retention", stdout=StringIO())
+    assert Reading.objects.filter(sensor=kept).count() == 5
+    assert Reading.objects.filter(sensor=pruned).count() == 0
+
+def test_only_one_global_policy(user):
+    sensor = Sensor.objects.create(name="Ret_009", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(raw_days=30)
+    RetentionPolicy.objects.create(sensor=sensor, raw_days=365)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        RetentionPolicy.objects.create(raw_days=7)
+
+def test_retention_drops_and_trims_compacted_chunks(user):
+    sensor = Sensor.objects.create(name="Ret_005", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(raw_days=30)
+    create_minutely(sensor, NOW - timedelta(days=32), 3 * 24 * 60)
+    compact_sensor(sensor.id, NOW - timedelta(days=29), 86400)
+    assert ReadingChunk.objects.filter(sensor=sensor).count() == 3
+
+    # Two days fully expired, the chunk of the third is cut at the cutoff
+    assert list(apply_retention(now=NOW)) == [(sensor.id, 2 * 24 * 60, 0)]
+    chunk = ReadingChunk.objects.get(sensor=sensor)
+    assert chunk.count == 24 * 60
+    assert chunk.first_timestamp == NOW - timedelta(days=30)
+    assert from_micros(int(decode_chunk(chunk.data)[0][0])) == NOW - timedelta(days=30)
+
+def test_retention_downsamples_compacted_chunks(user):
+    sensor = Sensor.objects.create(name="Ret_006", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(sensor=sensor, raw_days=30, downsample_seconds=300)
+    old = NOW - timedelta(days=31)
+    create_minutely(sensor, old, 60)
+    compact_sensor(sensor.id, NOW - timedelta(days=29), 86400)
+
+    assert list(apply_retention(now=NOW)) == [(sensor.id, 60, 12)]
+    chunk = ReadingChunk.objects.get(sensor=sensor)
+    timestamps, temperature, _ = decode_chunk(chunk.data)
+    assert [(from_micros(int(ts)), t) for ts, t in zip(timestamps, temperature)] == [
+        (old + timedelta(minutes=5 * i), 5 * i + 2) for i in range(12)
+    ]
+    assert chunk.count == 12
+
+    # Downsampled chunks are not decoded again
+    assert list(apply_retention(now=NOW + timedelta(days=1))) == [(sensor.id, 0, 0)]
+
+def test_retention_refreshes_latest_reading(user):
+    expired = Sensor.objects.create(name="Ret_007", model="TestSensor", owner=user)
+    downsampled = Sensor.objects.create(name="Ret_008", model="TestSensor", owner=user)
+    RetentionPolicy.objects.create(raw_days=30)
+    RetentionPolicy.objects.create(sensor=downsampled, raw_days=30, downsample_seconds=300)
+    old = NOW - timedelta(days=31)
+    for sensor in (expired, downsampled):
+        create_minutely(sensor, old, 10)
+        record_latest([(sensor.id, old + timedelta(minutes=9), 9, 50)])
+
+    list(apply_retention(now=NOW))
+    assert not SensorLatestReading.objects.filter(sensor=expired).exists()
+    latest = SensorLatestReading.objects.get(sensor=downsampled)
+    assert (latest.timestamp, latest.temperature) == (old + timedelta(minutes=5), 7)
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management import call_command
+from django.utils import timezone
+from sensors import rollups
+from sensors.coldstorage import compact_sensor
+from sensors.ingest import insert_reading
+from sensors.models import Sensor, Reading, ReadingRollup, RollupDirtyRange
+
+def test_create_reading_updates_rollups(auth_client, user):
+    sensor = Sensor.objects.create(name="Rollup_001", model="TestSensor", owner=user)
+    for minute, temperature in ((0, 20), (30, 24), (90, 22)):
+        timestamp = datetime(2025, 9, 23, 14) + timedelta(minutes=minute)
+        payload = {"temperature": temperature, "humidity": 50, "timestamp": timestamp.isoformat()}
+        auth_client.post(f"/sensors/{sensor.id}/readings", json=payload)
+
+    hours = ReadingRollup.objects.filter(sensor=sensor, resolution=ReadingRollup.HOUR).order_by("bucket")
+    assert [(h.count, h.temperature_sum, h.temperature_min, h.temperature_max) for h in hours] == [
+        (2, 44, 20, 24),
+        (1, 22, 22, 22),
+    ]
+    day = ReadingRollup.objects.get(sensor=sensor, resolution=ReadingRollup.DAY)
+    assert day.bucket == timezone.make_aware(datetime(2025, 9, 23))
+    assert (day.count, day.temperature_sumsq, day.temperature_max) == (3, 20**2 + 24**2 + 22**2, 24)
+
+def test_batch_update_marks_rollups_dirty_and_refresh_recomputes(auth_client, user):
+    sensor = Sensor.objects.create(name="Rollup_002", model="TestSensor", owner=user)
+    payload = [{"temperature": 20, "humidity": 50, "timestamp": "2025-09-23T14:00:00"}]
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+
+    payload[0]["temperature"] = 30
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch?on_conflict=update", json=payload)
+    assert RollupDirtyRange.objects.filter(sensor=sensor).count() == 1
+
+    call_command("refresh_rollups")
+    assert not RollupDirtyRange.objects.exists()
+    hour = ReadingRollup.objects.get(sensor=sensor, resolution=ReadingRollup.HOUR)
+    assert (hour.count, hour.temperature_max) == (1, 30)
+    day = ReadingRollup.objects.get(sensor=sensor, resolution=ReadingRollup.DAY)
+    assert (day.count, day.temperature_sum) == (1, 30)
+
+def test_refresh_keeps_hours_marked_while_it_runs(user, monkeypatch):
+    sensor = Sensor.objects.create(name="Rollup_007", model="TestSensor", owner=user)
+    hour = datetime(2025, 9, 23, 14, tzinfo=dt_timezone.utc)
+    rollups.mark_dirty([(sensor.id, hour)])
+
+    rebuild_hours = rollups.rebuild_hours
+    def rebuild_and_remark(sensor_id, start=None, end=None):
+        rebuild_hours(sensor_id, start, end)
+        # A writer overwriting a reading of the same hour meanwhile
+        rollups.mark_dirty([(sensor_id, hour)])
+    monkeypatch.setattr(rollups, "rebuild_hours", rebuild_and_remark)
+
+    assert rollups.refresh_rollups() == 1
+    assert list(RollupDirtyRange.objects.filter(sensor=sensor).values_list("bucket", flat=True)) == [hour]
+
+def test_batch_counts_only_rows_it_inserted(auth_client, user):
+    sensor = Sensor.objects.create(name="Rollup_004", model="TestSensor", owner=user)
+    # Written by a concurrent retry of the same batch, which already rolled it up
+    Reading.objects.create(sensor=sensor, temperature=20, humidity=50, timestamp=timezone.make_aware(datetime(2025, 9, 23, 14)))
+    payload = [
+        {"temperature": 20, "humidity": 50, "timestamp": "2025-09-23T14:00:00"},
+        {"temperature": 30, "humidity": 50, "timestamp": "2025-09-23T14:10:00"},
+    ]
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+    assert response.json() == {"inserted": 1, "updated": 0, "skipped": 1}
+    hour = ReadingRollup.objects.get(sensor=sensor, resolution=ReadingRollup.HOUR)
+    assert (hour.count, hour.temperature_sum) == (1, 30)
+
+def test_refresh_rollups_all_rebuilds_from_raw(user):
+    sensor = Sensor.objects.create(name="Rollup_003", model="TestSensor", owner=user)
+    base = timezone.make_aware(datetime(2025, 9, 20))
+    Reading.objects.bulk_create(
+        Reading(sensor=sensor, temperature=i, humidity=50, timestamp=base + timedelta(hours=i)) for i in range(48)
+    )
+    call_command("refresh_rollups", "--all")
+    assert ReadingRollup.objects.filter(sensor=sensor, resolution=ReadingRollup.HOUR).count() == 48
+    days = ReadingRollup.objects.filter(sensor=sensor, resolution=ReadingRollup.DAY).order_by("bucket")
+    assert [(d.count, d.temperature_sum) for d in days] == [(24, sum(range(24))), (24, sum(range(24, 48)))]
+
+def test_refresh_rollups_all_keeps_compacted_hours(user):
+    sensor = Sensor.objects.create(name="Rollup_006", model="TestSensor", owner=user)
+    base = datetime(2025, 9, 20, tzinfo=dt_timezone.utc)
+    insert_reading(sensor.id, 10, 50, base)
+    insert_reading(sensor.id, 30, 50, base + timedelta(minutes=30))
+    compact_sensor(sensor.id, base + timedelta(days=1), 86400)
+
+    call_command("refresh_rollups", "--all")
+    rollups = ReadingRollup.objects.filter(sensor=sensor).order_by("resolution")
+    assert [(r.resolution, r.count, r.temperature_sum) for r in rollups] == [(3600, 2, 40), (86400, 2, 40)]
+
+def test_aggregate_readings_from_rollups(auth_client, user):
+    sensor = Sensor.objects.create(name="Rollup_004", model="TestSensor", owner=user)
+    payload = [
+        {"temperature": 20 + i, "humidity": 50, "timestamp": f"2025-09-{20 + i // 24}T{i % 24:02d}:00:00"}
+        for i in range(48)
+    ]
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=payload)
+
+    url = f"/sensors/{sensor.id}/readings/aggregate?bucket=1d&fn=avg,min,max,count"
+    raw = auth_client.get(url).json()
+    rollup = auth_client.get(url + "&source=rollup").json()
+    assert len(rollup) == 2
+    assert rollup == raw
+
+def test_aggregate_readings_from_rollups_rejects_minute_buckets(auth_client, user):
+    sensor = Sensor.objects.create(name="Rollup_005", model="TestSensor", owner=user)
+    response = auth_client.get(f"/sensors/{sensor.id}/readings/aggregate?bucket=1m&source=rollup")
+    assert response.status_code == 400
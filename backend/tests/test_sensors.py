@@ -1,5 +1,10 @@
 import pytest
+from sensors.access import owner_cache
 from sensors.models import Sensor, Reading
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 def test_create_sensor(auth_client, user):
@@ -105,3 +110,116 @@ def test_unauthorized_response(client):
         "description": "Test sensor"
     })
     assert response.status_code == 401
+
+def test_ownership_change_is_seen_by_sensor_endpoints(auth_client, user, other_user):
+    sensor = Sensor.objects.create(name="Moved_001", model="Test Sensor", owner=user)
+    assert auth_client.get(f"/sensors/{sensor.id}/readings").status_code == 200
+
+    sensor.owner = other_user
+    sensor.save()
+    assert auth_client.get(f"/sensors/{sensor.id}/readings").status_code == 403
+    assert auth_client.get(f"/sensors/{sensor.id}").status_code == 403
+
+def test_owner_cache_lives_in_the_shared_backend(auth_client, user, other_user):
+    sensor = Sensor.objects.create(name="Moved_002", model="Test Sensor", owner=user)
+    assert auth_client.get(f"/sensors/{sensor.id}/readings").status_code == 200
+    # Every worker reads the same entry, so the invalidation on save reaches all of them
+    assert caches[settings.SENSORS_AUTH_CACHE].get(f"sensors:owner:{sensor.id}") == user.id
+
+    sensor.owner = other_user
+    sensor.save()
+    assert caches[settings.SENSORS_AUTH_CACHE].get(f"sensors:owner:{sensor.id}") is None
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_for_sensor_deleted_elsewhere_is_not_found(auth_client, user):
+    sensor = Sensor.objects.create(name="Gone_001", model="Test Sensor", owner=user)
+    sensor_id = sensor.id
+    sensor.delete()
+    # A worker whose cache entry has not expired yet still considers the sensor authorized
+    owner_cache.set(sensor_id, user.id)
+    payload = {"temperature": 20.0, "humidity": 50.0, "timestamp": "2025-09-23T14:00:00"}
+    assert auth_client.post(f"/sensors/{sensor_id}/readings", json=payload).status_code == 404
+    assert auth_client.post(f"/sensors/{sensor_id}/readings/batch", json=[payload]).status_code == 404
+    assert not Reading.objects.exists()
+
+def test_get_missing_sensor(auth_client, user):
+    response = auth_client.get("/sensors/999999")
+    assert response.status_code == 404
+
+def test_latest_reading_follows_ingest(auth_client, user):
+    sensor = Sensor.objects.create(name="Latest_001", model="Test Sensor", owner=user)
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch", json=[
+        {"temperature": 20.0, "humidity": 50.0, "timestamp": "2025-09-23T14:00:00"},
+        {"temperature": 21.0, "humidity": 51.0, "timestamp": "2025-09-23T14:05:00"},
+    ])
+    # A late reading does not replace a newer one
+    auth_client.post(f"/sensors/{sensor.id}/readings",
+                     json={"temperature": 19.0, "humidity": 49.0, "timestamp": "2025-09-23T13:00:00"})
+
+    data = auth_client.get(f"/sensors/{sensor.id}?include_latest=true").json()
+    assert data["latest_reading"]["temperature"] == 21.0
+    assert data["latest_reading"]["timestamp"].startswith("2025-09-23T14:05:00")
+
+    # Overwriting the newest reading updates the values
+    auth_client.post(f"/sensors/{sensor.id}/readings/batch?on_conflict=update",
+                     json=[{"temperature": 25.0, "humidity": 55.0, "timestamp": "2025-09-23T14:05:00"}])
+    data = auth_client.get(f"/sensors/{sensor.id}?include_latest=true").json()
+    assert data["latest_reading"]["temperature"] == 25.0
+
+    assert auth_client.get(f"/sensors/{sensor.id}").json()["latest_reading"] is None
+
+def test_list_sensors_with_latest_reading_in_one_query(auth_client, user):
+    for i in range(5):
+        sensor = Sensor.objects.create(name=f"Latest_01{i}", model="Test Sensor", owner=user)
+        auth_client.post(f"/sensors/{sensor.id}/readings",
+                         json={"temperature": i, "humidity": 50.0, "timestamp": "2025-09-23T14:00:00"})
+    Sensor.objects.create(name="Latest_020", model="Test Sensor", owner=user)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = auth_client.get("/sensors?include_latest=true")
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["latest_reading"] and item["latest_reading"]["temperature"] for item in items] == [0, 1, 2, 3, 4, None]
+    # One count and one page query
+    assert len([q for q in ctx.captured_queries if '"sensors_sensor"' in q["sql"]]) == 2
+
+def test_search_sensors(auth_client, user):
+    Sensor.objects.create(name="north_hall_01", model="EnviroSense", owner=user)
+    Sensor.objects.create(name="south_hall_02", model="EnviroSense", owner=user)
+    Sensor.objects.create(name="office_03", model="ClimaTrack", owner=user)
+
+    def names(query):
+        response = auth_client.get(f"/sensors?{query}")
+        assert response.status_code == 200
+        return sorted(item["name"] for item in response.json()["items"])
+
+    assert names("q=hall") == ["north_hall_01", "south_hall_02"]
+    assert names("q=Clima") == ["office_03"]
+    assert names("q=hall&mode=prefix") == []
+    assert names("q=north&mode=prefix") == ["north_hall_01"]
+    assert names("q=ENVIRO&mode=prefix&ignore_case=true") == ["north_hall_01", "south_hall_02"]
+    assert auth_client.get("/sensors?q=x&mode=regex").status_code == 422
+
+def test_list_sensors_cursor_pagination(auth_client, user):
+    for name in ["delta", "alpha", "charlie", "bravo", "alpha"]:
+        Sensor.objects.create(name=name, model="Test Sensor", owner=user)
+
+    def walk(order):
+        seen, url = [], f"/sensors?page_size=2&order={order}"
+        while url:
+            data = auth_client.get(url).json()
+            # Only the first, numbered page is counted
+            assert data["count"] == (5 if "cursor" not in url else None)
+            seen += [(item["name"], item["id"]) for item in data["items"]]
+            url = data["next_cursor"] and f"/sensors?page_size=2&order={order}&cursor={data['next_cursor']}"
+        return seen
+
+    by_id = walk("id")
+    assert [sensor_id for _, sensor_id in by_id] == sorted(sensor_id for _, sensor_id in by_id)
+    assert walk("name") == sorted(by_id)
+    assert len(by_id) == 5
+
+def test_list_sensors_rejects_bad_cursor(auth_client, user):
+    assert auth_client.get("/sensors?cursor=garbage").status_code == 400
+    assert auth_client.get("/sensors?order=name&cursor=WzFd").status_code == 400
+    assert auth_client.get("/sensors?page=1&cursor=WzFd").status_code == 400
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from io import StringIO
+import numpy as np
+import pytest
+from django.core.management import call_command
+from sensors.models import Sensor
+from sensors.stats import combine
+from sensors.tdigest import TDigest
+
+def post_batch(auth_client, sensor, values, start=0, on_conflict="ignore"):
+    base = datetime(2025, 9, 23, 14, 0)
+    payload = [
+        {"temperature": t, "humidity": 100 - t, "timestamp": (base + timedelta(minutes=start + i)).isoformat()}
+        for i, t in enumerate(values)
+    ]
+    response = auth_client.post(f"/sensors/{sensor.id}/readings/batch?on_conflict={on_conflict}", json=payload)
+    assert response.status_code == 200
+
+def test_tdigest_quantiles():
+    rng = np.random.default_rng(0)
+    data = rng.normal(20, 5, 100000)
+    digest = TDigest()
+    for chunk in np.array_split(data, 100):
+        digest.update(chunk)
+    digest = TDigest.from_bytes(digest.to_bytes())
+
+    assert digest.count == len(data)
+    assert len(digest.means) <= 150
+    for q in (0.5, 0.95, 0.99):
+        assert digest.quantile(q) == pytest.approx(np.quantile(data, q), abs=0.25)
+
+def test_combine_matches_two_pass_moments():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(10, 3, 500), rng.normal(30, 1, 300)
+    state = (0, 0.0, 0.0)
+    for part in (a, b):
+        state = combine(*state, len(part), part.mean(), ((part - part.mean()) ** 2).sum())
+    both = np.concatenate((a, b))
+    assert state[0] == 800
+    assert state[1] == pytest.approx(both.mean())
+    assert state[2] / 799 == pytest.approx(both.var(ddof=1))
+
+def test_stats_follow_ingest(auth_client, user):
+    sensor = Sensor.objects.create(name="Stats_001", model="TestSensor", owner=user)
+    values = list(np.random.default_rng(2).uniform(10, 30, 300).round(2))
+    post_batch(auth_client, sensor, values[:200])
+    auth_client.post(f"/sensors/{sensor.id}/readings",
+                     json={"temperature": values[200], "humidity": 100 - values[200], "timestamp": "2025-10-01T00:00:00"})
+    post_batch(auth_client, sensor, values[201:], start=201)
+
+    response = auth_client.get(f"/sensors/{sensor.id}/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 300
+    assert data["stale"] is False
+    assert data["temperature"]["mean"] == pytest.approx(np.mean(values))
+    assert data["temperature"]["std"] == pytest.approx(np.std(values, ddof=1))
+    assert data["temperature"]["min"] == min(values)
+    assert data["humidity"]["max"] == pytest.approx(100 - min(values))
+    assert data["temperature"]["p50"] == pytest.approx(np.median(values), abs=0.5)
+
+def test_stats_of_sensor_without_readings(auth_client, user):
+    sensor = Sensor.objects.create(name="Stats_002", model="TestSensor", owner=user)
+    data = auth_client.get(f"/sensors/{sensor.id}/stats").json()
+    assert data["count"] == 0
+    assert data["temperature"]["mean"] is None
+    assert data["temperature"]["p99"] is None
+
+def test_overwrites_mark_stats_stale_until_rebuilt(auth_client, user):
+    sensor = Sensor.objects.create(name="Stats_003", model="TestSensor", owner=user)
+    post_batch(auth_client, sensor, [10, 20, 30])
+    post_batch(auth_client, sensor, [40], on_conflict="update")
+    assert auth_client.get(f"/sensors/{sensor.id}/stats").json()["stale"] is True
+
+    out = StringIO()
+    call_command("rebuild_stats", "--stale", stdout=out)
+    assert "Rebuilt statistics for 1 sensor(s) from 3 readings" in out.getvalue()
+    data = auth_client.get(f"/sensors/{sensor.id}/stats").json()
+    assert data["stale"] is False
+    assert data["temperature"]["mean"] == pytest.approx(30)
+    assert data["temperature"]["min"] == 20
+
+def test_user_cannot_get_others_sensor_stats(auth_client, other_user):
+    other_sensor = Sensor.objects.create(name="Stats_004", model="TestSensor", owner=other_user)
+    assert auth_client.get(f"/sensors/{other_sensor.id}/stats").status_code == 403
@@ -0,0 +1,93 @@
+import logging
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from sensors.models import Sensor
+from sensors.timing import fingerprint, phase
+
+@pytest.fixture(autouse=True)
+def server_timing(settings):
+    # Off by default outside DEBUG, which tests run without
+    settings.SENSORS_SERVER_TIMING = True
+
+@pytest.fixture
+def headers(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+def metrics(response) -> dict:
+    # name -> params of each Server-Timing metric
+    parsed = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        parsed[name] = dict(param.split("=", 1) for param in params)
+    return parsed
+
+def test_fingerprint_collapses_literals_and_lists():
+    assert fingerprint(
+        'SELECT "id" FROM "sensors_sensor" WHERE "id" IN (%s, %s, %s) AND "name" = \'x\' LIMIT 21'
+    ) == 'SELECT "id" FROM "sensors_sensor" WHERE "id" IN (?) AND "name" = ? LIMIT ?'
+    assert fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s),\n (%s, %s)") == "INSERT INTO t (a, b) VALUES (?)"
+
+def test_phase_outside_request_is_a_no_op():
+    with phase("auth"):
+        pass
+
+def test_server_timing_header(db, user, headers):
+    sensor = Sensor.objects.create(name="Timing_001", model="Test Sensor", owner=user)
+    client = Client(**headers)
+    client.post(
+        f"/api/sensors/{sensor.id}/readings",
+        {"temperature": 20.0, "humidity": 50.0, "timestamp": "2025-09-23T14:00:00"},
+        content_type="application/json",
+    )
+
+    response = client.get(f"/api/sensors/{sensor.id}/readings?limit=10")
+    assert response.status_code == 200
+    timing = metrics(response)
+    assert {"db", "auth", "ownership", "serialize", "total"} <= set(timing)
+    assert timing["db"]["desc"] == '"3 queries"'
+    assert float(timing["total"]["dur"]) >= float(timing["serialize"]["dur"])
+
+    # Schema responses are timed by the renderer
+    assert "serialize" in metrics(client.get(f"/api/sensors/{sensor.id}"))
+
+def test_server_timing_can_be_disabled(db, user, headers, settings):
+    settings.SENSORS_SERVER_TIMING = False
+    response = Client(**headers).get("/api/sensors")
+    assert response.status_code == 200
+    assert not response.has_header("Server-Timing")
+
+def test_server_timing_follows_debug_by_default(db, user, headers, settings):
+    del settings.SENSORS_SERVER_TIMING
+    settings.DEBUG = False
+    assert not Client(**headers).get("/api/sensors").has_header("Server-Timing")
+    settings.DEBUG = True
+    assert Client(**headers).get("/api/sensors").has_header("Server-Timing")
+
+def test_slow_requests_are_logged_with_query_fingerprints(db, user, headers, settings, caplog):
+    settings.SENSORS_SLOW_REQUEST_MS = 0
+    sensor = Sensor.objects.create(name="Timing_002", model="Test Sensor", owner=user)
+    with caplog.at_level(logging.WARNING, logger="sensors.timing"):
+        Client(**headers).get(f"/api/sensors/{sensor.id}/readings?limit=10")
+    [record] = [r for r in caplog.records if r.name == "sensors.timing"]
+    message = record.getMessage()
+    assert f"GET /api/sensors/{sensor.id}/readings?limit=10 -> 200" in message
+    assert '1x' in message and '"sensors_reading"."sensor_id" = ?' in message
+
+def test_fast_requests_are_not_logged(db, user, headers, settings, caplog):
+    settings.SENSORS_SLOW_REQUEST_MS = 60000
+    with caplog.at_level(logging.WARNING, logger="sensors.timing"):
+        Client(**headers).get("/api/sensors")
+    assert not [r for r in caplog.records if r.name == "sensors.timing"]
+
+def test_server_timing_under_asgi(db, headers):
+    async def get():
+        return await AsyncClient().get("/api/sensors", headers={"Authorization": headers["HTTP_AUTHORIZATION"]})
+
+    response = async_to_sync(get)()
+    assert response.status_code == 200
+    timing = metrics(response)
+    # The user, the count and the sensors page are fetched through sync_to_async, but still count towards the request
+    assert timing["db"]["desc"] == '"3 queries"'
+    assert "auth" in timing
@@ -0,0 +1,179 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from io import StringIO
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from sensors import writebehind
+from sensors.models import Sensor, Reading
+from sensors.writebehind import REJECTED_DIR, BufferFull, WriteBehindBuffer, decode_rows, encode_rows
+
+# The flusher writes from its own thread and connection, so test data must be committed
+pytestmark = pytest.mark.django_db(transaction=True)
+
+BASE = timezone.make_aware(datetime(2025, 9, 23, 14, 0))
+
+@pytest.fixture
+def spool_dir(tmp_path, settings):
+    settings.SENSORS_INGEST_SPOOL_DIR = str(tmp_path)
+    writebehind._buffer = None
+    yield str(tmp_path)
+    writebehind._buffer = None
+
+def rows_for(sensor, count, start=0):
+    return [(sensor.id, BASE + timedelta(minutes=start + i), 20.0 + i, 50.0) for i in range(count)]
+
+def test_buffer_flushes_full_batches(user, spool_dir):
+    sensor = Sensor.objects.create(name="WB_001", model="TestSensor", owner=user)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batch_size=10, max_delay=60, spool_dir=spool_dir)
+        await buffer.submit(rows_for(sensor, 4))
+        await asyncio.sleep(0.05)
+        assert buffer.pending_rows == 4
+        await buffer.submit(rows_for(sensor, 6, start=4))
+        for _ in range(100):
+            if not buffer.size:
+                break
+            await asyncio.sleep(0.01)
+        assert buffer.size == 0
+        await buffer.close()
+
+    async_to_sync(scenario)()
+    assert Reading.objects.filter(sensor=sensor).count() == 10
+    assert os.listdir(spool_dir) == []
+
+def test_buffer_flushes_after_delay(user, spool_dir):
+    sensor = Sensor.objects.create(name="WB_002", model="TestSensor", owner=user)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batch_size=1000, max_delay=0.05, spool_dir=spool_dir)
+        await buffer.submit(rows_for(sensor, 3))
+        await asyncio.sleep(0.3)
+        assert buffer.size == 0
+        await buffer.close()
+
+    async_to_sync(scenario)()
+    assert Reading.objects.filter(sensor=sensor).count() == 3
+
+def test_buffer_applies_backpressure(user):
+    sensor = Sensor.objects.create(name="WB_003", model="TestSensor", owner=user)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batch_size=1000, max_delay=60, capacity=5, timeout=0.05)
+        await buffer.submit(rows_for(sensor, 5))
+        with pytest.raises(BufferFull):
+            await buffer.submit(rows_for(sensor, 1, start=5))
+        await buffer.flush()
+        await buffer.submit(rows_for(sensor, 1, start=5))
+        await buffer.close()
+
+    async_to_sync(scenario)()
+    assert Reading.objects.filter(sensor=sensor).count() == 6
+
+def test_replay_writes_spool_of_dead_process(user, spool_dir):
+    sensor = Sensor.objects.create(name="WB_004", model="TestSensor", owner=user)
+    rows = rows_for(sensor, 3)
+    Reading.objects.create(sensor=sensor, timestamp=rows[0][1], temperature=0, humidity=0)
+    with open(os.path.join(spool_dir, "1-1.ndjson"), "wb") as file:
+        # Last line torn by a crash mid-write
+        file.write(encode_rows(rows) + b'[1, "2025')
+
+    out = StringIO()
+    call_command("replay_spool", stdout=out)
+    assert "Replayed 3 reading(s)" in out.getvalue()
+    # Already written readings are skipped, so replays are safe to repeat
+    assert list(Reading.objects.filter(sensor=sensor).order_by("timestamp").values_list("temperature", flat=True)) == [0, 21, 22]
+    assert os.listdir(spool_dir) == []
+
+def test_buffered_endpoints(async_client, user, other_user, spool_dir):
+    sensor = Sensor.objects.create(name="WB_005", model="TestSensor", owner=user)
+    other_sensor = Sensor.objects.create(name="WB_006", model="TestSensor", owner=other_user)
+    payload = [{"temperature": 21.5, "humidity": 55.2, "timestamp": "2025-09-23T14:00:00"}]
+
+    async def scenario():
+        response = await async_client.post(f"/sensors/{sensor.id}/readings/buffered", json=payload)
+        assert response.status_code == 202
+        assert response.json() == {"accepted": 1}
+
+        bulk = [{"sensor": "WB_005", "temperature": 22, "humidity": 50, "timestamp": "2025-09-23T14:01:00"}]
+        response = await async_client.post("/readings/bulk/buffered", json=bulk)
+        assert response.status_code == 202
+
+        response = await async_client.post(f"/sensors/{other_sensor.id}/readings/buffered", json=payload)
+        assert response.status_code == 403
+        response = await async_client.post("/readings/bulk/buffered", json=[{**bulk[0], "sensor": "WB_006"}])
+        assert response.status_code == 404
+
+        await writebehind.get_ingest_buffer().close()
+
+    async_to_sync(scenario)()
+    assert Reading.objects.filter(sensor=sensor).count() == 2
+    assert sensor.latest_reading.temperature == 22
+
+async def wait_for_flush(buffer):
+    for _ in range(200):
+        if not buffer.size:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{buffer.size} readings still buffered")
+
+def test_rejected_readings_are_set_aside(user, spool_dir):
+    sensor = Sensor.objects.create(name="WB_007", model="TestSensor", owner=user)
+    deleted = Sensor.objects.create(name="WB_008", model="TestSensor", owner=user)
+    deleted_rows = rows_for(deleted, 2, start=10)
+    deleted.delete()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batch_size=1000, max_delay=0.01, spool_dir=spool_dir)
+        await buffer.submit(rows_for(sensor, 5) + deleted_rows)
+        await wait_for_flush(buffer)
+        # The flusher moves on instead of retrying the batch forever
+        await buffer.submit(rows_for(sensor, 1, start=5))
+        await wait_for_flush(buffer)
+        await buffer.close()
+
+    async_to_sync(scenario)()
+    assert Reading.objects.filter(sensor=sensor).count() == 6
+    [rejected] = os.listdir(os.path.join(spool_dir, REJECTED_DIR))
+    with open(os.path.join(spool_dir, REJECTED_DIR, rejected), "rb") as file:
+        assert list(decode_rows(file)) == deleted_rows
+
+def test_failed_replay_does_not_stop_the_flusher(user, spool_dir, monkeypatch):
+    sensor = Sensor.objects.create(name="WB_009", model="TestSensor", owner=user)
+
+    def broken_replay(directory):
+        raise OSError("spool unreadable")
+    monkeypatch.setattr(writebehind, "replay_spool", broken_replay)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(batch_size=1000, max_delay=0.01, spool_dir=spool_dir)
+        await buffer.submit(rows_for(sensor, 3))
+        await wait_for_flush(buffer)
+        await buffer.close()
+
+    async_to_sync(scenario)()
+    assert Reading.objects.filter(sensor=sensor).count() == 3
+
+def test_buffered_endpoint_under_wsgi(user, spool_dir, settings):
+    settings.SENSORS_INGEST_MAX_DELAY_MS = 10
+    sensor = Sensor.objects.create(name="WB_010", model="TestSensor", owner=user)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    # Every request runs the async view on a fresh event loop; the buffer must outlive them
+    for minute in range(3):
+        payload = [{"temperature": 21.5, "humidity": 55.2, "timestamp": f"2025-09-23T14:0{minute}:00"}]
+        response = client.post(f"/api/sensors/{sensor.id}/readings/buffered", payload, content_type="application/json")
+        assert response.status_code == 202
+
+    buffer = writebehind.get_ingest_buffer()
+    async_to_sync(wait_for_flush)(buffer)
+    assert Reading.objects.filter(sensor=sensor).count() == 3
+    # One live segment for the process, not one per request
+    assert len([name for name in os.listdir(spool_dir) if name.endswith(".ndjson")]) == 1
+    async_to_sync(buffer.close)()
+    assert os.listdir(spool_dir) == []